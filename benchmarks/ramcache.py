@@ -0,0 +1,56 @@
+"""RamCache per-operation timings.
+
+Measures hits and sets causing an eviction on caches filled up to their threshold:
+
+    python -m benchmarks.ramcache [--shards N] [--rounds N]
+"""
+
+import argparse
+import time
+
+from emmett_core.cache.handlers import RamCache
+
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def _filled_cache(size: int, shards: int) -> RamCache:
+    cache = RamCache(threshold=size, default_expire=3600, shards=shards)
+    for idx in range(size):
+        cache.set(f"key{idx}", idx)
+    return cache
+
+
+def bench_get(size: int, shards: int, rounds: int) -> float:
+    cache = _filled_cache(size, shards)
+    keys = [f"key{idx % size}" for idx in range(rounds)]
+    start = time.perf_counter()
+    for key in keys:
+        cache.get(key)
+    return (time.perf_counter() - start) / rounds
+
+
+def bench_set_evict(size: int, shards: int, rounds: int) -> float:
+    cache = _filled_cache(size, shards)
+    keys = [f"new{idx}" for idx in range(rounds)]
+    start = time.perf_counter()
+    for key in keys:
+        cache.set(key, 0)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8}  {'get':>10}  {'set with eviction':>18}")
+    for size in SIZES:
+        get_time = bench_get(size, args.shards, args.rounds)
+        set_time = bench_set_evict(size, args.shards, args.rounds)
+        print(f"{size:>8}  {get_time * 1e6:>8.2f}us  {set_time * 1e6:>16.2f}us")
+
+
+if __name__ == "__main__":
+    main()
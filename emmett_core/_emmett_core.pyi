@@ -9,11 +9,21 @@ def aes128_cfb128_encrypt(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
 def aes128_cfb8_decrypt(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
 def aes128_cfb8_encrypt(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
 def aes128_ctr128(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
+def aes256_gcm_decrypt(
+    data: bytearray | memoryview, key: bytes, nonce: bytes, tag: bytes, aad: bytes | None = None
+) -> None: ...
+def aes256_gcm_encrypt(data: bytearray | memoryview, key: bytes, nonce: bytes, aad: bytes | None = None) -> bytes: ...
 def aes256_cfb128_decrypt(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
 def aes256_cfb128_encrypt(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
 def aes256_cfb8_decrypt(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
 def aes256_cfb8_encrypt(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
 def aes256_ctr128(data: bytes, key: bytes, nonce: bytes) -> bytes: ...
+def chacha20poly1305_decrypt(
+    data: bytearray | memoryview, key: bytes, nonce: bytes, tag: bytes, aad: bytes | None = None
+) -> None: ...
+def chacha20poly1305_encrypt(
+    data: bytearray | memoryview, key: bytes, nonce: bytes, aad: bytes | None = None
+) -> bytes: ...
 def pbkdf2_sha1(data: bytes, salt: bytes, rounds: int, klen: int) -> bytes: ...
 def pbkdf2_sha256(data: bytes, salt: bytes, rounds: int, klen: int) -> bytes: ...
 def pbkdf2_sha384(data: bytes, salt: bytes, rounds: int, klen: int) -> bytes: ...
@@ -31,10 +41,14 @@ class HTTPRouter:
         host: str | None = None,
         scheme: str | None = None,
     ): ...
-    def match_route_direct(self, method: str, path: str) -> tuple[Any, dict[str, Any]]: ...
-    def match_route_scheme(self, scheme: str, method: str, path: str) -> tuple[Any, dict[str, Any]]: ...
-    def match_route_host(self, host: str, method: str, path: str) -> tuple[Any, dict[str, Any]]: ...
-    def match_route_all(self, host: str, scheme: str, method: str, path: str) -> tuple[Any, dict[str, Any]]: ...
+    def set_match_cache(self, capacity: int): ...
+    def match_cache_stats(self) -> tuple[int, int, int, int]: ...
+    def match_route_direct(self, method: str, path: str) -> tuple[Any, dict[str, Any] | list[str]]: ...
+    def match_route_scheme(self, scheme: str, method: str, path: str) -> tuple[Any, dict[str, Any] | list[str]]: ...
+    def match_route_host(self, host: str, method: str, path: str) -> tuple[Any, dict[str, Any] | list[str]]: ...
+    def match_route_all(
+        self, host: str, scheme: str, method: str, path: str
+    ) -> tuple[Any, dict[str, Any] | list[str]]: ...
 
 class WSRouter:
     def add_static_route(self, route, path: str, host: str | None = None, scheme: str | None = None): ...
@@ -1,4 +1,6 @@
 import asyncio
+import mmap
+import os
 from functools import partial
 from shutil import copyfileobj
 
@@ -53,3 +55,92 @@ def loop_open_file(*args, **kwargs):
 
 async def loop_copyfileobj(fsrc, fdst, length=None):
     return await asyncio.get_running_loop().run_in_executor(None, partial(copyfileobj, fsrc, fdst, length))
+
+
+STREAM_CHUNK_MIN = 64 * 1024
+STREAM_CHUNK_MAX = 1024 * 1024
+_STREAM_BATCH_CHUNKS = 8
+
+
+def stream_chunk_size(size: int) -> int:
+    return min(max(size // 64, STREAM_CHUNK_MIN), STREAM_CHUNK_MAX)
+
+
+class MappedFile:
+    __slots__ = ("_file", "_mmap", "view")
+
+    def __init__(self, path):
+        self._file = open(path, "rb")  # noqa: SIM115
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        except BaseException:
+            self._file.close()
+            raise
+        self.view = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+
+    def close(self):
+        try:
+            self.view.release()
+            if self._mmap is not None:
+                try:
+                    self._mmap.close()
+                except BufferError:
+                    #: slices still alive keep the map, which gets released along with them
+                    pass
+        finally:
+            self._file.close()
+
+
+class LoopMappedFileCtx:
+    __slots__ = ("_loop", "_obj", "_path")
+
+    def __init__(self, path, loop):
+        self._path = path
+        self._loop = loop
+        self._obj = None
+
+    async def __aenter__(self):
+        self._obj = await self._loop.run_in_executor(None, MappedFile, self._path)
+        return self._obj.view
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            self._obj.close()
+        finally:
+            self._obj = None
+
+
+def loop_map_file(path):
+    return LoopMappedFileCtx(path, asyncio.get_running_loop())
+
+
+def _slice_view(view, start, end, chunk_size):
+    rv = []
+    while start < end:
+        rv.append(bytes(view[start : min(start + chunk_size, end)]))
+        start += chunk_size
+    return rv
+
+
+async def iter_view_chunks(view, start=0, end=None, chunk_size=None, loop=None):
+    #: with a loop, slices are copied out of the view in batches within the executor,
+    #  so that page faults on mapped files don't block the loop
+    end = len(view) if end is None else end
+    chunk_size = chunk_size or stream_chunk_size(end - start)
+    batch_size = chunk_size * _STREAM_BATCH_CHUNKS
+    while start < end:
+        stop = min(start + batch_size, end)
+        if loop is None:
+            chunks = _slice_view(view, start, stop, chunk_size)
+        else:
+            future = loop.run_in_executor(None, _slice_view, view, start, stop, chunk_size)
+            try:
+                chunks = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                #: the copy holds a slice of the view, so it should end before the file gets closed
+                await asyncio.wait([future])
+                raise
+        for chunk in chunks:
+            yield chunk
+        start = stop
@@ -9,6 +9,7 @@ from typing import Any
 from ._internal import create_missing_app_folders, get_root_path
 from .datastructures import gsdict, sdict
 from .extensions import Extension, ExtensionType, Signals
+from .http.static import StaticIndex
 from .pipeline import Pipe
 from .protocols.rsgi.test_client.client import EmmettTestClient
 from .routing.cache import RouteCacheRule
@@ -318,6 +319,11 @@ class App:
         self._asgi_handlers["http"]._configure_methods()
         self._rsgi_handlers["http"]._configure_methods()
 
+    @cachedprop
+    def _static_index(self) -> StaticIndex:
+        #: in debug mode we rebuild the index to catch changes in static folders
+        return StaticIndex(self, refresh_interval=1.0 if self.debug else None)
+
     def _register_with_ctx(self):
         raise NotImplementedError
 
@@ -472,6 +478,7 @@ class App:
         return self._rsgi_handlers[scope.proto](scope, protocol)
 
     def __rsgi_init__(self, loop):
+        self._static_index.prepare(loop)
         self.send_signal(Signals.after_loop, loop=loop)
 
     def module(
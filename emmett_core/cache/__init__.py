@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING, Any, overload
 
 from ..typing import T
 from .handlers import RamCache
-from .helpers import CacheDecorator
+from .helpers import CacheDecorator, CacheManyDecorator
 
 
 if TYPE_CHECKING:
@@ -30,31 +30,63 @@ class Cache:
 
     @overload
     def __call__(
-        self, key: str | None = None, function: None = None, duration: int | str | None = "default"
+        self,
+        key: str | None = None,
+        function: None = None,
+        duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
     ) -> CacheDecorator: ...
 
     @overload
-    def __call__(self, key: str, function: Callable[..., T] | None, duration: int | str | None = "default") -> T: ...
+    def __call__(
+        self,
+        key: str,
+        function: Callable[..., T] | None,
+        duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
+    ) -> T: ...
 
     def __call__(
         self,
         key: str | None = None,
         function: Callable[..., T] | None = None,
         duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
     ) -> CacheDecorator | T:
-        return self._default_handler(key, function, duration)
+        return self._default_handler(key, function, duration, stale_ttl, early_refresh, tags)
 
     def get(self, key: str) -> Any:
         return self._default_handler.get(key)
 
-    def set(self, key: str, value: Any, duration: int | str | None = "default"):
-        self._default_handler.set(key, value, duration)
+    def set(self, key: str, value: Any, duration: int | str | None = "default", tags: list[str] | None = None):
+        return self._default_handler._store(key, value, duration, tags)
 
     def get_or_set(self, key: str, function: Callable[..., T], duration: int | str | None = "default") -> T:
         return self._default_handler.get_or_set(key, function, duration)
 
     def clear(self, key: str | None = None):
-        self._default_handler.clear(key)
+        return self._default_handler.clear(key)
+
+    def get_many(self, keys: list[str]) -> list[Any]:
+        return self._default_handler.get_many(keys)
+
+    def set_many(self, data: dict[str, Any], duration: int | str | None = "default"):
+        return self._default_handler.set_many(data, duration)
+
+    def delete_many(self, keys: list[str]):
+        return self._default_handler.delete_many(keys)
+
+    def many(self, key: str | None = None, duration: int | str | None = "default") -> CacheManyDecorator:
+        return self._default_handler.many(key, duration)
+
+    def invalidate_tags(self, *tags: str):
+        return self._default_handler.invalidate_tags(*tags)
 
     def response(
         self,
@@ -63,5 +95,10 @@ class Cache:
         language: bool = True,
         hostname: bool = False,
         headers: list[str] = [],
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
     ) -> RouteCacheRule:
-        return self._default_handler.response(duration, query_params, language, hostname, headers)
+        return self._default_handler.response(
+            duration, query_params, language, hostname, headers, stale_ttl, early_refresh, tags
+        )
@@ -2,25 +2,61 @@ from __future__ import annotations
 
 import asyncio
 import heapq
-import pickle
+import math
+import random
 import threading
 import time
-from collections.abc import Callable
+from collections import ChainMap, OrderedDict
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable
 from functools import wraps
 from typing import TYPE_CHECKING, Any, overload
 
 from ..typing import T
-from .helpers import CacheDecorator
+from .helpers import CacheDecorator, CacheManyDecorator
+from .serializers import CacheCompressor, CacheEntry, CacheSerializer, dump_value, get_serializer, load_value
 
 
 if TYPE_CHECKING:
     from ..routing.cache import RouteCacheRule
 
 
+_missing = object()
+
+
+def _unwrap(value: Any) -> Any:
+    return value.value if isinstance(value, CacheEntry) else value
+
+
+def should_refresh(entry: CacheEntry, early_refresh: float = 0.0, now: float | None = None) -> bool:
+    now = time.time() if now is None else now
+    if now >= entry.expiration:
+        return True
+    #: XFetch probabilistic early expiration, scaled by the time taken to compute the value
+    if not early_refresh or not entry.delta:
+        return False
+    return now - entry.delta * early_refresh * math.log(1.0 - random.random()) >= entry.expiration  # noqa: S311
+
+
+class KeyLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.users = 0
+
+
 class CacheHandler:
+    #: async handlers implement storage methods as coroutines
+    is_async = False
+
     def __init__(self, prefix: str = "", default_expire: int = 300):
         self._default_expire = default_expire
         self._prefix = prefix
+        #: in-flight computations, used to coalesce concurrent misses on the same key
+        self._inflight_loop: dict[str, asyncio.Future] = {}
+        self._inflight_sync: dict[str, KeyLock] = {}
+        self._inflight_lock = threading.Lock()
+        self._background_tasks: set[asyncio.Task] = set()
 
     @staticmethod
     def _key_prefix_(method: Callable[..., Any]) -> Callable[..., Any]:
@@ -31,14 +67,20 @@ class CacheHandler:
 
         return wrap
 
+    def _resolve_duration(self, duration: int | str | None) -> int:
+        if duration is None:
+            return 60 * 60 * 24 * 365
+        if duration == "default":
+            return self._default_expire
+        return duration  # type: ignore
+
     @staticmethod
     def _convert_duration_(method: Callable[..., Any]) -> Callable[..., Any]:
         @wraps(method)
-        def wrap(self, key: str, value: Any, duration: int | str | None = "default") -> Any:
-            if duration is None:
-                duration = 60 * 60 * 24 * 365
-            if duration == "default":
-                duration = self._default_expire
+        def wrap(
+            self, key: str, value: Any, duration: int | str | None = "default", tags: list[str] | None = None
+        ) -> Any:
+            duration = self._resolve_duration(duration)
             now = time.time()
             return method(
                 self,
@@ -47,53 +89,249 @@ class CacheHandler:
                 now=now,
                 duration=duration,
                 expiration=now + duration,  # type: ignore
+                tags=tags,
             )
 
         return wrap
 
     @overload
     def __call__(
-        self, key: str | None = None, function: None = None, duration: int | str | None = "default"
+        self,
+        key: str | None = None,
+        function: None = None,
+        duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
     ) -> CacheDecorator: ...
 
     @overload
-    def __call__(self, key: str, function: Callable[..., T] | None, duration: int | str | None = "default") -> T: ...
+    def __call__(
+        self,
+        key: str,
+        function: Callable[..., T] | None,
+        duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
+    ) -> T: ...
 
     def __call__(
         self,
         key: str | None = None,
         function: Callable[..., T] | None = None,
         duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
     ) -> CacheDecorator | T:
         if function:
             if asyncio.iscoroutinefunction(function):
-                return self.get_or_set_loop(key, function, duration)  # type: ignore
-            return self.get_or_set(key, function, duration)  # type: ignore
-        return CacheDecorator(self, key, duration)
+                return self.get_or_set_loop(key, function, duration, stale_ttl, early_refresh, tags)  # type: ignore
+            return self.get_or_set(key, function, duration, stale_ttl, early_refresh, tags)  # type: ignore
+        return CacheDecorator(self, key, duration, stale_ttl, early_refresh, tags)
+
+    def _single_flight(self, key: str, compute: Callable[[], T], blocking: bool = True) -> T | CacheEntry:
+        with self._inflight_lock:
+            key_lock = self._inflight_sync.get(key)
+            if key_lock is None:
+                key_lock = self._inflight_sync[key] = KeyLock()
+            key_lock.users += 1
+        try:
+            if not key_lock.lock.acquire(blocking):
+                return _missing
+            try:
+                return compute()
+            finally:
+                key_lock.lock.release()
+        finally:
+            with self._inflight_lock:
+                key_lock.users -= 1
+                if not key_lock.users:
+                    del self._inflight_sync[key]
+
+    async def _single_flight_loop(self, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        inflight = self._inflight_loop.get(key)
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                #: retry only if the computing task got cancelled, not us
+                if not inflight.cancelled():
+                    raise
+            return await self._single_flight_loop(key, compute)
+        future = self._inflight_loop[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            #: mark the exception as retrieved, as waiters might not exist
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self._inflight_loop[key]
+        return value
 
-    def get_or_set(self, key: str, function: Callable[[], T], duration: int | str | None = "default") -> T:
+    def _store(self, key: str, value: Any, duration: int | str | None, tags: list[str] | None = None):
+        #: tags are forwarded only when requested, to keep custom handlers' `set` signature working
+        if tags:
+            return self.set(key, value, duration, tags=tags)
+        return self.set(key, value, duration)
+
+    def _set_entry(
+        self,
+        key: str,
+        value: Any,
+        duration: int | str | None,
+        stale_ttl: int | None,
+        delta: float,
+        tags: list[str] | None = None,
+    ):
+        duration = self._resolve_duration(duration)
+        return self._store(key, CacheEntry(value, time.time() + duration, delta), duration + (stale_ttl or 0), tags)
+
+    def _compute(
+        self, key: str, function: Callable[[], T], duration: int | str | None, tags: list[str] | None = None
+    ) -> T:
+        #: another thread might have computed the value while we were waiting
         value = self.get(key)
         if value is None:
             value = function()
-            self.set(key, value, duration)
+            self._store(key, value, duration, tags)
         return value
 
-    async def get_or_set_loop(self, key: str, function: Callable[[], T], duration: int | str | None = "default") -> T:
-        value = self.get(key)
-        if value is None:
-            value = await function()  # type: ignore
-            self.set(key, value, duration)
+    def _compute_entry(
+        self,
+        key: str,
+        function: Callable[[], T],
+        duration: int | str | None,
+        stale_ttl: int | None,
+        recheck: bool,
+        tags: list[str] | None = None,
+    ) -> T:
+        if recheck and isinstance(entry := self._get_raw(key), CacheEntry):
+            return entry.value
+        start = time.perf_counter()
+        value = function()
+        self._set_entry(key, value, duration, stale_ttl, time.perf_counter() - start, tags)
+        return value
+
+    async def _compute_loop(
+        self, key: str, function: Callable[[], Awaitable[T]], duration: int | str | None, tags: list[str] | None = None
+    ) -> T:
+        value = await function()
+        if self.is_async:
+            await self._store(key, value, duration, tags)
+        else:
+            self._store(key, value, duration, tags)
+        return value
+
+    async def _compute_entry_loop(
+        self,
+        key: str,
+        function: Callable[[], Awaitable[T]],
+        duration: int | str | None,
+        stale_ttl: int | None,
+        tags: list[str] | None = None,
+    ) -> T:
+        start = time.perf_counter()
+        value = await function()
+        if self.is_async:
+            await self._set_entry(key, value, duration, stale_ttl, time.perf_counter() - start, tags)
+        else:
+            self._set_entry(key, value, duration, stale_ttl, time.perf_counter() - start, tags)
         return value
 
+    async def _refresh_loop(self, key: str, compute: Callable[[], Awaitable[Any]]):
+        try:
+            await self._single_flight_loop(key, compute)
+        except Exception:  # noqa: BLE001
+            pass
+
+    def get_or_set(
+        self,
+        key: str,
+        function: Callable[[], T],
+        duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
+    ) -> T:
+        value = self._get_raw(key)
+        if not stale_ttl and not early_refresh:
+            if value is not None:
+                return _unwrap(value)
+            return self._single_flight(key, lambda: self._compute(key, function, duration, tags))  # type: ignore
+        if isinstance(value, CacheEntry):
+            if should_refresh(value, early_refresh):
+                #: the first thread refreshes the entry, others keep serving it
+                rv = self._single_flight(
+                    key, lambda: self._compute_entry(key, function, duration, stale_ttl, False, tags), blocking=False
+                )
+                if rv is not _missing:
+                    return rv  # type: ignore
+            return value.value
+        return self._single_flight(key, lambda: self._compute_entry(key, function, duration, stale_ttl, True, tags))  # type: ignore
+
+    async def get_or_set_loop(
+        self,
+        key: str,
+        function: Callable[[], T],
+        duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
+    ) -> T:
+        value = (await self._get_raw(key)) if self.is_async else self._get_raw(key)
+        if not stale_ttl and not early_refresh:
+            if value is not None:
+                return _unwrap(value)
+            return await self._single_flight_loop(key, lambda: self._compute_loop(key, function, duration, tags))  # type: ignore
+        compute = lambda: self._compute_entry_loop(key, function, duration, stale_ttl, tags)  # type: ignore
+        if isinstance(value, CacheEntry):
+            if should_refresh(value, early_refresh) and key not in self._inflight_loop:
+                #: serve the current value while refreshing it in background
+                task = asyncio.create_task(self._refresh_loop(key, compute))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return value.value
+        return await self._single_flight_loop(key, compute)
+
+    def _get_raw(self, key: str) -> Any:
+        #: stored values, including the refresh metadata wrapping `stale_ttl` and `early_refresh` entries
+        return self.get(key)
+
     def get(self, key: str) -> Any:
         return None
 
-    def set(self, key: str, value: Any, duration: int | str | None):
+    def set(self, key: str, value: Any, duration: int | str | None, tags: list[str] | None = None):
         pass
 
     def clear(self, key: str | None = None):
         pass
 
+    def invalidate_tags(self, *tags: str):
+        raise NotImplementedError(f"{self.__class__.__name__} doesn't support tags invalidation")
+
+    def get_many(self, keys: list[str]) -> list[Any]:
+        return [self.get(key) for key in keys]
+
+    def set_many(self, data: dict[str, Any], duration: int | str | None = "default"):
+        for key, value in data.items():
+            self.set(key, value, duration)
+
+    def delete_many(self, keys: list[str]):
+        for key in keys:
+            self.clear(key)
+
+    def many(self, key: str | None = None, duration: int | str | None = "default") -> CacheManyDecorator:
+        return CacheManyDecorator(self, key, duration)
+
     def response(
         self,
         duration: int | str | None = "default",
@@ -101,93 +339,160 @@ class CacheHandler:
         language: bool = True,
         hostname: bool = False,
         headers: list[str] = [],
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
     ) -> RouteCacheRule:
         from ..routing.cache import RouteCacheRule
 
-        return RouteCacheRule(self, query_params, language, hostname, headers, duration)
+        return RouteCacheRule(self, query_params, language, hostname, headers, duration, stale_ttl, early_refresh, tags)
 
 
 class RamElement:
-    __slots__ = ("value", "exp", "acc")
+    __slots__ = ("value", "exp", "hit")
 
-    def __init__(self, value: Any, exp: int, acc: int):
+    def __init__(self, value: Any, exp: float):
         self.value = value
         self.exp = exp
-        self.acc = acc
+        self.hit = False
 
 
-class RamCache(CacheHandler):
-    lock = threading.RLock()
+class RamShard:
+    __slots__ = ("data", "heap_exp", "lock", "threshold")
 
-    def __init__(self, prefix: str = "", threshold: int = 500, default_expire: int = 300):
-        super().__init__(prefix=prefix, default_expire=default_expire)
-        self.data: dict[str, Any] = {}
-        self._heap_exp: list[tuple[int, str]] = []
-        self._heap_acc: list[tuple[float, str]] = []
-        self._threshold = threshold
+    def __init__(self, threshold: int):
+        #: insertion order is kept as eviction order, expirations are tracked in a heap
+        #  with lazy deletion: entries outdated by sets and evictions are skipped on pop.
+        self.data: OrderedDict[str, RamElement] = OrderedDict()
+        self.heap_exp: list[tuple[float, str]] = []
+        self.lock = threading.Lock()
+        self.threshold = threshold
 
-    def _prune(self, now):
+    def prune(self, now: float):
         # remove expired items
-        while self._heap_exp:
-            exp, rk = self._heap_exp[0]
-            if exp >= now:
-                break
-            self._heap_exp.remove((exp, rk))
-            element = self.data.get(rk)
-            if element and element.exp == exp:
-                self._heap_acc.remove((self.data[rk].acc, rk))
-                del self.data[rk]
-        # remove threshold exceding elements
-        while len(self.data) > self._threshold:
-            rk = heapq.heappop(self._heap_acc)[1]
+        heap = self.heap_exp
+        while heap and heap[0][0] < now:
+            exp, rk = heapq.heappop(heap)
             element = self.data.get(rk)
-            if element:
-                self._heap_exp.remove((element.exp, rk))
+            if element is not None and element.exp == exp:
                 del self.data[rk]
+        # remove threshold exceding elements, giving a second chance to the ones read since last pass
+        while len(self.data) > self.threshold:
+            rk, element = self.data.popitem(last=False)
+            if element.hit:
+                element.hit = False
+                self.data[rk] = element
+        # compact the heap when outdated entries dominate
+        if len(heap) > 2 * len(self.data) + 64:
+            self.heap_exp = [(element.exp, rk) for rk, element in self.data.items()]
+            heapq.heapify(self.heap_exp)
+
+    def clear(self):
+        self.data.clear()
+        self.heap_exp = []
+
+
+class RamCache(CacheHandler):
+    def __init__(self, prefix: str = "", threshold: int = 500, default_expire: int = 300, shards: int = 1):
+        super().__init__(prefix=prefix, default_expire=default_expire)
+        self._threshold = threshold
+        self._shards = [RamShard(max(1, -(-threshold // shards))) for _ in range(shards)]
+        self._tags: dict[str, set[str]] = {}
+        self._tags_lock = threading.Lock()
+
+    @property
+    def data(self) -> ChainMap[str, RamElement]:
+        return ChainMap(*(shard.data for shard in self._shards))
+
+    def _shard(self, key: str) -> RamShard:
+        shards = self._shards
+        return shards[hash(key) % len(shards)] if len(shards) > 1 else shards[0]
 
     @CacheHandler._key_prefix_
-    def get(self, key: str) -> Any:
-        try:
-            with self.lock:
-                element = self.data[key]
-                now = time.time()
-                if element.exp < now:
-                    return None
-                self._heap_acc.remove((element.acc, key))
-                element.acc = now
-                heapq.heappush(self._heap_acc, (element.acc, key))
-            val = element.value
-        except KeyError:
+    def _get_raw(self, key: str) -> Any:
+        #: reads don't lock: hits are just marked for the eviction pass
+        element = self._shard(key).data.get(key)
+        if element is None or element.exp < time.time():
             return None
-        return val
+        element.hit = True
+        return element.value
+
+    def get(self, key: str) -> Any:
+        return _unwrap(self._get_raw(key))
 
     @CacheHandler._key_prefix_
     @CacheHandler._convert_duration_
     def set(self, key: str, value: Any, **kwargs):
-        with self.lock:
-            self._prune(kwargs["now"])
-            heapq.heappush(self._heap_exp, (kwargs["expiration"], key))
-            heapq.heappush(self._heap_acc, (kwargs["now"], key))
-            self.data[key] = RamElement(value, kwargs["expiration"], kwargs["now"])
+        shard = self._shard(key)
+        with shard.lock:
+            heapq.heappush(shard.heap_exp, (kwargs["expiration"], key))
+            shard.data[key] = RamElement(value, kwargs["expiration"])
+            shard.data.move_to_end(key)
+            shard.prune(kwargs["now"])
+        if kwargs["tags"]:
+            self._tag(key, kwargs["tags"])
+
+    def _tag(self, key: str, tags: list[str]):
+        with self._tags_lock:
+            for tag in tags:
+                members = self._tags.setdefault(tag, set())
+                members.add(key)
+                #: drop evicted and expired keys once the group outgrows the cache
+                if len(members) > 2 * self._threshold:
+                    self._tags[tag] = {rk for rk in members if rk in self._shard(rk).data}
 
     @CacheHandler._key_prefix_
     def clear(self, key: str | None = None):
-        with self.lock:
-            if key is not None:
-                try:
-                    rv = self.data[key]
-                    self._heap_acc.remove((rv.acc, key))
-                    self._heap_exp.remove((rv.exp, key))
-                    del self.data[key]
-                    return
-                except Exception:
-                    return
-            self.data.clear()
-            self._heap_acc = []
-            self._heap_exp = []
+        if key is not None:
+            shard = self._shard(key)
+            with shard.lock:
+                shard.data.pop(key, None)
+            return
+        for shard in self._shards:
+            with shard.lock:
+                shard.clear()
+        with self._tags_lock:
+            self._tags.clear()
+
+    def _group_by_shard(self, keys: Iterable[str]) -> dict[RamShard, list[str]]:
+        rv: dict[RamShard, list[str]] = {}
+        for key in keys:
+            rv.setdefault(self._shard(key), []).append(key)
+        return rv
+
+    def set_many(self, data: dict[str, Any], duration: int | str | None = "default"):
+        duration = self._resolve_duration(duration)
+        now = time.time()
+        expiration = now + duration
+        items = {self._prefix + key: value for key, value in data.items()}
+        #: lock and prune every shard once per batch
+        for shard, keys in self._group_by_shard(items).items():
+            with shard.lock:
+                for key in keys:
+                    heapq.heappush(shard.heap_exp, (expiration, key))
+                    shard.data[key] = RamElement(items[key], expiration)
+                    shard.data.move_to_end(key)
+                shard.prune(now)
+
+    def delete_many(self, keys: list[str]):
+        for shard, shard_keys in self._group_by_shard(self._prefix + key for key in keys).items():
+            with shard.lock:
+                for key in shard_keys:
+                    shard.data.pop(key, None)
+
+    def invalidate_tags(self, *tags: str):
+        with self._tags_lock:
+            keys = set().union(*(self._tags.pop(tag, ()) for tag in tags))
+        for key in keys:
+            shard = self._shard(key)
+            with shard.lock:
+                shard.data.pop(key, None)
 
 
 class RedisCache(CacheHandler):
+    #: keys are scanned and unlinked in batches of this size
+    scan_batch = 500
+
     def __init__(
         self,
         host: str = "localhost",
@@ -196,56 +501,216 @@ class RedisCache(CacheHandler):
         db: int = 0,
         prefix: str = "cache:",
         default_expire: int = 300,
+        serializer: str | CacheSerializer = "pickle",
+        compress_threshold: int | None = None,
+        compression: str = "zlib",
+        compression_level: int | None = None,
         **kwargs,
     ):
         super().__init__(prefix=prefix, default_expire=default_expire)
+        self._serializer = get_serializer(serializer)
+        #: values bigger than the threshold get compressed, when enabled
+        self._compressor = (
+            CacheCompressor(compression, compress_threshold, compression_level)
+            if compress_threshold is not None
+            else None
+        )
+        self._cache = self._build_client(host=host, port=port, password=password, db=db, **kwargs)
+
+    def _build_client(self, **kwargs):
         try:
             import redis
         except ImportError:
             raise RuntimeError("no redis module found")
-        self._cache = redis.Redis(host=host, port=port, password=password, db=db, **kwargs)
+        return redis.Redis(**kwargs)
 
     def _dump_obj(self, value: Any) -> bytes:
-        if isinstance(value, int):
-            return str(value).encode("ascii")
-        return b"!" + pickle.dumps(value)
+        return dump_value(self._serializer, value, self._compressor)
 
     def _load_obj(self, value: Any) -> Any:
-        if value is None:
-            return None
-        if value.startswith(b"!"):
-            try:
-                return pickle.loads(value[1:])  # noqa: S301
-            except pickle.PickleError:
-                return None
-        try:
-            return int(value)
-        except ValueError:
-            return None
+        return load_value(value)
 
     @CacheHandler._key_prefix_
-    def get(self, key: str) -> Any:
+    def _get_raw(self, key: str) -> Any:
         return self._load_obj(self._cache.get(key))
 
+    def get(self, key: str) -> Any:
+        return _unwrap(self._get_raw(key))
+
+    def _tag_key(self, tag: str) -> str:
+        return self._prefix + "__tags__:" + tag
+
+    def _pipe_tags(self, pipe: Any, key: str, tags: list[str], duration: int):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, key)
+            #: the group lives as long as its longest-lived member
+            pipe.expire(tag_key, duration, nx=True)
+            pipe.expire(tag_key, duration, gt=True)
+
     @CacheHandler._key_prefix_
     @CacheHandler._convert_duration_
     def set(self, key: str, value: Any, **kwargs):
         dumped = self._dump_obj(value)
-        return self._cache.setex(name=key, time=kwargs["duration"], value=dumped)
+        if not kwargs["tags"]:
+            return self._cache.setex(name=key, time=kwargs["duration"], value=dumped)
+        with self._cache.pipeline(transaction=False) as pipe:
+            pipe.setex(name=key, time=kwargs["duration"], value=dumped)
+            self._pipe_tags(pipe, key, kwargs["tags"], kwargs["duration"])
+            return pipe.execute()[0]
+
+    def get_many(self, keys: list[str]) -> list[Any]:
+        if not keys:
+            return []
+        return [_unwrap(self._load_obj(value)) for value in self._cache.mget([self._prefix + key for key in keys])]
+
+    def set_many(self, data: dict[str, Any], duration: int | str | None = "default"):
+        duration = self._resolve_duration(duration)
+        with self._cache.pipeline(transaction=False) as pipe:
+            for key, value in data.items():
+                pipe.setex(name=self._prefix + key, time=duration, value=self._dump_obj(value))
+            pipe.execute()
+
+    def delete_many(self, keys: list[str]):
+        if keys:
+            self._cache.unlink(*(self._prefix + key for key in keys))
+
+    def _unlink_iter(self, keys: Iterable[bytes]):
+        batch = []
+        for key in keys:
+            batch.append(key)
+            if len(batch) >= self.scan_batch:
+                self._cache.unlink(*batch)
+                batch = []
+        if batch:
+            self._cache.unlink(*batch)
 
     @CacheHandler._key_prefix_
     def clear(self, key: str | None = None):
         if key is not None:
             if key.endswith("*"):
-                keys = self._cache.delete(self._cache.keys(key))
-                if keys:
-                    self._cache.delete(*keys)
+                self._unlink_iter(self._cache.scan_iter(match=key, count=self.scan_batch))
                 return
-            self._cache.delete(key)
+            self._cache.unlink(key)
             return
         if self._prefix:
-            keys = self._cache.keys(self._prefix + "*")
-            if keys:
-                self._cache.delete(*keys)
+            self._unlink_iter(self._cache.scan_iter(match=self._prefix + "*", count=self.scan_batch))
             return
         self._cache.flushdb()
+
+    def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            self._unlink_iter(self._cache.sscan_iter(tag_key, count=self.scan_batch))
+            self._cache.unlink(tag_key)
+
+
+class AsyncRedisCache(RedisCache):
+    is_async = True
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        password: str | None = None,
+        db: int = 0,
+        prefix: str = "cache:",
+        default_expire: int = 300,
+        serializer: str | CacheSerializer = "pickle",
+        compress_threshold: int | None = None,
+        compression: str = "zlib",
+        compression_level: int | None = None,
+        max_connections: int | None = None,
+        **kwargs,
+    ):
+        super().__init__(
+            host=host,
+            port=port,
+            password=password,
+            db=db,
+            prefix=prefix,
+            default_expire=default_expire,
+            serializer=serializer,
+            compress_threshold=compress_threshold,
+            compression=compression,
+            compression_level=compression_level,
+            max_connections=max_connections,
+            **kwargs,
+        )
+
+    def _build_client(self, **kwargs):
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("no redis module found")
+        return redis.Redis(connection_pool=redis.ConnectionPool(**kwargs))
+
+    def get_or_set(self, *args, **kwargs):
+        raise RuntimeError(f"{self.__class__.__name__} only supports async functions")
+
+    @CacheHandler._key_prefix_
+    async def _get_raw(self, key: str) -> Any:
+        return self._load_obj(await self._cache.get(key))
+
+    async def get(self, key: str) -> Any:
+        return _unwrap(await self._get_raw(key))
+
+    @CacheHandler._key_prefix_
+    @CacheHandler._convert_duration_
+    async def set(self, key: str, value: Any, **kwargs):
+        dumped = self._dump_obj(value)
+        if not kwargs["tags"]:
+            return await self._cache.setex(name=key, time=kwargs["duration"], value=dumped)
+        async with self._cache.pipeline(transaction=False) as pipe:
+            pipe.setex(name=key, time=kwargs["duration"], value=dumped)
+            self._pipe_tags(pipe, key, kwargs["tags"], kwargs["duration"])
+            return (await pipe.execute())[0]
+
+    async def get_many(self, keys: list[str]) -> list[Any]:
+        if not keys:
+            return []
+        values = await self._cache.mget([self._prefix + key for key in keys])
+        return [_unwrap(self._load_obj(value)) for value in values]
+
+    async def set_many(self, data: dict[str, Any], duration: int | str | None = "default"):
+        duration = self._resolve_duration(duration)
+        async with self._cache.pipeline(transaction=False) as pipe:
+            for key, value in data.items():
+                pipe.setex(name=self._prefix + key, time=duration, value=self._dump_obj(value))
+            await pipe.execute()
+
+    async def delete_many(self, keys: list[str]):
+        if keys:
+            await self._cache.unlink(*(self._prefix + key for key in keys))
+
+    async def _unlink_iter(self, keys: AsyncIterable[bytes]):
+        batch = []
+        async for key in keys:
+            batch.append(key)
+            if len(batch) >= self.scan_batch:
+                await self._cache.unlink(*batch)
+                batch = []
+        if batch:
+            await self._cache.unlink(*batch)
+
+    @CacheHandler._key_prefix_
+    async def clear(self, key: str | None = None):
+        if key is not None:
+            if key.endswith("*"):
+                await self._unlink_iter(self._cache.scan_iter(match=key, count=self.scan_batch))
+                return
+            await self._cache.unlink(key)
+            return
+        if self._prefix:
+            await self._unlink_iter(self._cache.scan_iter(match=self._prefix + "*", count=self.scan_batch))
+            return
+        await self._cache.flushdb()
+
+    async def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            await self._unlink_iter(self._cache.sscan_iter(tag_key, count=self.scan_batch))
+            await self._cache.unlink(tag_key)
+
+    async def close(self):
+        await self._cache.aclose()
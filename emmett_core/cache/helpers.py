@@ -13,11 +13,22 @@ if TYPE_CHECKING:
 
 
 class CacheDecorator(CacheHashMixin):
-    def __init__(self, handler: CacheHandler, key: str | None, duration: int | str | None = "default"):
+    def __init__(
+        self,
+        handler: CacheHandler,
+        key: str | None,
+        duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
+    ):
         super().__init__()
         self._cache = handler
         self.key = key
         self.duration = duration
+        self.stale_ttl = stale_ttl
+        self.early_refresh = early_refresh
+        self.tags = tags
         self.add_strategy("args")
         self.add_strategy("kwargs", self.dict_strategy)
 
@@ -31,7 +42,9 @@ class CacheDecorator(CacheHashMixin):
                 key = self.key or self._key_from_wrapped(f)
             else:
                 key = self._build_ctx_key(args=args, kwargs=kwargs)
-            return self._cache.get_or_set(key, lambda: f(*args, **kwargs), self.duration)
+            return self._cache.get_or_set(
+                key, lambda: f(*args, **kwargs), self.duration, self.stale_ttl, self.early_refresh, self.tags
+            )
 
         return wrap
 
@@ -42,7 +55,9 @@ class CacheDecorator(CacheHashMixin):
                 key = self.key or self._key_from_wrapped(f)
             else:
                 key = self._build_ctx_key(args=args, kwargs=kwargs)
-            return await self._cache.get_or_set_loop(key, lambda: f(*args, **kwargs), self.duration)
+            return await self._cache.get_or_set_loop(
+                key, lambda: f(*args, **kwargs), self.duration, self.stale_ttl, self.early_refresh, self.tags
+            )
 
         return wrap
 
@@ -51,3 +66,63 @@ class CacheDecorator(CacheHashMixin):
         if not self.key:
             self.key = f.__module__ + "." + f.__name__
         return rv
+
+
+class CacheManyDecorator:
+    def __init__(self, handler: CacheHandler, key: str | None, duration: int | str | None = "default"):
+        self._cache = handler
+        self.key = key
+        self.duration = duration
+
+    def _keys(self, ids: list[Any]) -> list[str]:
+        return [f"{self.key}:{oid}" for oid in ids]
+
+    def _split(self, ids: list[Any], values: list[Any]) -> tuple[dict[Any, Any], list[Any]]:
+        found, missing = {}, []
+        for oid, value in zip(ids, values, strict=True):
+            if value is None:
+                missing.append(oid)
+            else:
+                found[oid] = value
+        return found, missing
+
+    def _merge(self, ids: list[Any], found: dict[Any, Any], computed: dict[Any, Any]) -> dict[Any, Any]:
+        found.update(computed)
+        return {oid: found[oid] for oid in ids if oid in found}
+
+    def _to_store(self, computed: dict[Any, Any]) -> dict[str, Any]:
+        return {f"{self.key}:{oid}": value for oid, value in computed.items() if value is not None}
+
+    def _wrap_sync(self, f: Callable[[list[Any]], dict[Any, Any]]) -> Callable[[list[Any]], dict[Any, Any]]:
+        @wraps(f)
+        def wrap(ids: list[Any]) -> dict[Any, Any]:
+            found, missing = self._split(ids, self._cache.get_many(self._keys(ids)))
+            computed = {}
+            if missing:
+                computed = f(missing)
+                self._cache.set_many(self._to_store(computed), self.duration)
+            return self._merge(ids, found, computed)
+
+        return wrap
+
+    def _wrap_loop(
+        self, f: Callable[[list[Any]], Awaitable[dict[Any, Any]]]
+    ) -> Callable[[list[Any]], Awaitable[dict[Any, Any]]]:
+        @wraps(f)
+        async def wrap(ids: list[Any]) -> dict[Any, Any]:
+            values = self._cache.get_many(self._keys(ids))
+            found, missing = self._split(ids, (await values) if self._cache.is_async else values)
+            computed = {}
+            if missing:
+                computed = await f(missing)
+                stored = self._cache.set_many(self._to_store(computed), self.duration)
+                if self._cache.is_async:
+                    await stored
+            return self._merge(ids, found, computed)
+
+        return wrap
+
+    def __call__(self, f: Callable[..., Any]) -> Callable[..., Any]:
+        if not self.key:
+            self.key = f.__module__ + "." + f.__name__
+        return self._wrap_loop(f) if asyncio.iscoroutinefunction(f) else self._wrap_sync(f)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import pickle
+import struct
+import zlib
+from collections import namedtuple
+from collections.abc import Callable
+from typing import Any
+
+from .._imports import msgpack, zstandard
+from ..compression import Codec, DeflateCodec, ZstdCodec
+from ..parsers import json as _json_loads
+from ..serializers import json as _json_dumps
+
+
+CacheEntry = namedtuple("CacheEntry", ["value", "expiration", "delta"])
+#: expiration, delta
+_entry_struct = struct.Struct("!dd")
+
+
+class CachedResponse:
+    __slots__ = ["body", "delta", "expiration", "headers", "status"]
+
+    #: kind, status, expiration, delta, headers length
+    _struct = struct.Struct("!BHddI")
+
+    def __init__(self, status: int, headers: list[tuple[str, str]], body: Any, expiration: float, delta: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expiration = expiration
+        self.delta = delta
+
+    def encode(self) -> bytes:
+        body = self.body
+        if isinstance(body, bytes):
+            kind = 0
+        elif isinstance(body, str):
+            kind, body = 1, body.encode("utf8")
+        else:
+            kind, body = 2, pickle.dumps(body)
+        headers = "".join(f"{key}: {value}\r\n" for key, value in self.headers).encode("utf8")
+        return b"".join(
+            (self._struct.pack(kind, self.status, self.expiration, self.delta, len(headers)), headers, body)
+        )
+
+    @classmethod
+    def decode(cls, data: bytes) -> CachedResponse:
+        kind, status, expiration, delta, headers_len = cls._struct.unpack_from(data)
+        offset = cls._struct.size
+        headers = [
+            tuple(line.split(": ", 1))
+            for line in data[offset : offset + headers_len].decode("utf8").split("\r\n")
+            if line
+        ]
+        body = data[offset + headers_len :]
+        if kind == 1:
+            body = body.decode("utf8")
+        elif kind == 2:
+            body = pickle.loads(body)  # noqa: S301
+        return cls(status, headers, body, expiration, delta)  # type: ignore
+
+
+class CacheSerializer:
+    #: payload marker, must not collide with other serializers or with ints
+    tag = b""
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class PickleSerializer(CacheSerializer):
+    tag = b"!"
+
+    def dumps(self, value: Any) -> bytes:
+        return self.tag + pickle.dumps(value)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return pickle.loads(data)  # noqa: S301
+
+
+class JSONSerializer(CacheSerializer):
+    tag = b"J"
+
+    def dumps(self, value: Any) -> bytes:
+        rv = _json_dumps(value)
+        return self.tag + (rv.encode("utf8") if isinstance(rv, str) else rv)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return _json_loads(data)
+
+
+class MsgpackSerializer(CacheSerializer):
+    tag = b"M"
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("no msgpack module found")
+
+    def dumps(self, value: Any) -> bytes:
+        return self.tag + msgpack.packb(value)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        if msgpack is None:
+            raise ValueError("no msgpack module found")
+        return msgpack.unpackb(data)
+
+
+class RawSerializer(PickleSerializer):
+    #: bytes and strings are stored as they are, other values fall back to pickle
+    tag_bytes = b"B"
+    tag_str = b"S"
+
+    def dumps(self, value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return self.tag_bytes + value
+        if isinstance(value, str):
+            return self.tag_str + value.encode("utf8")
+        return super().dumps(value)
+
+
+class CacheCompressor:
+    __slots__ = ["codec", "tag", "threshold"]
+
+    def __init__(self, compression: str = "zlib", threshold: int = 1024, level: int | None = None):
+        if compression not in _compressors:
+            raise RuntimeError(f"Unknown cache compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("no zstandard module found")
+        tag, codec_cls = _compressors[compression]
+        self.codec: Codec = codec_cls(level)
+        self.tag = COMPRESSED_TAG + tag
+        self.threshold = threshold
+
+    def compress(self, payload: bytes) -> bytes:
+        if len(payload) < self.threshold:
+            return payload
+        rv = self.tag + self.codec.compress(payload)
+        #: keep incompressible payloads as they are
+        return rv if len(rv) < len(payload) else payload
+
+
+def _load_entry(data: bytes) -> CacheEntry:
+    expiration, delta = _entry_struct.unpack_from(data)
+    return CacheEntry(load_value(data[_entry_struct.size :]), expiration, delta)
+
+
+def _load_compressed(data: bytes) -> Any:
+    codec = _decompressors.get(data[0])
+    if codec is None:
+        raise ValueError("unknown cache compression")
+    try:
+        payload = codec.decompress(data[1:])
+    except _decompress_errors:
+        return None
+    return load_value(payload)
+
+
+RESPONSE_TAG = b"R"
+ENTRY_TAG = b"E"
+COMPRESSED_TAG = b"Z"
+
+_compressors: dict[str, tuple[bytes, type[Codec]]] = {"zlib": (b"d", DeflateCodec), "zstd": (b"z", ZstdCodec)}
+_decompressors: dict[int, Codec] = {ord("d"): DeflateCodec()}
+_decompress_errors: tuple[type[Exception], ...] = (zlib.error,)
+if zstandard is not None:
+    _decompressors[ord("z")] = ZstdCodec()
+    _decompress_errors += (zstandard.ZstdError,)
+
+serializers: dict[str, type[CacheSerializer]] = {
+    "pickle": PickleSerializer,
+    "json": JSONSerializer,
+    "msgpack": MsgpackSerializer,
+    "raw": RawSerializer,
+}
+
+_loaders: dict[int, Callable[[bytes], Any]] = {
+    PickleSerializer.tag[0]: PickleSerializer.loads,
+    JSONSerializer.tag[0]: JSONSerializer.loads,
+    MsgpackSerializer.tag[0]: MsgpackSerializer.loads,
+    RawSerializer.tag_bytes[0]: bytes,
+    RawSerializer.tag_str[0]: lambda data: data.decode("utf8"),
+    RESPONSE_TAG[0]: CachedResponse.decode,
+    ENTRY_TAG[0]: _load_entry,
+    COMPRESSED_TAG[0]: _load_compressed,
+}
+
+
+def get_serializer(serializer: str | CacheSerializer) -> CacheSerializer:
+    if isinstance(serializer, CacheSerializer):
+        return serializer
+    if serializer not in serializers:
+        raise RuntimeError(f"Unknown cache serializer: {serializer}")
+    return serializers[serializer]()
+
+
+def dump_value(serializer: CacheSerializer, value: Any, compressor: CacheCompressor | None = None) -> bytes:
+    if type(value) is int:
+        return str(value).encode("ascii")
+    if isinstance(value, CachedResponse):
+        rv = RESPONSE_TAG + value.encode()
+    elif isinstance(value, CacheEntry):
+        #: refresh metadata wraps the value serialized on its own, so any serializer can store it
+        rv = ENTRY_TAG + _entry_struct.pack(value.expiration, value.delta) + dump_value(serializer, value.value)
+    else:
+        rv = serializer.dumps(value)
+    return compressor.compress(rv) if compressor is not None else rv
+
+
+def load_value(data: bytes | None) -> Any:
+    if data is None:
+        return None
+    loader = _loaders.get(data[0]) if data else None
+    if loader is None:
+        try:
+            return int(data)
+        except ValueError:
+            return None
+    try:
+        return loader(data[1:])
+    except (pickle.PickleError, ValueError, TypeError, EOFError, struct.error):
+        return None
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import zlib
+from collections.abc import AsyncIterable, Iterable
+from typing import Any
+
+from ._imports import brotli, zstandard
+from .http.response import HTTPAsyncIterResponse, HTTPBytesResponse, HTTPIterResponse, HTTPResponse, HTTPStringResponse
+from .pipeline import Pipe
+
+
+DEFAULT_MIME_TYPES = frozenset(
+    [
+        "application/javascript",
+        "application/json",
+        "application/ld+json",
+        "application/manifest+json",
+        "application/xhtml+xml",
+        "application/xml",
+        "image/svg+xml",
+        "text/css",
+        "text/csv",
+        "text/event-stream",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+        "text/xml",
+    ]
+)
+
+
+class _ZlibStream:
+    __slots__ = ["_obj"]
+
+    def __init__(self, level: int, wbits: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliStream:
+    __slots__ = ["_obj"]
+
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdStream:
+    __slots__ = ["_obj"]
+
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class Codec:
+    __slots__ = ["level"]
+    name: str
+    default_level: int
+
+    def __init__(self, level: int | None = None):
+        self.level = self.default_level if level is None else level
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def stream(self):
+        raise NotImplementedError
+
+
+class GzipCodec(Codec):
+    __slots__ = []
+    name = "gzip"
+    default_level = 6
+
+    def compress(self, data: bytes) -> bytes:
+        obj = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return obj.compress(data) + obj.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data, 31)
+
+    def stream(self) -> _ZlibStream:
+        return _ZlibStream(self.level, 31)
+
+
+class DeflateCodec(Codec):
+    __slots__ = []
+    name = "deflate"
+    default_level = 6
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+    def stream(self) -> _ZlibStream:
+        return _ZlibStream(self.level, zlib.MAX_WBITS)
+
+
+class BrotliCodec(Codec):
+    __slots__ = []
+    name = "br"
+    default_level = 4
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return brotli.decompress(data)
+
+    def stream(self) -> _BrotliStream:
+        return _BrotliStream(self.level)
+
+
+class ZstdCodec(Codec):
+    __slots__ = []
+    name = "zstd"
+    default_level = 3
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    def stream(self) -> _ZstdStream:
+        return _ZstdStream(self.level)
+
+
+codecs: dict[str, type[Codec]] = {"gzip": GzipCodec, "deflate": DeflateCodec}
+if brotli is not None:
+    codecs["br"] = BrotliCodec
+if zstandard is not None:
+    codecs["zstd"] = ZstdCodec
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Iterable[str]) -> str | None:
+    #: picks the encoding with the highest q-value, ties resolved by `encodings` order
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    rv, rv_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > rv_quality:
+            rv, rv_quality = encoding, quality
+    return rv
+
+
+def add_vary(headers: Any, value: str):
+    vary = headers.get("vary")
+    if not vary:
+        headers["vary"] = value
+    elif value not in {item.strip().lower() for item in vary.split(",")}:
+        headers["vary"] = vary + ", " + value
+
+
+def compress_iter(stream, iterable: Iterable[bytes | str]) -> Iterable[bytes]:
+    for data in iterable:
+        if isinstance(data, str):
+            data = data.encode("utf8")
+        if chunk := stream.compress(data):
+            yield chunk
+    if chunk := stream.finish():
+        yield chunk
+
+
+async def compress_aiter(stream, iterable: AsyncIterable[bytes | str]) -> AsyncIterable[bytes]:
+    async for data in iterable:
+        if isinstance(data, str):
+            data = data.encode("utf8")
+        if chunk := stream.compress(data):
+            yield chunk
+    if chunk := stream.finish():
+        yield chunk
+
+
+class CompressionPipe(Pipe):
+    __slots__ = ["_negotiated", "codecs", "current", "executor_threshold", "mime_types", "min_size"]
+
+    def __init__(
+        self,
+        current,
+        encodings: Iterable[str] = ("br", "zstd", "gzip", "deflate"),
+        levels: dict[str, int] | None = None,
+        min_size: int = 500,
+        mime_types: Iterable[str] | None = None,
+        executor_threshold: int = 64 * 1024,
+    ):
+        levels = levels or {}
+        self.current = current
+        self.codecs = {name: codecs[name](levels.get(name)) for name in encodings if name in codecs}
+        self.min_size = min_size
+        self.mime_types = frozenset(mime_types) if mime_types is not None else DEFAULT_MIME_TYPES
+        self.executor_threshold = executor_threshold
+        self._negotiated: dict[str, str | None] = {}
+
+    def _negotiate(self, accept_encoding: str) -> str | None:
+        try:
+            return self._negotiated[accept_encoding]
+        except KeyError:
+            pass
+        if len(self._negotiated) >= 256:
+            self._negotiated.clear()
+        rv = self._negotiated[accept_encoding] = negotiate_encoding(accept_encoding, self.codecs)
+        return rv
+
+    def _get_codec(self, status: int, headers: Any) -> Codec | None:
+        if status < 200 or status in (204, 206, 304) or "content-encoding" in headers:
+            return None
+        if "no-transform" in headers.get("cache-control", ""):
+            return None
+        if headers.get("content-type", "").split(";", 1)[0].strip().lower() not in self.mime_types:
+            return None
+        add_vary(headers, "accept-encoding")
+        request = self.current.request
+        if request.method == "HEAD":
+            return None
+        accept_encoding = request.headers.get("accept-encoding")
+        if not accept_encoding:
+            return None
+        encoding = self._negotiate(accept_encoding)
+        return self.codecs[encoding] if encoding else None
+
+    async def _compress(self, codec: Codec, data: bytes) -> bytes:
+        if len(data) >= self.executor_threshold:
+            return await asyncio.get_running_loop().run_in_executor(None, codec.compress, data)
+        return codec.compress(data)
+
+    async def pipe_request(self, next_pipe, **kwargs):
+        output = await next_pipe(**kwargs)
+        #: cached routes compress their responses after the cache
+        if getattr(self.current.response, "_compress_deferred", False):
+            return output
+        if isinstance(output, HTTPResponse):
+            return await self._compress_response(output)
+        if not isinstance(output, (str, bytes)) and not inspect.isgenerator(output) and not inspect.isasyncgen(output):
+            return output
+        response = self.current.response
+        codec = self._get_codec(response.status, response.headers)
+        if codec is None:
+            return output
+        if isinstance(output, (str, bytes)):
+            if len(output) < self.min_size:
+                return output
+            if isinstance(output, str):
+                output = output.encode("utf8")
+            output = await self._compress(codec, output)
+            _set_encoding_headers(response.headers, codec)
+            return HTTPBytesResponse(response.status, output, headers=response.headers, cookies=response.cookies)
+        _set_encoding_headers(response.headers, codec)
+        if inspect.isasyncgen(output):
+            return compress_aiter(codec.stream(), output)
+        return compress_iter(codec.stream(), output)
+
+    async def _compress_response(self, output: HTTPResponse) -> HTTPResponse:
+        if not isinstance(output, (HTTPBytesResponse, HTTPStringResponse, HTTPIterResponse, HTTPAsyncIterResponse)):
+            return output
+        headers = dict(output._headers.items())
+        codec = self._get_codec(output.status_code, headers)
+        if codec is None:
+            return output
+        if isinstance(output, HTTPIterResponse):
+            _set_encoding_headers(headers, codec)
+            output._headers = headers
+            output.iter = compress_iter(codec.stream(), output.iter)
+            return output
+        if isinstance(output, HTTPAsyncIterResponse):
+            _set_encoding_headers(headers, codec)
+            output._headers = headers
+            output.iter = compress_aiter(codec.stream(), output.iter)
+            return output
+        body = output.encoded_body if isinstance(output, HTTPStringResponse) else output.body
+        if len(body) < self.min_size:
+            return output
+        body = await self._compress(codec, body)
+        _set_encoding_headers(headers, codec)
+        return HTTPBytesResponse(output.status_code, body, headers=headers, cookies=output._cookies)
+
+    def on_stream(self):
+        response = self.current.response
+        codec = self._get_codec(response.status, response.headers)
+        if codec is None:
+            return
+        _set_encoding_headers(response.headers, codec)
+        response._stream_encoder = codec.stream()
+
+
+def _set_encoding_headers(headers: Any, codec: Codec):
+    headers["content-encoding"] = codec.name
+    headers.pop("content-length", None)
@@ -4,6 +4,8 @@ from .. import _emmett_core
 
 
 AES_BLOCK_SIZE = 128 // 8
+AEAD_NONCE_SIZE = 96 // 8
+AEAD_TAG_SIZE = 128 // 8
 
 
 class AESModes(Enum):
@@ -37,3 +39,32 @@ def aes_decrypt(data: bytes, key: bytes, nonce: bytes, mode: AESModes = AESModes
         raise ValueError("key must be 16 or 32 bytes long")
     assert len(nonce) == AES_BLOCK_SIZE, f"nonce must be {AES_BLOCK_SIZE} bytes long"
     return method(data, key, nonce)
+
+
+class AEADModes(Enum):
+    AES256_GCM = "aes256_gcm"
+    CHACHA20_POLY1305 = "chacha20poly1305"
+
+
+def aead_encrypt(
+    data: bytearray | memoryview,
+    key: bytes,
+    nonce: bytes,
+    aad: bytes | None = None,
+    mode: AEADModes = AEADModes.AES256_GCM,
+) -> bytes:
+    #: encrypts `data` in place, returning the authentication tag;
+    #  `data` must not be modified by other threads until the call returns, as the GIL is released
+    return getattr(_emmett_core, f"{mode.value}_encrypt")(data, key, nonce, aad)
+
+
+def aead_decrypt(
+    data: bytearray | memoryview,
+    key: bytes,
+    nonce: bytes,
+    tag: bytes,
+    aad: bytes | None = None,
+    mode: AEADModes = AEADModes.AES256_GCM,
+):
+    #: verifies and decrypts `data` in place, raising `ValueError` on verification failures
+    getattr(_emmett_core, f"{mode.value}_decrypt")(data, key, nonce, tag, aad)
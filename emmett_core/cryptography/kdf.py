@@ -1,4 +1,5 @@
 import codecs
+import hmac
 from enum import Enum
 
 from .. import _emmett_core
@@ -34,3 +35,16 @@ def pbkdf2_hex(
         ),
         "hex_codec",
     ).decode("utf8")
+
+
+def hkdf_sha256(key_material: bytes, salt: bytes = b"", info: bytes = b"", keylen: int = 32) -> bytes:
+    #: RFC 5869, meant for already strong key material
+    if keylen > 255 * 32:
+        raise ValueError("keylen too long")
+    prk = hmac.digest(salt or b"\x00" * 32, key_material, "sha256")
+    rv, block, counter = b"", b"", 1
+    while len(rv) < keylen:
+        block = hmac.digest(prk, block + info + bytes([counter]), "sha256")
+        rv += block
+        counter += 1
+    return rv[:keylen]
@@ -2,8 +2,19 @@ import hmac
 import os
 from base64 import urlsafe_b64decode, urlsafe_b64encode
 from binascii import hexlify, unhexlify
+from functools import lru_cache
 
 from .. import _emmett_core
+from .ciphers import AEAD_NONCE_SIZE, AEAD_TAG_SIZE, AEADModes, aead_decrypt, aead_encrypt
+from .kdf import hkdf_sha256
+
+
+V2 = b"\x02"
+_V2_NONCE_LEN = 128 // 8
+_V2_MAC_LEN = 256 // 8
+#: AEAD tokens carry the mode in their version byte
+_AEAD_VERSIONS = {AEADModes.AES256_GCM: b"\x03", AEADModes.CHACHA20_POLY1305: b"\x04"}
+_AEAD_MODES = {version[0]: mode for mode, version in _AEAD_VERSIONS.items()}
 
 
 def encrypt(data: bytes | str, key: str) -> tuple[bytes, bytes, bytes]:
@@ -30,12 +41,79 @@ def decrypt(data: bytes, salt: bytes, signature: bytes, key: str) -> bytes:
     return _emmett_core.aes256_ctr128(data, k1, nonce)
 
 
-def encrypt_hex(data: bytes | str, key: str, jchar: str = ":") -> str:
-    cipher, salt, signature = encrypt(data, key)
-    return jchar.join(hexlify(v).decode("utf8") for v in [salt, signature, cipher])
+@lru_cache(maxsize=32)
+def _master_key(key: str) -> bytes:
+    #: the slow derivation runs once per key, messages are then keyed by HKDF sub-keys
+    return _emmett_core.pbkdf2_sha256(key.encode("utf8"), b"emmett_core.symmetric.v2", 10000, 32)
+
+
+@lru_cache(maxsize=32)
+def derive_keys(key: str) -> tuple[bytes, bytes]:
+    master = _master_key(key)
+    return hkdf_sha256(master, info=b"encryption"), hkdf_sha256(master, info=b"authentication")
+
+
+@lru_cache(maxsize=32)
+def derive_aead_key(key: str) -> bytes:
+    return hkdf_sha256(_master_key(key), info=b"aead")
+
+
+def encrypt_v2(data: bytes | str, key: str) -> bytes:
+    if isinstance(data, str):
+        data = data.encode("utf8")
+    k1, k2 = derive_keys(key)
+    nonce = os.urandom(_V2_NONCE_LEN)
+    rv = V2 + nonce + _emmett_core.aes256_ctr128(data, k1, nonce)
+    return rv + hmac.digest(k2, rv, "sha256")
+
+
+def decrypt_v2(data: bytes, key: str) -> bytes:
+    if len(data) < 1 + _V2_NONCE_LEN + _V2_MAC_LEN or data[:1] != V2:
+        raise ValueError("Invalid data input")
+    k1, k2 = derive_keys(key)
+    payload, signature = data[:-_V2_MAC_LEN], data[-_V2_MAC_LEN:]
+    if not hmac.compare_digest(signature, hmac.digest(k2, payload, "sha256")):
+        raise ValueError("Signature verification failed")
+    return _emmett_core.aes256_ctr128(payload[1 + _V2_NONCE_LEN :], k1, payload[1 : 1 + _V2_NONCE_LEN])
+
+
+def encrypt_aead(data: bytes | str, key: str, mode: AEADModes = AEADModes.AES256_GCM) -> bytes:
+    if isinstance(data, str):
+        data = data.encode("utf8")
+    version = _AEAD_VERSIONS[mode]
+    nonce = os.urandom(AEAD_NONCE_SIZE)
+    buf = bytearray(version + nonce + data + bytes(AEAD_TAG_SIZE))
+    view = memoryview(buf)
+    payload_end = len(buf) - AEAD_TAG_SIZE
+    view[payload_end:] = aead_encrypt(
+        view[1 + AEAD_NONCE_SIZE : payload_end], derive_aead_key(key), nonce, version, mode
+    )
+    return bytes(buf)
+
+
+def decrypt_aead(data: bytes, key: str) -> bytes:
+    mode = _AEAD_MODES.get(data[0]) if data else None
+    if mode is None or len(data) < 1 + AEAD_NONCE_SIZE + AEAD_TAG_SIZE:
+        raise ValueError("Invalid data input")
+    buf = bytearray(data[1 + AEAD_NONCE_SIZE : -AEAD_TAG_SIZE])
+    aead_decrypt(buf, derive_aead_key(key), data[1 : 1 + AEAD_NONCE_SIZE], data[-AEAD_TAG_SIZE:], data[:1], mode)
+    return bytes(buf)
+
+
+def _decrypt_versioned(data: bytes, key: str) -> bytes:
+    if data[:1] == V2:
+        return decrypt_v2(data, key)
+    return decrypt_aead(data, key)
+
+
+def encrypt_hex(data: bytes | str, key: str, jchar: str = ":", aead: AEADModes | None = None) -> str:
+    return hexlify(encrypt_aead(data, key, aead) if aead else encrypt_v2(data, key)).decode("utf8")
 
 
 def decrypt_hex(data: bytes | str, key: str, jchar: str = ":") -> bytes:
+    #: legacy tokens are made of salt, signature and cipher
+    if jchar not in data:
+        return _decrypt_versioned(unhexlify(data), key)
     try:
         salt, signature, cipher = data.split(jchar)
     except ValueError:
@@ -43,12 +121,14 @@ def decrypt_hex(data: bytes | str, key: str, jchar: str = ":") -> bytes:
     return decrypt(unhexlify(cipher), unhexlify(salt), unhexlify(signature), key)
 
 
-def encrypt_b64(data: bytes | str, key: str, jchar: str = ":") -> str:
-    cipher, salt, signature = encrypt(data, key)
-    return jchar.join(urlsafe_b64encode(v).decode("utf8") for v in [salt, signature, cipher])
+def encrypt_b64(data: bytes | str, key: str, jchar: str = ":", aead: AEADModes | None = None) -> str:
+    return urlsafe_b64encode(encrypt_aead(data, key, aead) if aead else encrypt_v2(data, key)).decode("utf8")
 
 
 def decrypt_b64(data: bytes | str, key: str, jchar: str = ":") -> bytes:
+    #: legacy tokens are made of salt, signature and cipher
+    if jchar not in data:
+        return _decrypt_versioned(urlsafe_b64decode(data), key)
     try:
         salt, signature, cipher = data.split(jchar)
     except ValueError:
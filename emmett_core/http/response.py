@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import errno
 import mimetypes
 import os
+import secrets
 import stat
+from collections import OrderedDict, namedtuple
 from collections.abc import AsyncIterable, Generator, Iterable
-from email.utils import formatdate
+from email.utils import formatdate, parsedate_to_datetime
 from hashlib import md5
 from typing import Any, BinaryIO
 
-from .._io import loop_open_file
+from .._io import iter_view_chunks, loop_map_file
 
 
 class _RangeNotSatisfiable(Exception):
@@ -17,6 +20,105 @@ class _RangeNotSatisfiable(Exception):
         self.max_size = max_size
 
 
+def get_file_stat_headers(file_path: str, stat_data: os.stat_result) -> dict[str, str]:
+    content_type = mimetypes.guess_type(file_path)[0] or "text/plain"
+    content_length = str(stat_data.st_size)
+    last_modified = formatdate(stat_data.st_mtime, usegmt=True)
+    etag_base = str(stat_data.st_mtime) + "_" + str(stat_data.st_size)
+    etag = md5(etag_base.encode("utf-8")).hexdigest()  # noqa: S324
+    return {
+        "content-type": content_type,
+        "content-length": content_length,
+        "last-modified": last_modified,
+        "etag": etag,
+    }
+
+
+FileMeta = namedtuple("FileMeta", ["key", "headers", "asgi_headers"])
+
+
+def build_file_meta(file_path: str, stat_data: os.stat_result, extra_headers: dict[str, str] | None = None) -> FileMeta:
+    headers = get_file_stat_headers(file_path, stat_data)
+    if extra_headers:
+        headers.update(extra_headers)
+    return FileMeta(
+        (stat_data.st_ino, stat_data.st_mtime_ns, stat_data.st_size),
+        headers,
+        tuple((key.encode("latin-1"), val.encode("latin-1")) for key, val in headers.items()),
+    )
+
+
+class FileMetaCache:
+    __slots__ = ["data", "maxsize"]
+
+    def __init__(self, maxsize: int = 1024):
+        self.data: OrderedDict[str, FileMeta] = OrderedDict()
+        self.maxsize = maxsize
+
+    def get(self, file_path: str, stat_data: os.stat_result) -> FileMeta:
+        meta = self.data.get(file_path)
+        #: entries are valid as long as the file inode, mtime and size are the same
+        if meta is not None and meta.key == (stat_data.st_ino, stat_data.st_mtime_ns, stat_data.st_size):
+            try:
+                self.data.move_to_end(file_path)
+            except KeyError:
+                pass
+            return meta
+        meta = self.data[file_path] = build_file_meta(file_path, stat_data)
+        while len(self.data) > self.maxsize:
+            try:
+                self.data.popitem(last=False)
+            except KeyError:
+                break
+        return meta
+
+    def clear(self):
+        self.data.clear()
+
+
+file_meta_cache = FileMetaCache()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    #: weak comparison, as mandated for `If-None-Match`
+    etag = etag.removeprefix("W/").strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+def is_not_modified(headers: Any, if_none_match: str | None, if_modified_since: str | None) -> bool:
+    #: `If-Modified-Since` is ignored when `If-None-Match` is present
+    if if_none_match:
+        etag = headers.get("etag")
+        return bool(etag) and _etag_matches(if_none_match, etag)
+    if not if_modified_since:
+        return False
+    last_modified = headers.get("last-modified")
+    if not last_modified:
+        return False
+    if last_modified == if_modified_since:
+        return True
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def not_modified_headers(headers: Any) -> dict[str, str]:
+    return {key: val for key, val in headers.items() if key not in ("content-length", "content-type")}
+
+
+def _asgi_scope_headers(scope, *names: bytes) -> list[str | None]:
+    rv: list[str | None] = [None] * len(names)
+    for key, val in scope["headers"]:
+        if key in names:
+            rv[names.index(key)] = val.decode("latin-1")
+    return rv
+
+
 class HTTPResponse(Exception):
     def __init__(
         self,
@@ -105,26 +207,49 @@ class HTTPFileResponse(HTTPResponse):
         self,
         file_path: str,
         status_code: int = 200,
-        headers: dict[str, str] = {},
+        headers: dict[str, str] | None = None,
         cookies: dict[str, Any] = {},
-        chunk_size: int = 4096,
+        chunk_size: int | None = None,
     ):
-        super().__init__(status_code, headers=headers, cookies=cookies)
+        super().__init__(status_code, headers=headers if headers is not None else {}, cookies=cookies)
         self.file_path = file_path
         self.chunk_size = chunk_size
+        self._meta: FileMeta | None = None
+        self._ranges: tuple[list[tuple[bytes, int, int]], bytes] | None = None
+
+    def _stat_file(self) -> os.stat_result:
+        return os.stat(self.file_path)
+
+    def _get_stat_meta(self, stat_data: os.stat_result) -> FileMeta:
+        return file_meta_cache.get(self.file_path, stat_data)
 
     def _get_stat_headers(self, stat_data):
-        content_type = mimetypes.guess_type(self.file_path)[0] or "text/plain"
-        content_length = str(stat_data.st_size)
-        last_modified = formatdate(stat_data.st_mtime, usegmt=True)
-        etag_base = str(stat_data.st_mtime) + "_" + str(stat_data.st_size)
-        etag = md5(etag_base.encode("utf-8")).hexdigest()  # noqa: S324
-        return {
-            "content-type": content_type,
-            "content-length": content_length,
-            "last-modified": last_modified,
-            "etag": etag,
-        }
+        return self._get_stat_meta(stat_data).headers
+
+    def _load_stat_headers(self, stat_data: os.stat_result):
+        self._meta = self._get_stat_meta(stat_data)
+        self._headers.update(self._meta.headers)
+
+    def asgi_headers(self) -> Generator[tuple[bytes, bytes], None, None]:
+        #: NOTE: pre-encoded meta headers are used as long as `_meta` is set,
+        #       code changing any of those headers should reset it.
+        if self._meta is None:
+            yield from super().asgi_headers()
+            return
+        meta_headers = self._meta.headers
+        yield from self._meta.asgi_headers
+        for key, val in self._headers.items():
+            if key not in meta_headers:
+                yield key.encode("latin-1"), val.encode("latin-1")
+        for cookie in self._cookies.values():
+            yield b"set-cookie", str(cookie)[12:].encode("latin-1")
+
+    def _not_modified_response(self, method: str, if_none_match: str | None, if_modified_since: str | None):
+        if self.status_code != 200 or method not in ("GET", "HEAD"):
+            return None
+        if not is_not_modified(self._headers, if_none_match, if_modified_since):
+            return None
+        return HTTPResponse(304, headers=not_modified_headers(self._headers), cookies=self._cookies)
 
     def _if_range_feasible(self, http_if_range: str) -> bool:
         return http_if_range == self._headers["last-modified"] or http_if_range == self._headers["etag"]
@@ -156,7 +281,7 @@ class HTTPFileResponse(HTTPResponse):
                 res[-1] = (last_start, max(last_end, end))
             else:
                 res.append((start, end))
-        return ranges
+        return res
 
     @classmethod
     def _parse_ranges(cls, hrange: str, file_size: int) -> list[tuple[int, int]]:
@@ -180,71 +305,160 @@ class HTTPFileResponse(HTTPResponse):
 
         return ret
 
+    def _range_response(
+        self, method: str, http_range: str | None, http_if_range: str | None, file_size: int
+    ) -> HTTPResponse | None:
+        #: returns an error response for invalid ranges, otherwise loads requested ranges (if any)
+        self._ranges = None
+        if not http_range or self.status_code != 200 or method not in ("GET", "HEAD"):
+            return None
+        if http_if_range and not self._if_range_feasible(http_if_range):
+            return None
+        try:
+            ranges = self._parse_range_header(http_range, file_size)
+        except _RangeNotSatisfiable as exc:
+            return HTTPResponse(416, headers={"content-range": f"bytes */{exc.max_size}"})
+        except Exception:
+            return HTTPResponse(400)
+
+        self.status_code = 206
+        self._meta = None
+        if len(ranges) == 1:
+            range_start, range_end = ranges[0]
+            self._headers["content-range"] = f"bytes {range_start}-{range_end - 1}/{file_size}"
+            self._headers["content-length"] = str(range_end - range_start)
+            self._ranges = [(b"", range_start, range_end)], b""
+            return None
+
+        boundary = secrets.token_hex(16)
+        content_type = self._headers["content-type"]
+        parts, content_length = [], 0
+        for range_start, range_end in ranges:
+            part_head = (
+                f"--{boundary}\r\ncontent-type: {content_type}\r\n"
+                f"content-range: bytes {range_start}-{range_end - 1}/{file_size}\r\n\r\n"
+            ).encode("latin-1")
+            parts.append((part_head, range_start, range_end))
+            content_length += len(part_head) + range_end - range_start + 2
+        tail = f"--{boundary}--\r\n".encode("latin-1")
+        self._headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self._headers["content-length"] = str(content_length + len(tail))
+        self._ranges = parts, tail
+        return None
+
+    async def _iter_ranges(self) -> AsyncIterable[bytes]:
+        parts, tail = self._ranges
+        loop = asyncio.get_running_loop()
+        async with loop_map_file(self.file_path) as view:
+            for part_head, range_start, range_end in parts:
+                if part_head:
+                    yield part_head
+                async for chunk in iter_view_chunks(view, range_start, range_end, self.chunk_size, loop):
+                    yield chunk
+                if part_head:
+                    yield b"\r\n"
+        if tail:
+            yield tail
+
     async def asgi(self, scope, send):
         try:
-            stat_data = os.stat(self.file_path)
+            stat_data = self._stat_file()
             if not stat.S_ISREG(stat_data.st_mode):
-                await HTTPResponse(403).send(scope, send)
+                await HTTPResponse(403).asgi(scope, send)
+                return
+            self._load_stat_headers(stat_data)
+            if_none_match, if_modified_since, h_range, h_if_range = _asgi_scope_headers(
+                scope, b"if-none-match", b"if-modified-since", b"range", b"if-range"
+            )
+            if not_modified := self._not_modified_response(scope["method"], if_none_match, if_modified_since):
+                await not_modified.asgi(scope, send)
+                return
+            if error := self._range_response(scope["method"], h_range, h_if_range, stat_data.st_size):
+                await error.asgi(scope, send)
                 return
-            self._headers.update(self._get_stat_headers(stat_data))
+            self._headers["accept-ranges"] = "bytes"
             await self._send_headers(send)
-            if "http.response.pathsend" in scope.get("extensions", {}):
+            extensions = scope.get("extensions") or {}
+            if scope["method"] == "HEAD":
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif self._ranges:
+                parts, tail = self._ranges
+                if not tail and "http.response.zerocopysend" in extensions:
+                    _, range_start, range_end = parts[0]
+                    await self._send_zerocopy(send, range_start, range_end - range_start)
+                else:
+                    await self._send_ranges(send)
+            elif "http.response.pathsend" in extensions:
                 await send({"type": "http.response.pathsend", "path": str(self.file_path)})
+            elif "http.response.zerocopysend" in extensions:
+                await self._send_zerocopy(send)
             else:
                 await self._send_body(send)
         except OSError as e:
             if e.errno == errno.EACCES:
-                await HTTPResponse(403).send(scope, send)
+                await HTTPResponse(403).asgi(scope, send)
             else:
-                await HTTPResponse(404).send(scope, send)
+                await HTTPResponse(404).asgi(scope, send)
+
+    async def _send_ranges(self, send):
+        async for chunk in self._iter_ranges():
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
 
     async def _send_body(self, send):
-        async with loop_open_file(self.file_path, mode="rb") as f:
-            more_body = True
-            while more_body:
-                chunk = await f.read(self.chunk_size)
-                more_body = len(chunk) == self.chunk_size
-                await send(
-                    {
-                        "type": "http.response.body",
-                        "body": chunk,
-                        "more_body": more_body,
-                    }
-                )
+        async with loop_map_file(self.file_path) as view:
+            async for chunk in iter_view_chunks(view, chunk_size=self.chunk_size, loop=asyncio.get_running_loop()):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_zerocopy(self, send, offset: int | None = None, count: int | None = None):
+        f = await asyncio.get_running_loop().run_in_executor(None, open, self.file_path, "rb")
+        try:
+            message = {"type": "http.response.zerocopysend", "file": f, "more_body": False}
+            if count is not None:
+                message["offset"] = offset
+                message["count"] = count
+            await send(message)
+        finally:
+            f.close()
+
+    async def _rsgi_ranges(self, protocol):
+        transport = protocol.response_stream(self.status_code, list(self.rsgi_headers()))
+        async for chunk in self._iter_ranges():
+            await transport.send_bytes(chunk)
 
     def rsgi(self, scope, protocol):
         try:
-            stat_data = os.stat(self.file_path)
+            stat_data = self._stat_file()
             if not stat.S_ISREG(stat_data.st_mode):
                 return HTTPResponse(403).rsgi(scope, protocol)
-            self._headers.update(self._get_stat_headers(stat_data))
+            self._load_stat_headers(stat_data)
         except OSError as e:
             if e.errno == errno.EACCES:
                 return HTTPResponse(403).rsgi(scope, protocol)
             return HTTPResponse(404).rsgi(scope, protocol)
 
-        self._headers["accept-ranges"] = "bytes"
-        empty_res = scope.method.lower() == "head"
-        h_range = scope.headers.get("range")
-        h_if_range = scope.headers.get("if-range")
-        if h_range or (h_if_range and self._if_range_feasible(h_if_range)):
-            try:
-                ranges = self._parse_range_header(h_range, stat_data.st_size)
-            except _RangeNotSatisfiable as exc:
-                return protocol.response_empty(416, [("content-range", f"bytes */{exc.max_size}")])
-            except Exception:
-                return protocol.response_empty(400)
-            # FIXME: support multiple ranges in RSGI
-            range_start, range_end = ranges[0]
-            self._headers["content-range"] = f"bytes {range_start}-{range_end - 1}/{stat_data.st_size}"
-            self._headers["content-length"] = str(range_end - range_start)
-            if empty_res:
-                return protocol.response_empty(206, list(self.rsgi_headers()))
-            return protocol.response_file_range(206, list(self.rsgi_headers()), self.file_path, range_start, range_end)
+        if not_modified := self._not_modified_response(
+            scope.method, scope.headers.get("if-none-match"), scope.headers.get("if-modified-since")
+        ):
+            return not_modified.rsgi(scope, protocol)
+        if error := self._range_response(
+            scope.method, scope.headers.get("range"), scope.headers.get("if-range"), stat_data.st_size
+        ):
+            return error.rsgi(scope, protocol)
 
-        if empty_res:
+        self._headers["accept-ranges"] = "bytes"
+        if scope.method == "HEAD":
             return protocol.response_empty(self.status_code, list(self.rsgi_headers()))
-        protocol.response_file(self.status_code, list(self.rsgi_headers()), self.file_path)
+        if not self._ranges:
+            return protocol.response_file(self.status_code, list(self.rsgi_headers()), self.file_path)
+        parts, tail = self._ranges
+        if not tail:
+            _, range_start, range_end = parts[0]
+            return protocol.response_file_range(
+                self.status_code, list(self.rsgi_headers()), self.file_path, range_start, range_end
+            )
+        return self._rsgi_ranges(protocol)
 
 
 class HTTPIOResponse(HTTPResponse):
@@ -254,7 +468,7 @@ class HTTPIOResponse(HTTPResponse):
         status_code: int = 200,
         headers: dict[str, str] = {},
         cookies: dict[str, Any] = {},
-        chunk_size: int = 4096,
+        chunk_size: int | None = None,
     ):
         super().__init__(status_code, headers=headers, cookies=cookies)
         self.io_stream = io_stream
@@ -270,17 +484,10 @@ class HTTPIOResponse(HTTPResponse):
         await self._send_body(send)
 
     async def _send_body(self, send):
-        more_body = True
-        while more_body:
-            chunk = self.io_stream.read(self.chunk_size)
-            more_body = len(chunk) == self.chunk_size
-            await send(
-                {
-                    "type": "http.response.body",
-                    "body": chunk,
-                    "more_body": more_body,
-                }
-            )
+        with self.io_stream.getbuffer() as view:
+            async for chunk in iter_view_chunks(view, chunk_size=self.chunk_size):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
 
     def rsgi(self, scope, protocol):
         protocol.response_bytes(self.status_code, list(self.rsgi_headers()), self.io_stream.read())
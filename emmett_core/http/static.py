@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import stat
+import tempfile
+import time
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from ..compression import DEFAULT_MIME_TYPES, codecs, negotiate_encoding
+from .response import FileMeta, HTTPFileResponse, build_file_meta
+
+
+StaticFile = namedtuple("StaticFile", ["path", "stat", "meta", "encodings"], defaults=[None])
+
+#: precompressed siblings, in order of preference
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+
+
+class StaticIndex:
+    __slots__ = ["_data", "_next_refresh", "_refreshing", "app", "refresh_interval"]
+
+    def __init__(self, app, refresh_interval: float | None = None):
+        self.app = app
+        self.refresh_interval = refresh_interval
+        self._data: dict[str, StaticFile] | None = None
+        self._next_refresh = 0.0
+        self._refreshing: asyncio.Future | None = None
+
+    def _roots(self) -> Iterator[tuple[str, str]]:
+        yield "", self.app.static_path
+        for name, mod in self.app._modules.items():
+            yield f"__{name}__/", mod._static_path
+
+    @staticmethod
+    def _walk(root: str) -> Iterator[tuple[str, StaticFile]]:
+        root = os.path.realpath(root)
+        for base, _, files in os.walk(root):
+            for file_name in files:
+                url_path = os.path.join(base, file_name)
+                file_path = os.path.realpath(url_path)
+                #: same check of static matchers, links outside the folder are not served
+                if not file_path.startswith(root):
+                    continue
+                try:
+                    stat_data = os.stat(file_path)
+                except OSError:
+                    continue
+                if not stat.S_ISREG(stat_data.st_mode):
+                    continue
+                yield (
+                    os.path.relpath(url_path, root).replace(os.sep, "/"),
+                    StaticFile(file_path, stat_data, build_file_meta(file_path, stat_data)),
+                )
+
+    @staticmethod
+    def _link_encodings(files: dict[str, StaticFile]):
+        for file_name, entry in files.items():
+            encodings = {}
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                sibling = files.get(file_name + suffix)
+                #: siblings older than the source are outdated
+                if sibling is None or sibling.stat.st_mtime < entry.stat.st_mtime:
+                    continue
+                encodings[encoding] = StaticFile(
+                    sibling.path,
+                    sibling.stat,
+                    build_file_meta(
+                        entry.path, sibling.stat, {"content-encoding": encoding, "vary": "accept-encoding"}
+                    ),
+                )
+            if encodings:
+                files[file_name] = StaticFile(
+                    entry.path,
+                    entry.stat,
+                    build_file_meta(entry.path, entry.stat, {"vary": "accept-encoding"}),
+                    encodings,
+                )
+
+    def build(self) -> dict[str, StaticFile]:
+        languages = self.app._languages if self.app.language_force_on_url else []
+        versions = [""]
+        if self.app.config.static_version_urls and self.app.config.static_version:
+            versions.append(f"_{self.app.config.static_version}/")
+        rv = {}
+        for prefix, root in self._roots():
+            files = dict(self._walk(root))
+            self._link_encodings(files)
+            for file_name, entry in files.items():
+                for version in versions:
+                    rv[f"/static/{prefix}{version}{file_name}"] = entry
+                    for lang in languages:
+                        rv[f"/{lang}/static/{prefix}{version}{file_name}"] = files.get(f"{lang}/{file_name}", entry)
+        return rv
+
+    def refresh(self) -> dict[str, StaticFile]:
+        self._data = self.build()
+        if self.refresh_interval:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+        return self._data
+
+    def _build_in_executor(self, loop: asyncio.AbstractEventLoop) -> asyncio.Future:
+        if self._refreshing is None:
+            self._refreshing = loop.run_in_executor(None, self.build)
+            self._refreshing.add_done_callback(self._refreshed)
+        return self._refreshing
+
+    def prepare(self, loop: asyncio.AbstractEventLoop):
+        #: builds the index on startup, so that requests never walk the folders
+        if self._data is None:
+            self._build_in_executor(loop)
+
+    def _schedule_refresh(self) -> dict[str, StaticFile] | None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.refresh()
+        #: walking the folders might be slow, the current data is served in the meantime
+        self._build_in_executor(loop)
+        return self._data
+
+    def _refreshed(self, future: asyncio.Future):
+        self._refreshing = None
+        if not future.cancelled() and future.exception() is None:
+            self._data = future.result()
+        if self.refresh_interval:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def get(self, path: str) -> StaticFile | None:
+        #: entries are revalidated only by refreshes, files are not checked on lookups
+        data = self._data
+        if data is None or (self.refresh_interval and time.monotonic() >= self._next_refresh):
+            data = self._schedule_refresh()
+            #: files are served through the static matcher until the index gets built
+            if data is None:
+                return None
+        return data.get(path)
+
+
+def negotiate_static_file(entry: StaticFile, accept_encoding: str | None) -> StaticFile:
+    if not accept_encoding:
+        return entry
+    encoding = negotiate_encoding(accept_encoding, entry.encodings)
+    return entry.encodings[encoding] if encoding else entry
+
+
+def precompress_static(
+    app,
+    encodings: list[str] | None = None,
+    mime_types: Iterable[str] | None = None,
+    min_size: int = 256,
+    levels: dict[str, int] | None = None,
+) -> list[str]:
+    """Generates precompressed siblings of static files, skipping the ones up to date."""
+    levels = {"br": 11, "zstd": 19, "gzip": 9, **(levels or {})}
+    mime_types = frozenset(mime_types) if mime_types is not None else DEFAULT_MIME_TYPES
+    encoders = [
+        (codecs[encoding](levels.get(encoding)), PRECOMPRESSED_SUFFIXES[encoding])
+        for encoding in (encodings or PRECOMPRESSED_SUFFIXES)
+        if encoding in codecs and encoding in PRECOMPRESSED_SUFFIXES
+    ]
+    suffixes = tuple(PRECOMPRESSED_SUFFIXES.values())
+    rv = []
+    index = StaticIndex(app)
+    for _, root in index._roots():
+        for _, entry in index._walk(root):
+            if entry.path.endswith(suffixes) or entry.stat.st_size < min_size:
+                continue
+            if entry.meta.headers["content-type"] not in mime_types:
+                continue
+            data = None
+            for codec, suffix in encoders:
+                target = entry.path + suffix
+                try:
+                    if os.stat(target).st_mtime >= entry.stat.st_mtime:
+                        continue
+                except OSError:
+                    pass
+                if data is None:
+                    with open(entry.path, "rb") as f:
+                        data = f.read()
+                compressed = codec.compress(data)
+                if len(compressed) >= len(data):
+                    continue
+                fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(target))
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(compressed)
+                    os.chmod(tmp, stat.S_IMODE(entry.stat.st_mode))
+                    os.replace(tmp, target)
+                except BaseException:
+                    os.unlink(tmp)
+                    raise
+                rv.append(target)
+    return rv
+
+
+class HTTPStaticFileResponse(HTTPFileResponse):
+    def __init__(
+        self,
+        entry: StaticFile,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        cookies: dict[str, Any] = {},
+        chunk_size: int | None = None,
+    ):
+        super().__init__(entry.path, status_code=status_code, headers=headers, cookies=cookies, chunk_size=chunk_size)
+        self.entry = entry
+
+    def _stat_file(self) -> os.stat_result:
+        return self.entry.stat
+
+    def _get_stat_meta(self, stat_data: os.stat_result) -> FileMeta:
+        return self.entry.meta
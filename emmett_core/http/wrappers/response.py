@@ -13,10 +13,11 @@ _SSE_NEWLINES_RE = re.compile(r"\r\n|\n")
 
 
 class Response(EgressWrapper):
-    __slots__ = ["_flow_stream", "status", "headers", "cookies"]
+    __slots__ = ["_flow_stream", "_stream_encoder", "status", "headers", "cookies"]
 
     def __init__(self, proto):
         super().__init__(proto)
+        self._stream_encoder = None
         self.status = 200
         self.headers = ResponseHeaders({"content-type": "text/plain"})
         self.cookies = SimpleCookie()
@@ -41,7 +42,7 @@ class Response(EgressWrapper):
     def wrap_file(self, path) -> HTTPFileResponse:
         return HTTPFileResponse(str(path), status_code=self.status, headers=self.headers, cookies=self.cookies)
 
-    def wrap_io(self, obj, chunk_size: int = 4096) -> HTTPIOResponse:
+    def wrap_io(self, obj, chunk_size: int | None = None) -> HTTPIOResponse:
         return HTTPIOResponse(
             obj, status_code=self.status, headers=self.headers, cookies=self.cookies, chunk_size=chunk_size
         )
@@ -70,6 +71,21 @@ class ResponseStream(metaclass=ABCMeta):
     def __await__(self):
         return self().__await__()
 
+    async def _stream_items(self):
+        encoder = self.response._stream_encoder
+        if encoder is None:
+            async for item in self._target:
+                yield self._item_wrapper(item)
+            return
+        async for item in self._target:
+            data = self._item_wrapper(item)
+            if isinstance(data, str):
+                data = data.encode("utf8")
+            if chunk := encoder.compress(data):
+                yield chunk
+        if chunk := encoder.finish():
+            yield chunk
+
     @abstractmethod
     async def __call__(self): ...
 
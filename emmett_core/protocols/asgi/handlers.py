@@ -12,10 +12,11 @@ from typing import Any
 from ...ctx import RequestContext, WSContext
 from ...extensions import Signals
 from ...http.response import HTTPFileResponse, HTTPResponse, HTTPStringResponse
+from ...http.static import HTTPStaticFileResponse, StaticFile, negotiate_static_file
 from ...utils import cachedprop
 from .helpers import RequestCancelled
 from .typing import Event, EventHandler, EventLooper, Receive, Scope, Send
-from .wrappers import Request, Response, Websocket
+from .wrappers import Headers, Request, Response, Websocket
 
 
 REGEX_STATIC = re.compile(r"^/static/(?P<m>__[\w\-\.]+__/)?(?P<v>_\d+\.\d+\.\d+/)?(?P<f>.*?)$")
@@ -88,6 +89,7 @@ class LifeSpanHandler(Handler):
 
     @Handler.on_event("lifespan.startup")
     async def event_startup(self, scope: Scope, receive: Receive, send: Send, event: Event) -> EventLooper:
+        self.app._static_index.prepare(asyncio.get_running_loop())
         self.app.send_signal(Signals.after_loop, loop=asyncio.get_event_loop())
         await send({"type": "lifespan.startup.complete"})
         return _event_looper
@@ -113,7 +115,7 @@ class RequestHandler(Handler):
 
 
 class HTTPHandler(RequestHandler):
-    __slots__ = ["pre_handler", "static_handler", "static_matcher", "__dict__"]
+    __slots__ = ["pre_handler", "static_handler", "static_index", "static_matcher", "__dict__"]
     wrapper_cls = Request
     response_cls = Response
 
@@ -126,6 +128,7 @@ class HTTPHandler(RequestHandler):
             self._static_lang_matcher if self.app.language_force_on_url else self._static_nolang_matcher
         )
         self.static_handler = self._static_handler if self.app.config.handle_static else self.dynamic_handler
+        self.static_index = self.app._static_index
         self.pre_handler = self._prefix_handler if self.router._prefix_main else self.dynamic_handler
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
@@ -200,7 +203,15 @@ class HTTPHandler(RequestHandler):
     async def _static_response(self, file_path: str) -> HTTPFileResponse:
         return HTTPFileResponse(file_path)
 
+    async def _static_index_response(self, entry: StaticFile) -> HTTPFileResponse:
+        return HTTPStaticFileResponse(entry)
+
     def _static_handler(self, scope: Scope, receive: Receive, send: Send) -> Awaitable[HTTPResponse]:
+        static_entry = self.static_index.get(scope["emt.path"])
+        if static_entry:
+            if static_entry.encodings:
+                static_entry = negotiate_static_file(static_entry, Headers(scope).get("accept-encoding"))
+            return self._static_index_response(static_entry)
         static_file, _ = self.static_matcher(scope["emt.path"])
         if static_file:
             return self._static_response(static_file)
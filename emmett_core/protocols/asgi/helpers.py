@@ -62,8 +62,8 @@ class ResponseStream(_ResponseStream):
                 "headers": list(HTTPResponse.asgi_headers(self)),
             }
         )
-        async for item in self._target:
-            await self.send(self._item_wrapper(item))
+        async for data in self._stream_items():
+            await self.send(data)
         await self._proto({"type": "http.response.body", "body": b"", "more_body": False})
         return noop_response
 
@@ -7,6 +7,7 @@ from collections.abc import Awaitable, Callable
 
 from ...ctx import RequestContext, WSContext
 from ...http.response import HTTPFileResponse, HTTPResponse, HTTPStringResponse
+from ...http.static import HTTPStaticFileResponse, StaticFile, negotiate_static_file
 from ...utils import cachedprop
 from .helpers import WSTransport, noop_response
 from .wrappers import Request, Response, Websocket
@@ -40,7 +41,7 @@ class RequestHandler(Handler):
 
 
 class HTTPHandler(RequestHandler):
-    __slots__ = ["pre_handler", "static_handler", "static_matcher", "__dict__"]
+    __slots__ = ["pre_handler", "static_handler", "static_index", "static_matcher", "__dict__"]
     wapper_cls = Request
     response_cls = Response
 
@@ -52,6 +53,7 @@ class HTTPHandler(RequestHandler):
             self._static_lang_matcher if self.app.language_force_on_url else self._static_nolang_matcher
         )
         self.static_handler = self._static_handler if self.app.config.handle_static else self.dynamic_handler
+        self.static_index = self.app._static_index
         self.pre_handler = self._prefix_handler if self.router._prefix_main else self.static_handler
 
     async def __call__(self, scope, protocol):
@@ -121,7 +123,15 @@ class HTTPHandler(RequestHandler):
     async def _static_response(self, file_path: str) -> HTTPFileResponse:
         return HTTPFileResponse(file_path)
 
+    async def _static_index_response(self, entry: StaticFile) -> HTTPFileResponse:
+        return HTTPStaticFileResponse(entry)
+
     def _static_handler(self, scope, protocol, path: str) -> Awaitable[HTTPResponse]:
+        static_entry = self.static_index.get(path)
+        if static_entry:
+            if static_entry.encodings:
+                static_entry = negotiate_static_file(static_entry, scope.headers.get("accept-encoding"))
+            return self._static_index_response(static_entry)
         static_file, _ = self.static_matcher(path)
         if static_file:
             return self._static_response(static_file)
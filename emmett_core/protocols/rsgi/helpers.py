@@ -42,8 +42,8 @@ class ResponseStream(_ResponseStream):
         for method in self.response._flow_stream:
             method()
         transport = self._proto.response_stream(self.response.status, list(HTTPResponse.rsgi_headers(self)))
-        async for item in self._target:
-            await self.send(transport, self._item_wrapper(item))
+        async for data in self._stream_items():
+            await self.send(transport, data)
         ctl_event.set()
 
     async def _handle_conn(self, protocol, stream_task, ctl_event):
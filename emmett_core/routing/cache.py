@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import pickle
+import time
 from collections.abc import Callable
+from hashlib import md5
 from typing import Any
 
-from ..cache.handlers import CacheHandler
+from ..cache.handlers import CacheHandler, should_refresh
 from ..cache.hash import CacheHashMixin
+from ..cache.serializers import CachedResponse
+from ..compression import CompressionPipe
+from ..ctx import RequestContext
+from ..http.response import HTTPResponse, is_not_modified, not_modified_headers
 from .dispatchers import RequestDispatcher
 
 
@@ -17,11 +25,19 @@ class RouteCacheRule(CacheHashMixin):
         hostname: bool = False,
         headers: list[str] = [],
         duration: int | str | None = "default",
+        stale_ttl: int | None = None,
+        early_refresh: float = 0.0,
+        tags: list[str] | None = None,
     ):
         super().__init__()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._background_tasks: set[asyncio.Task] = set()
         self.cache = handler
         self.check_headers = headers
         self.duration = duration
+        self.stale_ttl = stale_ttl
+        self.early_refresh = early_refresh
+        self.tags = tags
         self.add_strategy("kwargs", self.dict_strategy)
         self._ctx_builders = []
         if hostname:
@@ -57,31 +73,118 @@ class RouteCacheRule(CacheHashMixin):
         return f
 
 
+def _content_etag(content: Any) -> str | None:
+    if isinstance(content, str):
+        content = content.encode("utf8")
+    elif not isinstance(content, bytes):
+        try:
+            content = pickle.dumps(content)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+    return '"' + md5(content).hexdigest() + '"'  # noqa: S324
+
+
 class CacheDispatcher(RequestDispatcher):
-    __slots__ = ["current", "route", "cache_rule"]
+    __slots__ = ["current", "route", "cache_rule", "compressor"]
 
     def __init__(self, route, rule, response_builder):
         super().__init__(route, rule, response_builder)
         self.current = rule.current
         self.route = route
         self.cache_rule = rule.cache_rule
+        #: cached contents are stored uncompressed, responses get compressed once built
+        self.compressor = next((pipe for pipe in rule.pipeline or () if isinstance(pipe, CompressionPipe)), None)
 
     async def get_data(self, reqargs, response):
-        key = self.cache_rule._build_ctx_key(
-            self.route, **self.cache_rule._build_ctx(reqargs, self.route, self.current)
-        )
-        data = self.cache_rule.cache.get(key)
+        rule = self.cache_rule
+        key = rule._build_ctx_key(self.route, **rule._build_ctx(reqargs, self.route, self.current))
+        data = (await rule.cache.get(key)) if rule.cache.is_async else rule.cache.get(key)
+        if data is None and (inflight := rule._inflight.get(key)):
+            #: the computing request resolves to `None` when its response is not cacheable
+            data = await asyncio.shield(inflight)
         if data is not None:
-            response.headers.update(data["headers"])
-            return data["content"]
-        content = await self.f(**reqargs)
-        if response.status == 200:
-            self.cache_rule.cache.set(key, {"content": content, "headers": response.headers}, self.cache_rule.duration)
+            if (rule.stale_ttl or rule.early_refresh) and should_refresh(data, rule.early_refresh):
+                self._spawn_refresh(key, reqargs)
+            response.headers.update(data.headers)
+            return data.body
+        return await self.compute_data(key, reqargs, response, self._flight(key))
+
+    def _flight(self, key):
+        inflight = self.cache_rule._inflight
+        if key in inflight:
+            return None
+        future = inflight[key] = asyncio.get_running_loop().create_future()
+        return future
+
+    async def compute_data(self, key, reqargs, response, future=None):
+        rule = self.cache_rule
+        data = None
+        if self.compressor is not None:
+            response._compress_deferred = True
+        try:
+            start = time.perf_counter()
+            content = await self.f(**reqargs)
+            #: responses objects are bound to the request producing them
+            if response.status == 200 and not isinstance(content, HTTPResponse):
+                if "etag" not in response.headers and (etag := _content_etag(content)):
+                    response.headers["etag"] = etag
+                duration = rule.cache._resolve_duration(rule.duration)
+                data = CachedResponse(
+                    response.status,
+                    list(response.headers.items()),
+                    content,
+                    time.time() + duration,
+                    time.perf_counter() - start,
+                )
+                if rule.cache.is_async:
+                    await rule.cache._store(key, data, duration + (rule.stale_ttl or 0), rule.tags)
+                else:
+                    rule.cache._store(key, data, duration + (rule.stale_ttl or 0), rule.tags)
+        finally:
+            if future is not None:
+                future.set_result(data)
+                del rule._inflight[key]
         return content
 
+    def _spawn_refresh(self, key, reqargs):
+        future = self._flight(key)
+        if future is None:
+            return
+        task = asyncio.create_task(self._refresh_data(key, reqargs, future))
+        self.cache_rule._background_tasks.add(task)
+        task.add_done_callback(self.cache_rule._background_tasks.discard)
+
+    async def _refresh_data(self, key, reqargs, future):
+        #: refresh runs in its own context, as the original response might be already sent
+        ctx = self.current.ctx
+        response = ctx.response.__class__(ctx.response._proto)
+        token = self.current._init_(RequestContext(ctx.app, ctx.request, response))
+        try:
+            await self._parallel_flow(self.flow_open)
+            try:
+                await self.compute_data(key, reqargs, response, future)
+            finally:
+                await self._parallel_flow(self.flow_close)
+        except Exception:  # noqa: BLE001
+            if not future.done():
+                future.set_result(None)
+                self.cache_rule._inflight.pop(key, None)
+        finally:
+            self.current._close_(token)
+
+    async def build_response(self, content, response):
+        if response.status == 200:
+            headers = self.current.request.headers
+            if is_not_modified(response.headers, headers.get("if-none-match"), headers.get("if-modified-since")):
+                return HTTPResponse(304, headers=not_modified_headers(response.headers), cookies=response.cookies)
+        rv = self.response_builder(content, response)
+        if self.compressor is not None:
+            rv = await self.compressor._compress_response(rv)
+        return rv
+
     async def dispatch(self, reqargs, response):
         content = await self.get_data(reqargs, response)
-        return self.response_builder(content, response)
+        return await self.build_response(content, response)
 
 
 class CacheOpenDispatcher(CacheDispatcher):
@@ -102,7 +205,7 @@ class CacheCloseDispatcher(CacheDispatcher):
             await self._parallel_flow(self.flow_close)
             raise
         await self._parallel_flow(self.flow_close)
-        return self.response_builder(content, response)
+        return await self.build_response(content, response)
 
 
 class CacheFlowDispatcher(CacheDispatcher):
@@ -116,4 +219,4 @@ class CacheFlowDispatcher(CacheDispatcher):
             await self._parallel_flow(self.flow_close)
             raise
         await self._parallel_flow(self.flow_close)
-        return self.response_builder(content, response)
+        return await self.build_response(content, response)
@@ -28,6 +28,8 @@ class BytesResponseBuilder(MetaResponseBuilder):
     http_cls = HTTPBytesResponse
 
     def __call__(self, output: Any, response: Response) -> HTTPBytesResponse:
+        if isinstance(output, HTTPResponse):
+            return output
         return self.http_cls(response.status, output, headers=response.headers, cookies=response.cookies)
 
 
@@ -35,6 +37,8 @@ class StringResponseBuilder(MetaResponseBuilder):
     http_cls = HTTPStringResponse
 
     def __call__(self, output: Any, response: Response) -> HTTPStringResponse:
+        if isinstance(output, HTTPResponse):
+            return output
         return self.http_cls(response.status, output, headers=response.headers, cookies=response.cookies)
 
 
@@ -8,7 +8,13 @@ from typing import Any
 
 from .._emmett_core import HTTPRouter as _HTTPRouter, WSRouter as _WSRouter
 from ..extensions import Signals
-from ..http.response import HTTPBytesResponse
+from ..http.response import (
+    HTTPBytesResponse,
+    HTTPFileResponse,
+    HTTPIOResponse,
+    HTTPResponse,
+    HTTPStringResponse,
+)
 from .response import (
     AsyncIterResponseBuilder,
     AutoResponseBuilder,
@@ -23,6 +29,20 @@ from .rules import HTTPRoutingRule, RoutingRule, WebsocketRoutingRule
 
 RouteRecReq = namedtuple("RouteRecReq", ["name", "dispatch", "flow_stream"])
 RouteRecWS = namedtuple("RouteRecWS", ["name", "dispatch", "flow_recv", "flow_send"])
+MatchCacheInfo = namedtuple("MatchCacheInfo", ["hits", "misses", "size", "capacity"])
+
+
+def _head_response(rv: HTTPResponse) -> HTTPResponse:
+    #: entity headers are kept, including the length of the body GET would send
+    headers = dict(rv._headers)
+    if "content-length" not in headers:
+        if isinstance(rv, HTTPBytesResponse):
+            headers["content-length"] = str(len(rv.body))
+        elif isinstance(rv, HTTPStringResponse):
+            headers["content-length"] = str(len(rv.encoded_body))
+        elif isinstance(rv, HTTPIOResponse):
+            headers.update(rv._get_io_headers())
+    return HTTPResponse(rv.status_code, headers=headers, cookies=rv._cookies)
 
 
 class RouterMixin:
@@ -161,9 +181,15 @@ class HTTPRouter(_HTTPRouter):
         "http": MetaResponseBuilder,
     }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, match_cache_size: int = 0, **kwargs):
         self._mixin_cls._init_router_(self, *args, **kwargs)
         self.pipeline = []
+        if match_cache_size:
+            self.set_match_cache(match_cache_size)
+
+    @property
+    def match_cache_info(self) -> MatchCacheInfo:
+        return MatchCacheInfo(*self.match_cache_stats())
 
     def add_route_str(self, route):
         self._routes_str[route.name] = "%s %s://%s%s%s -> %s" % (
@@ -184,12 +210,12 @@ class HTTPRouter(_HTTPRouter):
         else:
             _scheme = None
         self._mixin_cls._update_match_impl(self)
-        for method in route.methods:
+        for method, dispatcher in route.dispatchers.items():
             if route.is_static:
                 self.add_static_route(
                     self._routing_rec_builder(
                         name=route.name,
-                        dispatch=route.dispatchers[method].dispatch,
+                        dispatch=dispatcher.dispatch,
                         flow_stream=route.pipeline_flow_stream,
                     ),
                     route.path,
@@ -201,7 +227,7 @@ class HTTPRouter(_HTTPRouter):
                 self.add_re_route(
                     self._routing_rec_builder(
                         name=route.name,
-                        dispatch=route.dispatchers[method].dispatch,
+                        dispatch=dispatcher.dispatch,
                         flow_stream=route.pipeline_flow_stream,
                     ),
                     route.build_regex(route.path),
@@ -235,10 +261,20 @@ class HTTPRouter(_HTTPRouter):
     async def dispatch(self, request, response):
         match, reqargs = self.match(request)
         if not match:
+            #: on method mismatches the router gives back the methods allowed on the path
+            if reqargs:
+                response.headers["allow"] = ", ".join(reqargs)
+                if request.method == "OPTIONS":
+                    return HTTPResponse(204, headers=response.headers, cookies=response.cookies)
+                raise HTTPBytesResponse(405, body=b"Method not allowed", headers=response.headers)
             raise HTTPBytesResponse(404, body=b"Resource not found")
         request.name = match.name
         response._bind_flow(match.flow_stream)
-        return await match.dispatch(reqargs, response)
+        rv = await match.dispatch(reqargs, response)
+        #: HEAD requests can be served by GET routes, drop the body (file responses deal with it on their own)
+        if request.method == "HEAD" and rv.__class__ is not HTTPResponse and not isinstance(rv, HTTPFileResponse):
+            rv = _head_response(rv)
+        return rv
 
 
 class WebsocketRouter(_WSRouter):
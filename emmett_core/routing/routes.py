@@ -104,6 +104,9 @@ class HTTPRoute(Route):
             dispatcher, cdispatcher = dispatchers["base"]
         self.dispatchers = {}
         for method in self.methods:
+            #: HEAD requests get served by GET dispatchers when available
+            if method == "HEAD" and "GET" in self.methods:
+                continue
             dispatcher_cls = cdispatcher if rule.cache_rule and method in ["HEAD", "GET"] else dispatcher
             self.dispatchers[method] = dispatcher_cls(
                 self, rule, rule.head_builder if method == "HEAD" else rule.response_builder
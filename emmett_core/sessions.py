@@ -1,29 +1,82 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import os
 import pickle
 import tempfile
 import time
+import weakref
 import zlib
+from base64 import urlsafe_b64decode
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Any, TypeVar
 from uuid import uuid4
 
 from .cryptography import symmetric as crypto_symmetric
+from .cryptography.ciphers import AEADModes
 from .datastructures import sdict
 from .pipeline import Pipe
 
 
 class SessionData(sdict):
-    __slots__ = ("__sid", "__hash", "__expires", "__dump")
+    __slots__ = ("__sid", "__expires", "__dirty", "__digest", "__dump")
 
-    def __init__(self, initial=None, sid=None, expires=None):
+    def __init__(self, initial=None, sid=None, expires=None, deep_check=False):
         sdict.__init__(self, initial or ())
-        object.__setattr__(self, "_SessionData__dump", pickle.dumps(sdict(self)))
-        h = hashlib.md5(self._dump).hexdigest()  # noqa: S324
         object.__setattr__(self, "_SessionData__sid", sid)
-        object.__setattr__(self, "_SessionData__hash", h)
         object.__setattr__(self, "_SessionData__expires", expires)
+        object.__setattr__(self, "_SessionData__dirty", False)
+        object.__setattr__(self, "_SessionData__dump", None)
+        #: in-place changes to nested values are detected only comparing contents digests
+        digest = hashlib.md5(pickle.dumps(sdict(self))).digest() if deep_check else None  # noqa: S324
+        object.__setattr__(self, "_SessionData__digest", digest)
+
+    def _touch(self):
+        object.__setattr__(self, "_SessionData__dirty", True)
+        object.__setattr__(self, "_SessionData__dump", None)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._touch()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._touch()
+
+    __setattr__ = __setitem__
+    __delattr__ = __delitem__
+
+    def __ior__(self, other):
+        dict.update(self, other)
+        self._touch()
+        return self
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._touch()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._touch()
+        return dict.setdefault(self, key, default)
+
+    def pop(self, key, *args):
+        if key in self:
+            self._touch()
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        rv = dict.popitem(self)
+        self._touch()
+        return rv
+
+    def clear(self):
+        if self:
+            self._touch()
+        dict.clear(self)
 
     @property
     def _sid(self):
@@ -31,9 +84,12 @@ class SessionData(sdict):
 
     @property
     def _modified(self):
+        if self.__dirty:
+            return True
+        if self.__digest is None:
+            return False
         dump = pickle.dumps(sdict(self))
-        h = hashlib.md5(dump).hexdigest()  # noqa: S324
-        if h != self.__hash:
+        if hashlib.md5(dump).digest() != self.__digest:  # noqa: S324
             object.__setattr__(self, "_SessionData__dump", dump)
             return True
         return False
@@ -44,13 +100,71 @@ class SessionData(sdict):
 
     @property
     def _dump(self):
-        # note: self.__dump is updated only on _modified call
+        if self.__dump is None:
+            object.__setattr__(self, "_SessionData__dump", pickle.dumps(sdict(self)))
         return self.__dump
 
     def _expires_after(self, value):
         object.__setattr__(self, "_SessionData__expires", value)
 
 
+class LazySession:
+    __slots__ = ["_loader", "_session"]
+
+    def __init__(self, loader: Callable[[], SessionData]):
+        object.__setattr__(self, "_loader", loader)
+        object.__setattr__(self, "_session", None)
+
+    @property
+    def _loaded(self) -> bool:
+        return self._session is not None
+
+    def _load(self) -> SessionData:
+        if self._session is None:
+            object.__setattr__(self, "_session", self._loader())
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._load(), name)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._load()[key]
+
+    def __setitem__(self, key: str, value: Any):
+        self._load()[key] = value
+
+    def __delitem__(self, key: str):
+        del self._load()[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._load()
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __bool__(self) -> bool:
+        return bool(self._load())
+
+    def __eq__(self, other: object) -> bool:
+        return self._load() == other
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        if self._session is None:
+            return "<LazySession (not loaded)>"
+        return repr(self._session)
+
+
 class SessionPipe(Pipe):
     __slots__ = ["current"]
 
@@ -63,6 +177,7 @@ class SessionPipe(Pipe):
         domain: str | None = None,
         cookie_name: str | None = None,
         cookie_data: dict[str, Any] | None = None,
+        deep_check: bool = False,
     ):
         self.current = current
         self.expire = expire
@@ -71,6 +186,7 @@ class SessionPipe(Pipe):
         self.domain = domain
         self.cookie_name = cookie_name or f"emt_session_data_{current.app.name}"
         self.cookie_data = cookie_data or {}
+        self.deep_check = deep_check
 
     def _load_session(self, wrapper):
         raise NotImplementedError
@@ -98,26 +214,37 @@ class SessionPipe(Pipe):
     def _session_cookie_data(self) -> str:
         raise NotImplementedError
 
+    def _get_session(self, wrapper) -> SessionData:
+        session = None
+        if self.cookie_name in wrapper.cookies:
+            session = self._load_session(wrapper)
+        return session or self._new_session()
+
+    def _touched_session(self) -> bool:
+        #: sessions never accessed by the application are left as they are
+        session = self.current.session
+        if isinstance(session, LazySession):
+            if not session._loaded:
+                return False
+            self.current.session = session._session
+        return True
+
     async def open_request(self):
-        if self.cookie_name in self.current.request.cookies:
-            self.current.session = self._load_session(self.current.request)
-        if not self.current.session:
-            self.current.session = self._new_session()
+        self.current.session = LazySession(partial(self._get_session, self.current.request))
 
     async def open_ws(self):
-        if self.cookie_name in self.current.websocket.cookies:
-            self.current.session = self._load_session(self.current.websocket)
-        if not self.current.session:
-            self.current.session = self._new_session()
+        self.current.session = LazySession(partial(self._get_session, self.current.websocket))
 
     async def close_request(self):
         if getattr(self.current.response, "_done", False):
             return
-        self._close_session()
+        if self._touched_session():
+            self._close_session()
 
     def on_stream(self):
         self.current.response._done = True
-        self._close_session()
+        if self._touched_session():
+            self._close_session()
 
     def clear(self):
         pass
@@ -135,6 +262,8 @@ class CookieSessionPipe(SessionPipe):
         cookie_name=None,
         cookie_data=None,
         compression_level=0,
+        aead=None,
+        deep_check=False,
     ):
         super().__init__(
             current,
@@ -144,15 +273,18 @@ class CookieSessionPipe(SessionPipe):
             domain=domain,
             cookie_name=cookie_name,
             cookie_data=cookie_data,
+            deep_check=deep_check,
         )
         self.key = key
         self.compression_level = compression_level
+        #: opt-in AEAD cookies, readable only by versions supporting them
+        self.aead = aead
 
     def _encrypt_data(self) -> str:
         data = pickle.dumps(sdict(self.current.session))
         if self.compression_level:
             data = zlib.compress(data, self.compression_level)
-        return crypto_symmetric.encrypt_b64(data, self.key)
+        return crypto_symmetric.encrypt_b64(data, self.key, aead=self.aead)
 
     def _decrypt_data(self, data: str) -> SessionData:
         try:
@@ -162,16 +294,32 @@ class CookieSessionPipe(SessionPipe):
             rv = pickle.loads(ddata)  # noqa: S301
         except Exception:
             rv = None
-        return SessionData(rv, expires=self.expire)
+        return SessionData(rv, expires=self.expire, deep_check=self.deep_check)
 
     def _load_session(self, wrapper) -> SessionData:
         cookie_data = wrapper.cookies[self.cookie_name].value
         return self._decrypt_data(cookie_data)
 
     def _new_session(self) -> SessionData:
-        return SessionData(expires=self.expire)
+        return SessionData(expires=self.expire, deep_check=self.deep_check)
+
+    def _is_current_format(self, data: str) -> bool:
+        #: legacy tokens are joined with colons, versioned ones start with their version byte
+        if ":" in data:
+            return False
+        version = crypto_symmetric.V2 if self.aead is None else crypto_symmetric._AEAD_VERSIONS[self.aead]
+        try:
+            return urlsafe_b64decode(data[:4])[:1] == version
+        except ValueError:
+            return False
 
     def _session_cookie_data(self) -> str:
+        #: unchanged sessions keep the cookie they were loaded from, unless it needs migration
+        session = self.current.session
+        if session and not session._modified and self.cookie_name in self.current.request.cookies:
+            data = self.current.request.cookies[self.cookie_name].value
+            if self._is_current_format(data):
+                return data
         return self._encrypt_data()
 
     def clear(self):
@@ -183,7 +331,7 @@ class CookieSessionPipe(SessionPipe):
 
 class BackendStoredSessionPipe(SessionPipe):
     def _new_session(self):
-        return SessionData(sid=str(uuid4()))
+        return SessionData(sid=str(uuid4()), deep_check=self.deep_check)
 
     def _session_cookie_data(self) -> str:
         return self.current.session._sid
@@ -192,7 +340,7 @@ class BackendStoredSessionPipe(SessionPipe):
         sid = wrapper.cookies[self.cookie_name].value
         data = self._load(sid)
         if data is not None:
-            return SessionData(data, sid=sid)
+            return SessionData(data, sid=sid, deep_check=self.deep_check)
         return None
 
     def _delete_session(self):
@@ -217,6 +365,59 @@ class BackendStoredSessionPipe(SessionPipe):
         return None
 
 
+class AsyncBackendStoredSessionPipe(BackendStoredSessionPipe):
+    #: backends are awaited, so existing sessions are fetched when the request opens
+    async def _open_session(self, wrapper) -> LazySession:
+        session = None
+        if self.cookie_name in wrapper.cookies:
+            sid = wrapper.cookies[self.cookie_name].value
+            data = await self._load_async(sid)
+            if data is not None:
+                session = SessionData(data, sid=sid, deep_check=self.deep_check)
+        if session is None:
+            return LazySession(self._new_session)
+        return LazySession(lambda: session)
+
+    async def _delete_session_async(self):
+        pass
+
+    async def _save_session_async(self, expiration: int):
+        pass
+
+    async def _close_session_async(self, pack: bool = True):
+        session = self.current.session
+        if not session:
+            await self._delete_session_async()
+            #: if we got here means we want to destroy session definitely
+            if pack and session._modified and self.cookie_name in self.current.response.cookies:
+                del self.current.response.cookies[self.cookie_name]
+            return
+        expiration = session._expiration or self.expire
+        await self._save_session_async(expiration)
+        if pack:
+            self._pack_session(expiration)
+
+    async def _load_async(self, sid: str):
+        return None
+
+    async def open_request(self):
+        self.current.session = await self._open_session(self.current.request)
+
+    async def open_ws(self):
+        self.current.session = await self._open_session(self.current.websocket)
+
+    async def close_request(self):
+        if not self._touched_session():
+            return
+        #: streamed responses already sent the cookie, but the backend still needs to be updated
+        await self._close_session_async(pack=not getattr(self.current.response, "_done", False))
+
+    def on_stream(self):
+        self.current.response._done = True
+        if self._touched_session() and self.current.session:
+            self._pack_session(self.current.session._expiration or self.expire)
+
+
 class FileSessionPipe(BackendStoredSessionPipe):
     _fs_transaction_suffix = ".__emt_sess"
     _fs_mode = 0o600
@@ -231,6 +432,7 @@ class FileSessionPipe(BackendStoredSessionPipe):
         cookie_name=None,
         cookie_data=None,
         filename_template="emt_%s.sess",
+        deep_check=False,
     ):
         super().__init__(
             current,
@@ -240,6 +442,7 @@ class FileSessionPipe(BackendStoredSessionPipe):
             domain=domain,
             cookie_name=cookie_name,
             cookie_data=cookie_data,
+            deep_check=deep_check,
         )
         if filename_template.endswith(self._fs_transaction_suffix):
             raise RuntimeError(f"filename templates cannot end with {self._fs_transaction_suffix}")
@@ -250,9 +453,11 @@ class FileSessionPipe(BackendStoredSessionPipe):
             os.mkdir(self._path)
 
     def _delete_session(self):
-        fn = self._get_filename(self.current.session._sid)
+        self._remove(self.current.session._sid)
+
+    def _remove(self, sid):
         try:
-            os.unlink(fn)
+            os.unlink(self._get_filename(sid))
         except OSError:
             pass
 
@@ -299,6 +504,53 @@ class FileSessionPipe(BackendStoredSessionPipe):
                 pass
 
 
+class AsyncFileSessionPipe(FileSessionPipe, AsyncBackendStoredSessionPipe):
+    def __init__(
+        self,
+        current,
+        expire=3600,
+        secure=False,
+        samesite="Lax",
+        domain=None,
+        cookie_name=None,
+        cookie_data=None,
+        filename_template="emt_%s.sess",
+        deep_check=False,
+        max_workers=4,
+    ):
+        super().__init__(
+            current,
+            expire=expire,
+            secure=secure,
+            samesite=samesite,
+            domain=domain,
+            cookie_name=cookie_name,
+            cookie_data=cookie_data,
+            filename_template=filename_template,
+            deep_check=deep_check,
+        )
+        #: files I/O gets its own bounded pool, not to compete with the loop's default executor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="emt_sessions")
+        self._executor_finalizer = weakref.finalize(self, self._executor.shutdown, wait=False)
+
+    def _run(self, f, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, f, *args)
+
+    def shutdown(self):
+        #: also called on garbage collection and interpreter exit
+        self._executor_finalizer()
+
+    async def _delete_session_async(self):
+        await self._run(self._remove, self.current.session._sid)
+
+    async def _save_session_async(self, expiration):
+        if self.current.session._modified:
+            await self._run(self._store, self.current.session, expiration)
+
+    async def _load_async(self, sid):
+        return await self._run(self._load, sid)
+
+
 class RedisSessionPipe(BackendStoredSessionPipe):
     def __init__(
         self,
@@ -311,6 +563,7 @@ class RedisSessionPipe(BackendStoredSessionPipe):
         domain=None,
         cookie_name=None,
         cookie_data=None,
+        deep_check=False,
     ):
         super().__init__(
             current,
@@ -320,6 +573,7 @@ class RedisSessionPipe(BackendStoredSessionPipe):
             domain=domain,
             cookie_name=cookie_name,
             cookie_data=cookie_data,
+            deep_check=deep_check,
         )
         self.redis = redis
         self.prefix = prefix
@@ -338,7 +592,41 @@ class RedisSessionPipe(BackendStoredSessionPipe):
         return pickle.loads(data) if data else data  # noqa: S301
 
     def clear(self):
-        self.redis.delete(self.prefix + "*")
+        batch = []
+        for key in self.redis.scan_iter(match=self.prefix + "*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                self.redis.unlink(*batch)
+                batch = []
+        if batch:
+            self.redis.unlink(*batch)
+
+
+class AsyncRedisSessionPipe(RedisSessionPipe, AsyncBackendStoredSessionPipe):
+    #: `redis` is expected to be a `redis.asyncio` client, which relies on a connection pool
+
+    async def _delete_session_async(self):
+        await self.redis.delete(self.prefix + self.current.session._sid)
+
+    async def _save_session_async(self, expiration):
+        if self.current.session._modified:
+            await self.redis.setex(self.prefix + self.current.session._sid, expiration, self.current.session._dump)
+        else:
+            await self.redis.expire(self.prefix + self.current.session._sid, expiration)
+
+    async def _load_async(self, sid):
+        data = await self.redis.get(self.prefix + sid)
+        return pickle.loads(data) if data else data  # noqa: S301
+
+    async def clear(self):
+        batch = []
+        async for key in self.redis.scan_iter(match=self.prefix + "*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.redis.unlink(*batch)
+                batch = []
+        if batch:
+            await self.redis.unlink(*batch)
 
 
 TSessionPipe = TypeVar("TSessionPipe", bound=SessionPipe)
@@ -362,6 +650,8 @@ class SessionManager:
         cookie_name: str | None = None,
         cookie_data: dict[str, Any] | None = None,
         compression_level: int = 0,
+        aead: AEADModes | None = None,
+        deep_check: bool = False,
     ) -> CookieSessionPipe:
         return cls._build_pipe(
             CookieSessionPipe,
@@ -373,6 +663,8 @@ class SessionManager:
             cookie_name=cookie_name,
             cookie_data=cookie_data,
             compression_level=compression_level,
+            aead=aead,
+            deep_check=deep_check,
         )
 
     @classmethod
@@ -385,6 +677,7 @@ class SessionManager:
         cookie_name: str | None = None,
         cookie_data: dict[str, Any] | None = None,
         filename_template: str = "emt_%s.sess",
+        deep_check: bool = False,
     ) -> FileSessionPipe:
         return cls._build_pipe(
             FileSessionPipe,
@@ -395,6 +688,7 @@ class SessionManager:
             cookie_name=cookie_name,
             cookie_data=cookie_data,
             filename_template=filename_template,
+            deep_check=deep_check,
         )
 
     @classmethod
@@ -408,6 +702,7 @@ class SessionManager:
         domain: str | None = None,
         cookie_name: str | None = None,
         cookie_data: dict[str, Any] | None = None,
+        deep_check: bool = False,
     ) -> RedisSessionPipe:
         return cls._build_pipe(
             RedisSessionPipe,
@@ -419,8 +714,62 @@ class SessionManager:
             domain=domain,
             cookie_name=cookie_name,
             cookie_data=cookie_data,
+            deep_check=deep_check,
+        )
+
+    @classmethod
+    def async_files(
+        cls,
+        expire: int = 3600,
+        secure: bool = False,
+        samesite: str = "Lax",
+        domain: str | None = None,
+        cookie_name: str | None = None,
+        cookie_data: dict[str, Any] | None = None,
+        filename_template: str = "emt_%s.sess",
+        deep_check: bool = False,
+        max_workers: int = 4,
+    ) -> AsyncFileSessionPipe:
+        return cls._build_pipe(
+            AsyncFileSessionPipe,
+            expire=expire,
+            secure=secure,
+            samesite=samesite,
+            domain=domain,
+            cookie_name=cookie_name,
+            cookie_data=cookie_data,
+            filename_template=filename_template,
+            deep_check=deep_check,
+            max_workers=max_workers,
+        )
+
+    @classmethod
+    def async_redis(
+        cls,
+        redis: Any,
+        prefix: str = "emtsess:",
+        expire: int = 3600,
+        secure: bool = False,
+        samesite: str = "Lax",
+        domain: str | None = None,
+        cookie_name: str | None = None,
+        cookie_data: dict[str, Any] | None = None,
+        deep_check: bool = False,
+    ) -> AsyncRedisSessionPipe:
+        return cls._build_pipe(
+            AsyncRedisSessionPipe,
+            redis,
+            prefix=prefix,
+            expire=expire,
+            secure=secure,
+            samesite=samesite,
+            domain=domain,
+            cookie_name=cookie_name,
+            cookie_data=cookie_data,
+            deep_check=deep_check,
         )
 
     @classmethod
     def clear(cls):
-        cls._pipe.clear()
+        #: async pipes return an awaitable
+        return cls._pipe.clear()
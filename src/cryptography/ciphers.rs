@@ -1,5 +1,11 @@
 use ctr::cipher::{AsyncStreamCipher, BlockDecryptMut, BlockEncryptMut, KeyIvInit, StreamCipher};
-use pyo3::{IntoPyObjectExt, prelude::*};
+use pyo3::{
+    IntoPyObjectExt,
+    buffer::PyBuffer,
+    exceptions::{PyTypeError, PyValueError},
+    prelude::*,
+};
+use ring::aead;
 use std::borrow::Cow;
 
 type Aes128Cfb8Decryptor = cfb8::Decryptor<aes::Aes128>;
@@ -124,6 +130,140 @@ fn aes256_ctr128(py: Python, data: Cow<[u8]>, key: &[u8], nonce: &[u8]) -> PyRes
     aes_stream(py, &mut cipher, data)
 }
 
+#[inline]
+fn aead_key(
+    algorithm: &'static aead::Algorithm,
+    key: &[u8],
+    nonce: &[u8],
+) -> PyResult<(aead::LessSafeKey, aead::Nonce)> {
+    let key = aead::UnboundKey::new(algorithm, key)
+        .map_err(|_| PyValueError::new_err(format!("key must be {} bytes long", algorithm.key_len())))?;
+    let nonce = aead::Nonce::try_assume_unique_for_key(nonce)
+        .map_err(|_| PyValueError::new_err(format!("nonce must be {} bytes long", aead::NONCE_LEN)))?;
+    Ok((aead::LessSafeKey::new(key), nonce))
+}
+
+#[inline]
+fn writable_buffer(data: &Bound<PyAny>) -> PyResult<PyBuffer<u8>> {
+    let buf = PyBuffer::<u8>::get(data)?;
+    if buf.readonly() || !buf.is_c_contiguous() {
+        return Err(PyTypeError::new_err("data must be a writable contiguous buffer"));
+    }
+    Ok(buf)
+}
+
+// Encrypts the buffer in place, returning the authentication tag.
+#[inline]
+fn aead_seal(
+    py: Python,
+    algorithm: &'static aead::Algorithm,
+    data: &Bound<PyAny>,
+    key: &[u8],
+    nonce: &[u8],
+    aad: Option<&[u8]>,
+) -> PyResult<Py<PyAny>> {
+    let (key, nonce) = aead_key(algorithm, key, nonce)?;
+    let buf = writable_buffer(data)?;
+    let aad = aad.unwrap_or_default();
+    let tag = py.detach(|| {
+        // SAFETY: the buffer export is held until `buf.release`, so the exporter can't resize or free the
+        // memory while the GIL is released (`bytearray` raises `BufferError` on resizes while exported).
+        // The buffer was checked writable and C-contiguous, so `buf_ptr()` points to `len_bytes()` valid
+        // bytes, and the slice never escapes this closure. As for other GIL-releasing calls on mutable
+        // buffers, callers must not write to `data` from other threads until the call returns.
+        let in_out = unsafe { std::slice::from_raw_parts_mut(buf.buf_ptr().cast::<u8>(), buf.len_bytes()) };
+        key.seal_in_place_separate_tag(nonce, aead::Aad::from(aad), in_out)
+    });
+    buf.release(py);
+    tag.map_err(|_| PyValueError::new_err("encryption failed"))?
+        .as_ref()
+        .into_py_any(py)
+}
+
+// Verifies and decrypts the buffer in place, the buffer is zeroed on verification failure.
+#[inline]
+fn aead_open(
+    py: Python,
+    algorithm: &'static aead::Algorithm,
+    data: &Bound<PyAny>,
+    key: &[u8],
+    nonce: &[u8],
+    tag: &[u8],
+    aad: Option<&[u8]>,
+) -> PyResult<()> {
+    let (key, nonce) = aead_key(algorithm, key, nonce)?;
+    let tag = aead::Tag::try_from(tag)
+        .map_err(|_| PyValueError::new_err(format!("tag must be {} bytes long", algorithm.tag_len())))?;
+    let buf = writable_buffer(data)?;
+    let aad = aad.unwrap_or_default();
+    let verified = py.detach(|| {
+        // SAFETY: see `aead_seal`
+        let in_out = unsafe { std::slice::from_raw_parts_mut(buf.buf_ptr().cast::<u8>(), buf.len_bytes()) };
+        let verified = key
+            .open_in_place_separate_tag(nonce, aead::Aad::from(aad), tag, in_out, 0..)
+            .is_ok();
+        if !verified {
+            in_out.fill(0);
+        }
+        verified
+    });
+    buf.release(py);
+    if !verified {
+        return Err(PyValueError::new_err("Signature verification failed"));
+    }
+    Ok(())
+}
+
+#[pyfunction]
+#[pyo3(signature = (data, key, nonce, aad=None))]
+fn aes256_gcm_encrypt(
+    py: Python,
+    data: &Bound<PyAny>,
+    key: &[u8],
+    nonce: &[u8],
+    aad: Option<&[u8]>,
+) -> PyResult<Py<PyAny>> {
+    aead_seal(py, &aead::AES_256_GCM, data, key, nonce, aad)
+}
+
+#[pyfunction]
+#[pyo3(signature = (data, key, nonce, tag, aad=None))]
+fn aes256_gcm_decrypt(
+    py: Python,
+    data: &Bound<PyAny>,
+    key: &[u8],
+    nonce: &[u8],
+    tag: &[u8],
+    aad: Option<&[u8]>,
+) -> PyResult<()> {
+    aead_open(py, &aead::AES_256_GCM, data, key, nonce, tag, aad)
+}
+
+#[pyfunction]
+#[pyo3(signature = (data, key, nonce, aad=None))]
+fn chacha20poly1305_encrypt(
+    py: Python,
+    data: &Bound<PyAny>,
+    key: &[u8],
+    nonce: &[u8],
+    aad: Option<&[u8]>,
+) -> PyResult<Py<PyAny>> {
+    aead_seal(py, &aead::CHACHA20_POLY1305, data, key, nonce, aad)
+}
+
+#[pyfunction]
+#[pyo3(signature = (data, key, nonce, tag, aad=None))]
+fn chacha20poly1305_decrypt(
+    py: Python,
+    data: &Bound<PyAny>,
+    key: &[u8],
+    nonce: &[u8],
+    tag: &[u8],
+    aad: Option<&[u8]>,
+) -> PyResult<()> {
+    aead_open(py, &aead::CHACHA20_POLY1305, data, key, nonce, tag, aad)
+}
+
 pub(crate) fn init_pymodule(module: &Bound<PyModule>) -> PyResult<()> {
     module.add_function(wrap_pyfunction!(aes128_cfb8_decrypt, module)?)?;
     module.add_function(wrap_pyfunction!(aes128_cfb8_encrypt, module)?)?;
@@ -135,6 +275,10 @@ pub(crate) fn init_pymodule(module: &Bound<PyModule>) -> PyResult<()> {
     module.add_function(wrap_pyfunction!(aes256_cfb128_encrypt, module)?)?;
     module.add_function(wrap_pyfunction!(aes128_ctr128, module)?)?;
     module.add_function(wrap_pyfunction!(aes256_ctr128, module)?)?;
+    module.add_function(wrap_pyfunction!(aes256_gcm_decrypt, module)?)?;
+    module.add_function(wrap_pyfunction!(aes256_gcm_encrypt, module)?)?;
+    module.add_function(wrap_pyfunction!(chacha20poly1305_decrypt, module)?)?;
+    module.add_function(wrap_pyfunction!(chacha20poly1305_encrypt, module)?)?;
 
     Ok(())
 }
@@ -0,0 +1,219 @@
+use pyo3::{prelude::*, types::PyDict};
+use std::{
+    collections::HashMap,
+    hash::{BuildHasher, RandomState},
+    sync::{
+        Mutex, MutexGuard,
+        atomic::{AtomicUsize, Ordering},
+    },
+};
+
+const NIL: usize = usize::MAX;
+const SHARDS: usize = 16;
+const SHARD_MIN_CAPACITY: usize = 64;
+
+struct MatchCacheEntry {
+    key: Box<str>,
+    route: Py<PyAny>,
+    args: Option<Py<PyDict>>,
+    prev: usize,
+    next: usize,
+}
+
+// Bounded LRU of match results, stored in a slab with a doubly linked recency list.
+// Entries without args refer to the router shared empty dict, the others store the typed args
+// and return a copy of them on hits.
+pub(super) struct MatchCache {
+    capacity: usize,
+    entries: Vec<MatchCacheEntry>,
+    index: HashMap<Box<str>, usize>,
+    head: usize,
+    tail: usize,
+    generation: u64,
+    hits: u64,
+    misses: u64,
+}
+
+impl MatchCache {
+    pub(super) fn new(capacity: usize) -> Self {
+        Self {
+            capacity,
+            entries: Vec::with_capacity(capacity),
+            index: HashMap::with_capacity(capacity),
+            head: NIL,
+            tail: NIL,
+            generation: 0,
+            hits: 0,
+            misses: 0,
+        }
+    }
+
+    fn unlink(&mut self, idx: usize) {
+        let (prev, next) = (self.entries[idx].prev, self.entries[idx].next);
+        if prev == NIL {
+            self.head = next;
+        } else {
+            self.entries[prev].next = next;
+        }
+        if next == NIL {
+            self.tail = prev;
+        } else {
+            self.entries[next].prev = prev;
+        }
+    }
+
+    fn link_front(&mut self, idx: usize) {
+        self.entries[idx].prev = NIL;
+        self.entries[idx].next = self.head;
+        if self.head == NIL {
+            self.tail = idx;
+        } else {
+            self.entries[self.head].prev = idx;
+        }
+        self.head = idx;
+    }
+
+    fn touch(&mut self, idx: usize) {
+        if self.head != idx {
+            self.unlink(idx);
+            self.link_front(idx);
+        }
+    }
+
+    #[inline]
+    pub(super) fn generation(&self) -> u64 {
+        self.generation
+    }
+
+    pub(super) fn get(&mut self, py: Python, key: &str, shared: &Py<PyDict>) -> Option<(Py<PyAny>, Py<PyDict>)> {
+        let Some(&idx) = self.index.get(key) else {
+            self.misses += 1;
+            return None;
+        };
+        self.hits += 1;
+        self.touch(idx);
+        let entry = &self.entries[idx];
+        let args = match &entry.args {
+            Some(args) => args.bind(py).copy().ok()?.unbind(),
+            None => shared.clone_ref(py),
+        };
+        Some((entry.route.clone_ref(py), args))
+    }
+
+    pub(super) fn insert(&mut self, generation: u64, key: Box<str>, route: Py<PyAny>, args: Option<Py<PyDict>>) {
+        if self.capacity == 0 || generation != self.generation {
+            return;
+        }
+        if let Some(&idx) = self.index.get(&key) {
+            let entry = &mut self.entries[idx];
+            entry.route = route;
+            entry.args = args;
+            self.touch(idx);
+            return;
+        }
+        let idx = if self.entries.len() < self.capacity {
+            self.entries.push(MatchCacheEntry {
+                key: key.clone(),
+                route,
+                args,
+                prev: NIL,
+                next: NIL,
+            });
+            self.entries.len() - 1
+        } else {
+            let idx = self.tail;
+            self.unlink(idx);
+            let entry = &mut self.entries[idx];
+            self.index.remove(&entry.key);
+            entry.key = key.clone();
+            entry.route = route;
+            entry.args = args;
+            idx
+        };
+        self.index.insert(key, idx);
+        self.link_front(idx);
+    }
+
+    pub(super) fn clear(&mut self) {
+        self.entries.clear();
+        self.index.clear();
+        self.head = NIL;
+        self.tail = NIL;
+        self.generation += 1;
+    }
+
+    pub(super) fn resize(&mut self, capacity: usize) {
+        self.clear();
+        self.capacity = capacity;
+        self.hits = 0;
+        self.misses = 0;
+    }
+
+    pub(super) fn stats(&self) -> (u64, u64, usize, usize) {
+        (self.hits, self.misses, self.entries.len(), self.capacity)
+    }
+}
+
+// Match caches are split in shards, each one with its own lock and LRU, so concurrent requests
+// for different paths don't contend on a single lock. Small caches use fewer shards, as every
+// shard needs enough room to keep its LRU meaningful.
+pub(super) struct ShardedMatchCache {
+    shards: [Mutex<MatchCache>; SHARDS],
+    active: AtomicUsize,
+    capacity: AtomicUsize,
+    hasher: RandomState,
+}
+
+impl ShardedMatchCache {
+    pub(super) fn new() -> Self {
+        Self {
+            shards: std::array::from_fn(|_| Mutex::new(MatchCache::new(0))),
+            active: AtomicUsize::new(1),
+            capacity: AtomicUsize::new(0),
+            hasher: RandomState::new(),
+        }
+    }
+
+    #[inline]
+    pub(super) fn shard(&self, key: &str) -> MutexGuard<'_, MatchCache> {
+        let active = self.active.load(Ordering::Relaxed);
+        let idx = if active > 1 {
+            (self.hasher.hash_one(key) as usize) % active
+        } else {
+            0
+        };
+        self.shards[idx].lock().unwrap()
+    }
+
+    pub(super) fn clear(&self) {
+        for shard in &self.shards {
+            shard.lock().unwrap().clear();
+        }
+    }
+
+    pub(super) fn resize(&self, capacity: usize) {
+        let mut shards: Vec<MutexGuard<'_, MatchCache>> = self.shards.iter().map(|v| v.lock().unwrap()).collect();
+        let active = (capacity / SHARD_MIN_CAPACITY).clamp(1, SHARDS);
+        for (idx, shard) in shards.iter_mut().enumerate() {
+            let share = if idx < active {
+                capacity / active + usize::from(idx < capacity % active)
+            } else {
+                0
+            };
+            shard.resize(share);
+        }
+        self.active.store(active, Ordering::Relaxed);
+        self.capacity.store(capacity, Ordering::Relaxed);
+    }
+
+    pub(super) fn stats(&self) -> (u64, u64, usize, usize) {
+        let mut ret = (0, 0, 0, self.capacity.load(Ordering::Relaxed));
+        for shard in &self.shards {
+            let (hits, misses, size, _) = shard.lock().unwrap().stats();
+            ret.0 += hits;
+            ret.1 += misses;
+            ret.2 += size;
+        }
+        ret
+    }
+}
@@ -1,10 +1,66 @@
 use anyhow::Result;
 use pyo3::{IntoPyObjectExt, prelude::*, types::PyDict};
-use std::{collections::HashMap, sync::RwLock};
+use std::{
+    collections::HashMap,
+    sync::atomic::{AtomicBool, Ordering},
+};
 
-use super::{ReGroupType, RouteMap, RouteMapMatch, get_route_tree, match_re_routes, match_scheme_route_tree};
+use super::{
+    ReGroupType, RouteMap, RouteTable, RouteValue, RouterData, cache::ShardedMatchCache, get_route_tree,
+    match_re_routes, match_scheme_route_tree,
+};
 
-type HTTPRouteMapNode = HashMap<Box<str>, RouteMap>;
+// Routes are indexed by path first, every entry holds the route objects for the methods it accepts,
+// so a single lookup can tell apart unknown paths from methods not allowed.
+struct HTTPRouteMethods(Vec<(Box<str>, Py<PyAny>)>);
+
+impl HTTPRouteMethods {
+    fn new(method: &str, route: Py<PyAny>) -> Self {
+        Self(vec![(method.into(), route)])
+    }
+
+    fn contains(&self, method: &str) -> bool {
+        self.0.iter().any(|(key, _)| &key[..] == method)
+    }
+
+    fn insert(&mut self, method: &str, route: Py<PyAny>) {
+        match self.0.iter_mut().find(|(key, _)| &key[..] == method) {
+            Some(entry) => entry.1 = route,
+            None => self.0.push((method.into(), route)),
+        }
+    }
+
+    // HEAD requests fallback on GET routes
+    #[inline]
+    fn get(&self, method: &str) -> Option<&Py<PyAny>> {
+        self.0
+            .iter()
+            .find(|(key, _)| &key[..] == method)
+            .map(|(_, route)| route)
+            .or_else(|| if method == "HEAD" { self.get("GET") } else { None })
+    }
+
+    fn allowed<'a>(&'a self, target: &mut Vec<&'a str>) {
+        for (method, _) in &self.0 {
+            if !target.contains(&&method[..]) {
+                target.push(method);
+            }
+        }
+    }
+}
+
+impl RouteValue for HTTPRouteMethods {
+    fn clone_ref(&self, py: Python) -> Self {
+        Self(
+            self.0
+                .iter()
+                .map(|(method, route)| (method.clone(), route.clone_ref(py)))
+                .collect(),
+        )
+    }
+}
+
+type HTTPRouteMapNode = RouteMap<HTTPRouteMethods>;
 
 #[derive(Default)]
 struct HTTPRouteMap {
@@ -13,52 +69,137 @@ struct HTTPRouteMap {
     secure: HTTPRouteMapNode,
 }
 
+impl HTTPRouteMap {
+    fn clone_ref(&self, py: Python) -> Self {
+        Self {
+            any: self.any.clone_ref(py),
+            plain: self.plain.clone_ref(py),
+            secure: self.secure.clone_ref(py),
+        }
+    }
+
+    fn compile(&mut self) {
+        self.any.compile();
+        self.plain.compile();
+        self.secure.compile();
+    }
+}
+
+#[derive(Default)]
 struct HTTPRouterData {
     nhost: HTTPRouteMap,
     whost: HashMap<Box<str>, HTTPRouteMap>,
 }
 
-macro_rules! get_route_node_mut {
-    ($routes:expr, $host:expr, $scheme:expr, $method:expr) => {{
-        let node_scheme = get_route_tree!(HTTPRouteMap, $routes, $host, $scheme);
-        match node_scheme.get_mut($method) {
-            Some(v) => v,
-            None => {
-                let mut node: HTTPRouteMapNode = HashMap::with_capacity(node_scheme.len() + 1);
-                let keys: Vec<Box<str>> = node_scheme.keys().map(|v| v.clone()).collect();
-                for key in keys {
-                    node.insert(key.clone(), node_scheme.remove(&key).unwrap());
-                }
-                node.insert($method.into(), RouteMap::default());
-                *node_scheme = node;
-                node_scheme.get_mut($method).unwrap()
-            }
+impl RouterData for HTTPRouterData {
+    fn clone_ref(&self, py: Python) -> Self {
+        Self {
+            nhost: self.nhost.clone_ref(py),
+            whost: self
+                .whost
+                .iter()
+                .map(|(host, routes)| (host.clone(), routes.clone_ref(py)))
+                .collect(),
+        }
+    }
+
+    fn compile(&mut self) {
+        self.nhost.compile();
+        for routes in self.whost.values_mut() {
+            routes.compile();
         }
-    }};
+    }
 }
 
 #[pyclass(module = "emmett_core._emmett_core", frozen, subclass)]
 pub(super) struct HTTPRouter {
-    routes: RwLock<HTTPRouterData>,
-    pydict: Py<PyAny>,
+    routes: RouteTable<HTTPRouterData>,
+    pydict: Py<PyDict>,
     pynone: Py<PyAny>,
+    match_cache: ShardedMatchCache,
+    match_cache_enabled: AtomicBool,
 }
 
 impl HTTPRouter {
+    // On misses, methods allowed by routes matching the path get collected in `allowed`.
     #[inline]
     fn match_routes<'p>(
-        py: Python<'p>,
-        pydict: &Py<PyAny>,
-        routes_node: &'p HTTPRouteMapNode,
+        py: Python,
+        pydict: &Py<PyDict>,
+        routes: &'p HTTPRouteMapNode,
         method: &str,
         path: &str,
-    ) -> Option<(Py<PyAny>, Py<PyAny>)> {
-        routes_node.get(method).and_then(|routes| {
-            routes.r#static.get(path).map_or_else(
-                || match_re_routes!(py, routes, path),
-                |route| Some((route.clone_ref(py), pydict.clone_ref(py))),
-            )
-        })
+        allowed: &mut Vec<&'p str>,
+    ) -> Option<(Py<PyAny>, Py<PyDict>)> {
+        let static_routes = routes.r#static.get(path);
+        if let Some(route) = static_routes.and_then(|methods| methods.get(method)) {
+            return Some((route.clone_ref(py), pydict.clone_ref(py)));
+        }
+        let select = |methods: &'p HTTPRouteMethods| methods.get(method);
+        let mut skipped = Vec::new();
+        let ret = match_re_routes!(py, routes, path, select, &mut skipped);
+        if ret.is_none() {
+            if let Some(methods) = static_routes {
+                methods.allowed(allowed);
+            }
+            for idx in skipped {
+                routes.r#match[idx].2.allowed(allowed);
+            }
+        }
+        ret
+    }
+
+    fn no_match(&self, py: Python, mut allowed: Vec<&str>) -> (Py<PyAny>, Py<PyAny>) {
+        if allowed.is_empty() {
+            return (self.pynone.clone_ref(py), self.pydict.clone_ref(py).into_any());
+        }
+        if allowed.contains(&"GET") && !allowed.contains(&"HEAD") {
+            allowed.push("HEAD");
+        }
+        if !allowed.contains(&"OPTIONS") {
+            allowed.push("OPTIONS");
+        }
+        (self.pynone.clone_ref(py), allowed.into_py_any(py).unwrap())
+    }
+
+    // The cache generation gets loaded before the routes snapshot, so results computed over routes
+    // changed in the meantime won't be stored.
+    #[inline]
+    fn match_cached<'a>(
+        &'a self,
+        py: Python,
+        key: [&str; 4],
+        f: impl FnOnce(&'a HTTPRouterData, &mut Vec<&'a str>) -> Option<(Py<PyAny>, Py<PyDict>)>,
+    ) -> (Py<PyAny>, Py<PyAny>) {
+        let mut allowed = Vec::new();
+        if !self.match_cache_enabled.load(Ordering::Relaxed) {
+            return match f(self.routes.read(), &mut allowed) {
+                Some((route, args)) => (route, args.into_any()),
+                None => self.no_match(py, allowed),
+            };
+        }
+        let key: Box<str> = key.join("\0").into();
+        let generation = {
+            let mut cache = self.match_cache.shard(&key);
+            if let Some((route, args)) = cache.get(py, &key, &self.pydict) {
+                return (route, args.into_any());
+            }
+            cache.generation()
+        };
+        let Some((route, args)) = f(self.routes.read(), &mut allowed) else {
+            return self.no_match(py, allowed);
+        };
+        let cached_args = if args.as_ptr() == self.pydict.as_ptr() {
+            Some(None)
+        } else {
+            args.bind(py).copy().ok().map(|v| Some(v.unbind()))
+        };
+        if let Some(cached_args) = cached_args {
+            self.match_cache
+                .shard(&key)
+                .insert(generation, key, route.clone_ref(py), cached_args);
+        }
+        (route, args.into_any())
     }
 }
 
@@ -68,31 +209,45 @@ impl HTTPRouter {
     #[pyo3(signature = (*_args, **_kwargs))]
     fn new(py: Python, _args: &Bound<PyAny>, _kwargs: Option<&Bound<PyAny>>) -> Self {
         Self {
-            pydict: PyDict::new(py).into(),
+            pydict: PyDict::new(py).unbind(),
             pynone: py.None(),
-            routes: RwLock::new(HTTPRouterData {
-                nhost: HTTPRouteMap::default(),
-                whost: HashMap::new(),
-            }),
+            routes: RouteTable::new(),
+            match_cache: ShardedMatchCache::new(),
+            match_cache_enabled: AtomicBool::new(false),
         }
     }
 
     #[pyo3(signature = (route, path, method, host=None, scheme=None))]
-    fn add_static_route(&self, route: Py<PyAny>, path: &str, method: &str, host: Option<&str>, scheme: Option<&str>) {
-        let mut routes = self.routes.write().unwrap();
-        let node_method = get_route_node_mut!(routes, host, scheme, method);
-        let mut node: HashMap<Box<str>, Py<PyAny>> = HashMap::with_capacity(node_method.r#static.len() + 1);
-        let keys: Vec<Box<str>> = node_method.r#static.keys().cloned().collect();
-        for key in keys {
-            node.insert(key.clone(), node_method.r#static.remove(&key).unwrap());
-        }
-        node.insert(path.into(), route);
-        node_method.r#static = node;
+    fn add_static_route(
+        &self,
+        py: Python,
+        route: Py<PyAny>,
+        path: &str,
+        method: &str,
+        host: Option<&str>,
+        scheme: Option<&str>,
+    ) {
+        self.routes.write(py, |routes| {
+            let node_scheme = get_route_tree!(HTTPRouteMap, routes, host, scheme);
+            if let Some(methods) = node_scheme.r#static.get_mut(path) {
+                methods.insert(method, route);
+                return;
+            }
+            let mut node: HashMap<Box<str>, HTTPRouteMethods> = HashMap::with_capacity(node_scheme.r#static.len() + 1);
+            let keys: Vec<Box<str>> = node_scheme.r#static.keys().cloned().collect();
+            for key in keys {
+                node.insert(key.clone(), node_scheme.r#static.remove(&key).unwrap());
+            }
+            node.insert(path.into(), HTTPRouteMethods::new(method, route));
+            node_scheme.r#static = node;
+        });
+        self.match_cache.clear();
     }
 
     #[pyo3(signature = (route, rule, rgtmap, method, host=None, scheme=None))]
     fn add_re_route(
         &self,
+        py: Python,
         route: Py<PyAny>,
         rule: &str,
         rgtmap: &Bound<PyDict>,
@@ -120,56 +275,67 @@ impl HTTPRouter {
             };
             groups.push((key.into(), atype));
         }
-        let mut routes = self.routes.write().unwrap();
-        let node_method = get_route_node_mut!(routes, host, scheme, method);
-        let mut nodec: RouteMapMatch = Vec::with_capacity(node_method.r#match.len() + 1);
-        nodec.push((re, groups, route));
-        while let Some(v) = node_method.r#match.pop() {
-            nodec.push(v);
-        }
-        let node: RouteMapMatch = nodec.into_iter().rev().collect();
-        node_method.r#match = node;
+        self.routes.write(py, |routes| {
+            let node_scheme = get_route_tree!(HTTPRouteMap, routes, host, scheme);
+            // the same rule registered for several methods in a row shares its entry
+            let shared = node_scheme
+                .r#match
+                .last_mut()
+                .filter(|(last_re, _, methods)| last_re.as_str() == rule && !methods.contains(method));
+            if let Some((_, _, methods)) = shared {
+                methods.insert(method, route);
+                return;
+            }
+            node_scheme.add_re_route(re, groups, HTTPRouteMethods::new(method, route));
+        });
+        self.match_cache.clear();
         Ok(())
     }
 
+    #[pyo3(signature = (capacity))]
+    fn set_match_cache(&self, capacity: usize) {
+        self.match_cache.resize(capacity);
+        self.match_cache_enabled.store(capacity > 0, Ordering::Relaxed);
+    }
+
+    fn match_cache_stats(&self) -> (u64, u64, usize, usize) {
+        self.match_cache.stats()
+    }
+
     #[pyo3(signature = (method, path))]
     fn match_route_direct(&self, py: Python, method: &str, path: &str) -> (Py<PyAny>, Py<PyAny>) {
-        let routes = self.routes.read().unwrap();
-        HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path)
-            .or_else(|| Some((self.pynone.clone_ref(py), self.pydict.clone_ref(py))))
-            .unwrap()
+        self.match_cached(py, ["", "", method, path], |routes, allowed| {
+            HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path, allowed)
+        })
     }
 
     #[pyo3(signature = (scheme, method, path))]
     fn match_route_scheme(&self, py: Python, scheme: &str, method: &str, path: &str) -> (Py<PyAny>, Py<PyAny>) {
-        let routes = self.routes.read().unwrap();
-        HTTPRouter::match_routes(
-            py,
-            &self.pydict,
-            match_scheme_route_tree!(scheme, routes.nhost),
-            method,
-            path,
-        )
-        .or_else(|| HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path))
-        .or_else(|| Some((self.pynone.clone_ref(py), self.pydict.clone_ref(py))))
-        .unwrap()
+        self.match_cached(py, ["", scheme, method, path], |routes, allowed| {
+            HTTPRouter::match_routes(
+                py,
+                &self.pydict,
+                match_scheme_route_tree!(scheme, routes.nhost),
+                method,
+                path,
+                allowed,
+            )
+            .or_else(|| HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path, allowed))
+        })
     }
 
     #[pyo3(signature = (host, method, path))]
     fn match_route_host(&self, py: Python, host: &str, method: &str, path: &str) -> (Py<PyAny>, Py<PyAny>) {
-        let routes = self.routes.read().unwrap();
-        routes
-            .whost
-            .get(host)
-            .map_or_else(
-                || HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path),
-                |routes_node| {
-                    HTTPRouter::match_routes(py, &self.pydict, &routes_node.any, method, path)
-                        .or_else(|| HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path))
-                },
-            )
-            .or_else(|| Some((self.pynone.clone_ref(py), self.pydict.clone_ref(py))))
-            .unwrap()
+        self.match_cached(py, [host, "", method, path], |routes, allowed| {
+            match routes.whost.get(host) {
+                Some(routes_node) => {
+                    HTTPRouter::match_routes(py, &self.pydict, &routes_node.any, method, path, allowed).or_else(|| {
+                        HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path, allowed)
+                    })
+                }
+                None => HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path, allowed),
+            }
+        })
     }
 
     #[pyo3(signature = (host, scheme, method, path))]
@@ -181,44 +347,38 @@ impl HTTPRouter {
         method: &str,
         path: &str,
     ) -> (Py<PyAny>, Py<PyAny>) {
-        let routes = self.routes.read().unwrap();
-        routes
-            .whost
-            .get(host)
-            .map_or_else(
-                || {
+        self.match_cached(py, [host, scheme, method, path], |routes, allowed| {
+            match routes.whost.get(host) {
+                Some(routes_node) => HTTPRouter::match_routes(
+                    py,
+                    &self.pydict,
+                    match_scheme_route_tree!(scheme, routes_node),
+                    method,
+                    path,
+                    allowed,
+                )
+                .or_else(|| HTTPRouter::match_routes(py, &self.pydict, &routes_node.any, method, path, allowed))
+                .or_else(|| {
                     HTTPRouter::match_routes(
                         py,
                         &self.pydict,
-                        match_scheme_route_tree!(scheme, routes.nhost),
+                        match_scheme_route_tree!(scheme, &routes.nhost),
                         method,
                         path,
+                        allowed,
                     )
-                    .or_else(|| HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path))
-                },
-                |routes_node| {
-                    HTTPRouter::match_routes(
-                        py,
-                        &self.pydict,
-                        match_scheme_route_tree!(scheme, routes_node),
-                        method,
-                        path,
-                    )
-                    .or_else(|| {
-                        HTTPRouter::match_routes(py, &self.pydict, &routes_node.any, method, path).or_else(|| {
-                            HTTPRouter::match_routes(
-                                py,
-                                &self.pydict,
-                                match_scheme_route_tree!(scheme, &routes.nhost),
-                                method,
-                                path,
-                            )
-                            .or_else(|| HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path))
-                        })
-                    })
-                },
-            )
-            .or_else(|| Some((self.pynone.clone_ref(py), self.pydict.clone_ref(py))))
-            .unwrap()
+                })
+                .or_else(|| HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path, allowed)),
+                None => HTTPRouter::match_routes(
+                    py,
+                    &self.pydict,
+                    match_scheme_route_tree!(scheme, routes.nhost),
+                    method,
+                    path,
+                    allowed,
+                )
+                .or_else(|| HTTPRouter::match_routes(py, &self.pydict, &routes.nhost.any, method, path, allowed)),
+            }
+        })
     }
 }
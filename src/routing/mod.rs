@@ -1,13 +1,21 @@
 use pyo3::prelude::*;
-use std::collections::HashMap;
+use std::{
+    collections::HashMap,
+    sync::{
+        Mutex,
+        atomic::{AtomicBool, AtomicPtr, Ordering},
+    },
+};
 
+mod cache;
 mod http;
 mod parse;
 mod ws;
 
-type RouteMapStatic = HashMap<Box<str>, Py<PyAny>>;
-type RouteMapMatch = Vec<(regex::Regex, Vec<(Box<str>, ReGroupType)>, Py<PyAny>)>;
+type RouteMapStatic<T> = HashMap<Box<str>, T>;
+type RouteMapMatch<T> = Vec<(regex::Regex, Vec<(Box<str>, ReGroupType)>, T)>;
 
+#[derive(Clone, Copy)]
 enum ReGroupType {
     Any,
     Int,
@@ -15,10 +23,238 @@ enum ReGroupType {
     Date,
 }
 
-#[derive(Default)]
-struct RouteMap {
-    r#static: RouteMapStatic,
-    r#match: RouteMapMatch,
+trait RouteValue {
+    fn clone_ref(&self, py: Python) -> Self;
+}
+
+impl RouteValue for Py<PyAny> {
+    fn clone_ref(&self, py: Python) -> Self {
+        Py::clone_ref(self, py)
+    }
+}
+
+#[derive(Clone, Default)]
+struct RouteMatchNode {
+    children: HashMap<Box<str>, RouteMatchNode>,
+    routes: Vec<usize>,
+    rset: Option<regex::RegexSet>,
+    stale: bool,
+}
+
+impl RouteMatchNode {
+    // Sets are built once on publish, until then the node falls back to sequential matching.
+    fn insert(&mut self, segments: &[Box<str>], idx: usize) {
+        let mut node = self;
+        for segment in segments {
+            node = node.children.entry(segment.clone()).or_default();
+        }
+        node.routes.push(idx);
+        node.rset = None;
+        node.stale = true;
+    }
+
+    fn compile<T>(&mut self, rules: &RouteMapMatch<T>) {
+        if self.stale {
+            // NOTE: if the set can't be compiled (eg: size limits) we fallback to sequential matching
+            self.rset = regex::RegexSet::new(self.routes.iter().map(|v| rules[*v].0.as_str())).ok();
+            self.stale = false;
+        }
+        for child in self.children.values_mut() {
+            child.compile(rules);
+        }
+    }
+
+    // Returns the first rule matching the path and accepted by `filter`,
+    // matching rules rejected by the filter get collected in `skipped`.
+    #[inline]
+    fn first_match<'r, T>(
+        &self,
+        rules: &'r RouteMapMatch<T>,
+        path: &str,
+        filter: &impl Fn(&'r T) -> bool,
+        skipped: &mut Vec<usize>,
+    ) -> Option<usize> {
+        let mut check = |idx: usize| {
+            if filter(&rules[idx].2) {
+                return true;
+            }
+            skipped.push(idx);
+            false
+        };
+        match &self.rset {
+            Some(rset) => rset
+                .matches(path)
+                .iter()
+                .map(|pos| self.routes[pos])
+                .find(|idx| check(*idx)),
+            None => self
+                .routes
+                .iter()
+                .copied()
+                .find(|idx| rules[*idx].0.is_match(path) && check(*idx)),
+        }
+    }
+
+    fn lookup<'r, T>(
+        &self,
+        rules: &'r RouteMapMatch<T>,
+        path: &str,
+        filter: impl Fn(&'r T) -> bool,
+        skipped: &mut Vec<usize>,
+    ) -> Option<usize> {
+        let mut node = self;
+        let mut ret = node.first_match(rules, path, &filter, skipped);
+        for segment in path.strip_prefix('/').unwrap_or(path).split('/') {
+            match node.children.get(segment) {
+                Some(child) => node = child,
+                None => break,
+            }
+            if let Some(idx) = node.first_match(rules, path, &filter, skipped) {
+                ret = Some(ret.map_or(idx, |cur| cur.min(idx)));
+            }
+        }
+        ret
+    }
+}
+
+struct RouteMap<T> {
+    r#static: RouteMapStatic<T>,
+    r#match: RouteMapMatch<T>,
+    tree: RouteMatchNode,
+}
+
+impl<T> Default for RouteMap<T> {
+    fn default() -> Self {
+        Self {
+            r#static: HashMap::new(),
+            r#match: Vec::new(),
+            tree: RouteMatchNode::default(),
+        }
+    }
+}
+
+impl<T: RouteValue> RouteMap<T> {
+    fn clone_ref(&self, py: Python) -> Self {
+        Self {
+            r#static: self
+                .r#static
+                .iter()
+                .map(|(key, route)| (key.clone(), route.clone_ref(py)))
+                .collect(),
+            r#match: self
+                .r#match
+                .iter()
+                .map(|(re, groups, route)| (re.clone(), groups.clone(), route.clone_ref(py)))
+                .collect(),
+            tree: self.tree.clone(),
+        }
+    }
+
+    fn add_re_route(&mut self, re: regex::Regex, groups: Vec<(Box<str>, ReGroupType)>, route: T) {
+        let segments = rule_segments(re.as_str());
+        let mut node: RouteMapMatch<T> = Vec::with_capacity(self.r#match.len() + 1);
+        node.append(&mut self.r#match);
+        node.push((re, groups, route));
+        self.r#match = node;
+        self.tree.insert(&segments, self.r#match.len() - 1);
+    }
+
+    fn compile(&mut self) {
+        self.tree.compile(&self.r#match);
+    }
+}
+
+trait RouterData: Default {
+    fn clone_ref(&self, py: Python) -> Self;
+    fn compile(&mut self);
+}
+
+// Routes are written at import time and read on every request: writes go to the building table, which
+// gets published as an immutable snapshot readers access without locking.
+// Writes happening after a publish (eg: dev reloads, dynamic registrations) start from a copy of the
+// published snapshot, and all of them get republished at once on the next read. Previous snapshots are
+// retained until the router gets dropped, as readers might still reference them.
+struct RouteTable<T> {
+    building: Mutex<T>,
+    pending: AtomicBool,
+    published: AtomicPtr<T>,
+    retired: Mutex<Vec<Box<T>>>,
+}
+
+impl<T: RouterData> RouteTable<T> {
+    fn new() -> Self {
+        Self {
+            building: Mutex::new(T::default()),
+            pending: AtomicBool::new(true),
+            published: AtomicPtr::new(std::ptr::null_mut()),
+            retired: Mutex::new(Vec::new()),
+        }
+    }
+
+    #[inline]
+    fn read(&self) -> &T {
+        if self.pending.load(Ordering::Acquire) {
+            return self.publish();
+        }
+        // SAFETY: published snapshots are never mutated and live as long as the table
+        unsafe { &*self.published.load(Ordering::Acquire) }
+    }
+
+    fn publish(&self) -> &T {
+        let mut building = self.building.lock().unwrap();
+        if self.pending.load(Ordering::Acquire) {
+            let mut data = Box::new(std::mem::take(&mut *building));
+            data.compile();
+            let prev = self.published.swap(Box::into_raw(data), Ordering::AcqRel);
+            if !prev.is_null() {
+                // SAFETY: `prev` comes from `Box::into_raw` and it's not published anymore
+                self.retired.lock().unwrap().push(unsafe { Box::from_raw(prev) });
+            }
+            self.pending.store(false, Ordering::Release);
+        }
+        // SAFETY: see `read`
+        unsafe { &*self.published.load(Ordering::Acquire) }
+    }
+
+    fn write<R>(&self, py: Python, f: impl FnOnce(&mut T) -> R) -> R {
+        let mut building = self.building.lock().unwrap();
+        if !self.pending.load(Ordering::Acquire) {
+            // SAFETY: see `read`, the table is always published when nothing is pending
+            *building = unsafe { &*self.published.load(Ordering::Acquire) }.clone_ref(py);
+        }
+        let ret = f(&mut building);
+        self.pending.store(true, Ordering::Release);
+        ret
+    }
+}
+
+impl<T> Drop for RouteTable<T> {
+    fn drop(&mut self) {
+        let ptr = *self.published.get_mut();
+        if !ptr.is_null() {
+            // SAFETY: we have exclusive access, no readers can hold the snapshot anymore
+            drop(unsafe { Box::from_raw(ptr) });
+        }
+    }
+}
+
+// Extracts the leading literal segments of a route regex, used to index the rule in the matching tree.
+// Everything after the first regex meta-character (including partial segments) is left to the regex itself.
+fn rule_segments(rule: &str) -> Vec<Box<str>> {
+    let Some(rule) = rule.strip_prefix("^/") else {
+        return Vec::new();
+    };
+    let end = rule
+        .find(|c: char| {
+            matches!(
+                c,
+                '\\' | '.' | '+' | '*' | '?' | '(' | ')' | '|' | '[' | ']' | '{' | '}' | '^' | '$'
+            )
+        })
+        .unwrap_or(rule.len());
+    let mut segments: Vec<Box<str>> = rule[..end].split('/').map(Into::into).collect();
+    segments.pop();
+    segments
 }
 
 macro_rules! get_route_tree {
@@ -58,15 +294,17 @@ macro_rules! match_scheme_route_tree {
 }
 
 macro_rules! match_re_routes {
-    ($py:expr, $routes:expr, $path:expr) => {{
+    ($py:expr, $routes:expr, $path:expr, $select:expr, $skipped:expr) => {{
         $py.detach(|| {
-            for (rpath, groupnames, robj) in &$routes.r#match {
-                if rpath.is_match($path) {
-                    let groups = rpath.captures($path).unwrap();
-                    return Some((robj, groupnames, groups));
-                }
-            }
-            None
+            $routes
+                .tree
+                .lookup(&$routes.r#match, $path, |route| $select(route).is_some(), $skipped)
+                .and_then(|idx| {
+                    let (rpath, groupnames, robj) = &$routes.r#match[idx];
+                    rpath
+                        .captures($path)
+                        .and_then(|groups| $select(robj).map(|robj| (robj, groupnames, groups)))
+                })
         })
         .and_then(|(route, gnames, mgroups)| {
             let pydict = PyDict::new($py);
@@ -88,7 +326,7 @@ macro_rules! match_re_routes {
                 }
                 let _ = pydict.set_item(&gname[..], gval.unwrap());
             }
-            return Some((route.clone_ref($py), pydict.into_py_any($py).unwrap()));
+            return Some((route.clone_ref($py), pydict.unbind()));
         })
     }};
 }
@@ -1,25 +1,64 @@
 use anyhow::Result;
 use pyo3::{IntoPyObjectExt, prelude::*, types::PyDict};
-use std::{collections::HashMap, sync::RwLock};
+use std::collections::HashMap;
 
-use super::{ReGroupType, RouteMap, RouteMapMatch, get_route_tree, match_re_routes, match_scheme_route_tree};
+use super::{ReGroupType, RouteMap, RouteTable, RouterData, get_route_tree, match_re_routes, match_scheme_route_tree};
+
+type WSRouteMapNode = RouteMap<Py<PyAny>>;
 
 #[derive(Default)]
 struct WSRouteMap {
-    any: RouteMap,
-    plain: RouteMap,
-    secure: RouteMap,
+    any: WSRouteMapNode,
+    plain: WSRouteMapNode,
+    secure: WSRouteMapNode,
+}
+
+impl WSRouteMap {
+    fn clone_ref(&self, py: Python) -> Self {
+        Self {
+            any: self.any.clone_ref(py),
+            plain: self.plain.clone_ref(py),
+            secure: self.secure.clone_ref(py),
+        }
+    }
+
+    fn compile(&mut self) {
+        self.any.compile();
+        self.plain.compile();
+        self.secure.compile();
+    }
 }
 
+#[derive(Default)]
 struct WSRouterData {
     nhost: WSRouteMap,
     whost: HashMap<Box<str>, WSRouteMap>,
 }
 
+impl RouterData for WSRouterData {
+    fn clone_ref(&self, py: Python) -> Self {
+        Self {
+            nhost: self.nhost.clone_ref(py),
+            whost: self
+                .whost
+                .iter()
+                .map(|(host, routes)| (host.clone(), routes.clone_ref(py)))
+                .collect(),
+        }
+    }
+
+    fn compile(&mut self) {
+        self.nhost.compile();
+        for routes in self.whost.values_mut() {
+            routes.compile();
+        }
+    }
+}
+
 #[pyclass(module = "emmett_core._emmett_core", frozen, subclass)]
 pub(super) struct WSRouter {
-    routes: RwLock<WSRouterData>,
-    pydict: Py<PyAny>,
+    routes: RouteTable<WSRouterData>,
+    pydict: Py<PyDict>,
     pynone: Py<PyAny>,
 }
 
@@ -27,12 +66,12 @@ impl WSRouter {
     #[inline]
     fn match_routes<'p>(
         py: Python<'p>,
-        pydict: &Py<PyAny>,
-        routes: &'p RouteMap,
+        pydict: &Py<PyDict>,
+        routes: &'p WSRouteMapNode,
         path: &str,
-    ) -> Option<(Py<PyAny>, Py<PyAny>)> {
+    ) -> Option<(Py<PyAny>, Py<PyDict>)> {
         routes.r#static.get(path).map_or_else(
-            || match_re_routes!(py, routes, path),
+            || match_re_routes!(py, routes, path, Some, &mut Vec::new()),
             |route| Some((route.clone_ref(py), pydict.clone_ref(py))),
         )
     }
@@ -44,31 +83,30 @@ impl WSRouter {
     #[pyo3(signature = (*_args, **_kwargs))]
     fn new(py: Python, _args: &Bound<PyAny>, _kwargs: Option<&Bound<PyAny>>) -> Self {
         Self {
-            pydict: PyDict::new(py).into(),
+            pydict: PyDict::new(py).unbind(),
             pynone: py.None(),
-            routes: RwLock::new(WSRouterData {
-                nhost: WSRouteMap::default(),
-                whost: HashMap::new(),
-            }),
+            routes: RouteTable::new(),
         }
     }
 
     #[pyo3(signature = (route, path, host=None, scheme=None))]
-    fn add_static_route(&self, route: Py<PyAny>, path: &str, host: Option<&str>, scheme: Option<&str>) {
-        let mut routes = self.routes.write().unwrap();
-        let node_method = get_route_tree!(WSRouteMap, routes, host, scheme);
-        let mut node: HashMap<Box<str>, Py<PyAny>> = HashMap::with_capacity(node_method.r#static.len() + 1);
-        let keys: Vec<Box<str>> = node_method.r#static.keys().cloned().collect();
-        for key in keys {
-            node.insert(key.clone(), node_method.r#static.remove(&key).unwrap());
-        }
-        node.insert(path.into(), route);
-        node_method.r#static = node;
+    fn add_static_route(&self, py: Python, route: Py<PyAny>, path: &str, host: Option<&str>, scheme: Option<&str>) {
+        self.routes.write(py, |routes| {
+            let node_method = get_route_tree!(WSRouteMap, routes, host, scheme);
+            let mut node: HashMap<Box<str>, Py<PyAny>> = HashMap::with_capacity(node_method.r#static.len() + 1);
+            let keys: Vec<Box<str>> = node_method.r#static.keys().cloned().collect();
+            for key in keys {
+                node.insert(key.clone(), node_method.r#static.remove(&key).unwrap());
+            }
+            node.insert(path.into(), route);
+            node_method.r#static = node;
+        });
     }
 
     #[pyo3(signature = (route, rule, rgtmap, host=None, scheme=None))]
     fn add_re_route(
         &self,
+        py: Python,
         route: Py<PyAny>,
         rule: &str,
         rgtmap: &Bound<PyDict>,
@@ -95,29 +133,24 @@ impl WSRouter {
             };
             groups.push((key.into(), atype));
         }
-        let mut routes = self.routes.write().unwrap();
-        let node_method = get_route_tree!(WSRouteMap, routes, host, scheme);
-        let mut nodec: RouteMapMatch = Vec::with_capacity(node_method.r#match.len() + 1);
-        nodec.push((re, groups, route));
-        while let Some(v) = node_method.r#match.pop() {
-            nodec.push(v);
-        }
-        let node: RouteMapMatch = nodec.into_iter().rev().collect();
-        node_method.r#match = node;
+        self.routes.write(py, |routes| {
+            let node_method = get_route_tree!(WSRouteMap, routes, host, scheme);
+            node_method.add_re_route(re, groups, route);
+        });
         Ok(())
     }
 
     #[pyo3(signature = (path))]
-    fn match_route_direct(&self, py: Python, path: &str) -> (Py<PyAny>, Py<PyAny>) {
-        let routes = self.routes.read().unwrap();
+    fn match_route_direct(&self, py: Python, path: &str) -> (Py<PyAny>, Py<PyDict>) {
+        let routes = self.routes.read();
         WSRouter::match_routes(py, &self.pydict, &routes.nhost.any, path)
             .or_else(|| Some((self.pynone.clone_ref(py), self.pydict.clone_ref(py))))
             .unwrap()
     }
 
     #[pyo3(signature = (scheme, path))]
-    fn match_route_scheme(&self, py: Python, scheme: &str, path: &str) -> (Py<PyAny>, Py<PyAny>) {
-        let routes = self.routes.read().unwrap();
+    fn match_route_scheme(&self, py: Python, scheme: &str, path: &str) -> (Py<PyAny>, Py<PyDict>) {
+        let routes = self.routes.read();
         WSRouter::match_routes(py, &self.pydict, match_scheme_route_tree!(scheme, routes.nhost), path)
             .or_else(|| WSRouter::match_routes(py, &self.pydict, &routes.nhost.any, path))
             .or_else(|| Some((self.pynone.clone_ref(py), self.pydict.clone_ref(py))))
@@ -125,8 +158,8 @@ impl WSRouter {
     }
 
     #[pyo3(signature = (host, path))]
-    fn match_route_host(&self, py: Python, host: &str, path: &str) -> (Py<PyAny>, Py<PyAny>) {
-        let routes = self.routes.read().unwrap();
+    fn match_route_host(&self, py: Python, host: &str, path: &str) -> (Py<PyAny>, Py<PyDict>) {
+        let routes = self.routes.read();
         routes
             .whost
             .get(host)
@@ -142,8 +175,8 @@ impl WSRouter {
     }
 
     #[pyo3(signature = (host, scheme, path))]
-    fn match_route_all(&self, py: Python, host: &str, scheme: &str, path: &str) -> (Py<PyAny>, Py<PyAny>) {
-        let routes = self.routes.read().unwrap();
+    fn match_route_all(&self, py: Python, host: &str, scheme: &str, path: &str) -> (Py<PyAny>, Py<PyDict>) {
+        let routes = self.routes.read();
         routes
             .whost
             .get(host)
@@ -1,9 +1,12 @@
+import asyncio
+import threading
+import time
 from collections import defaultdict
 
 import pytest
 
 from emmett_core.cache import Cache
-from emmett_core.cache.handlers import CacheHandler, RamCache
+from emmett_core.cache.handlers import CacheEntry, CacheHandler, RamCache, should_refresh
 
 
 class RamCacheCustom(RamCache): ...
@@ -153,3 +156,414 @@ async def test_cache_decorator_loop():
         await bar(1, b="bar", a="foo")
     assert len(cache._default_handler.data.keys()) == 4
     assert calls["bar"] == 4
+
+
+def test_ramcache_clock_expiration():
+    ram_cache = RamCache(threshold=2)
+    ram_cache.set("a", 1)
+    ram_cache.set("b", 2)
+    assert ram_cache.get("a") == 1
+    ram_cache.set("c", 3)
+    #: read entries get a second chance and are moved after the ones evicted
+    assert ram_cache.get("b") is None
+    assert list(ram_cache.data.keys()) == ["c", "a"]
+    #: the second chance is spent on the following eviction pass
+    ram_cache.set("x", 0)
+    ram_cache.set("y", 0)
+    assert list(ram_cache.data.keys()) == ["x", "y"]
+    ram_cache.set("a", 1)
+    ram_cache.set("c", 3)
+
+    ram_cache.set("a", 4, -1)
+    assert ram_cache.get("a") is None
+    ram_cache.set("d", 5)
+    assert list(ram_cache.data.keys()) == ["c", "d"]
+
+    ram_cache.clear("c")
+    assert list(ram_cache.data.keys()) == ["d"]
+    for idx in range(200):
+        ram_cache.set("e", idx)
+    assert len(ram_cache._shards[0].heap_exp) <= 2 * len(ram_cache.data) + 64
+    assert ram_cache.get("e") == 199
+
+
+def test_ramcache_shards():
+    ram_cache = RamCache(threshold=40, shards=4)
+    assert [shard.threshold for shard in ram_cache._shards] == [10] * 4
+    for idx in range(100):
+        ram_cache.set(f"key{idx}", idx)
+    assert all(len(shard.data) <= 10 for shard in ram_cache._shards)
+    assert len(ram_cache.data) <= 40
+    assert ram_cache.get("key99") == 99
+
+    ram_cache.clear("key99")
+    assert ram_cache.get("key99") is None
+    ram_cache.clear()
+    assert not ram_cache.data
+
+
+@pytest.mark.asyncio
+async def test_cache_single_flight_loop():
+    ram_cache = RamCache()
+    calls = defaultdict(lambda: 0)
+
+    async def compute():
+        calls["compute"] += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def failing():
+        calls["failing"] += 1
+        await asyncio.sleep(0.01)
+        raise ValueError
+
+    assert await asyncio.gather(*[ram_cache.get_or_set_loop("key", compute) for _ in range(5)]) == ["value"] * 5
+    assert calls["compute"] == 1
+    assert not ram_cache._inflight_loop
+
+    rv = await asyncio.gather(*[ram_cache.get_or_set_loop("err", failing) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(item, ValueError) for item in rv)
+    assert calls["failing"] == 1
+
+
+def test_cache_single_flight_sync():
+    ram_cache = RamCache()
+    calls = defaultdict(lambda: 0)
+
+    def compute():
+        calls["compute"] += 1
+        time.sleep(0.02)
+        return "value"
+
+    rv = []
+    threads = [threading.Thread(target=lambda: rv.append(ram_cache.get_or_set("key", compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert rv == ["value"] * 5
+    assert calls["compute"] == 1
+    assert not ram_cache._inflight_sync
+
+
+def test_cache_should_refresh(monkeypatch):
+    monkeypatch.setattr("emmett_core.cache.handlers.random.random", lambda: 0.5)
+    now = time.time()
+    assert should_refresh(CacheEntry(None, now - 1, 0.1), now=now)
+    assert not should_refresh(CacheEntry(None, now + 10, 0.1), now=now)
+    assert not should_refresh(CacheEntry(None, now + 10, 0), early_refresh=1.0, now=now)
+    #: long computations get refreshed early
+    assert should_refresh(CacheEntry(None, now + 1, 1000), early_refresh=1.0, now=now)
+
+
+@pytest.mark.asyncio
+async def test_cache_stale_loop():
+    ram_cache = RamCache()
+    calls = defaultdict(lambda: 0)
+
+    async def compute():
+        calls["compute"] += 1
+        await asyncio.sleep(0.01)
+        return calls["compute"]
+
+    assert await ram_cache.get_or_set_loop("key", compute, 0, stale_ttl=60) == 1
+    assert await ram_cache.get_or_set_loop("key", compute, 0, stale_ttl=60) == 1
+    assert await ram_cache.get_or_set_loop("key", compute, 0, stale_ttl=60) == 1
+    await asyncio.gather(*ram_cache._background_tasks)
+    assert calls["compute"] == 2
+    assert await ram_cache.get_or_set_loop("key", compute, 0, stale_ttl=60) == 2
+    await asyncio.gather(*ram_cache._background_tasks)
+    assert await ram_cache.get_or_set_loop("key", compute, 60) == 3
+
+
+def test_cache_stale_sync():
+    ram_cache = RamCache()
+    calls = defaultdict(lambda: 0)
+
+    @ram_cache("stale", duration=0, stale_ttl=60)
+    def compute():
+        calls["compute"] += 1
+        return calls["compute"]
+
+    assert compute() == 1
+    #: the calling thread refreshes the stale entry
+    assert compute() == 2
+    #: refresh metadata is kept out of plain reads
+    assert isinstance(ram_cache._get_raw("stale"), CacheEntry)
+    assert ram_cache.get("stale") == 2
+    assert ram_cache.get_many(["stale"]) == [2]
+    assert ram_cache.get_or_set("stale", compute) == 2
+
+
+@pytest.fixture(scope="function")
+def async_redis_cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    from emmett_core.cache.handlers import AsyncRedisCache
+
+    handler = AsyncRedisCache(prefix="test:")
+    handler._cache = fakeredis.aioredis.FakeRedis()
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_async_redis_cache(async_redis_cache):
+    cache = Cache(redis=async_redis_cache)
+    assert await async_redis_cache.get("foo") is None
+    await cache.set("foo", {"bar": 1}, 10)
+    assert await cache.get("foo") == {"bar": 1}
+    await async_redis_cache.set_many({"a": 1, "b": [2]})
+    assert await async_redis_cache.get_many(["a", "b", "c"]) == [1, [2], None]
+    await cache.clear("a")
+    assert await async_redis_cache.get("a") is None
+    await cache.delete_many(["b"])
+    assert await async_redis_cache.get_many(["b"]) == [None]
+    await cache.set("t", 1, tags=["x"])
+    await cache.invalidate_tags("x")
+    assert await async_redis_cache.get("t") is None
+    await cache.clear()
+    assert await async_redis_cache.get_many(["foo", "b"]) == [None, None]
+
+    calls = []
+
+    @cache("deco")
+    async def deco():
+        calls.append(1)
+        return "value"
+
+    assert await deco() == "value"
+    assert await deco() == "value"
+    assert len(calls) == 1
+    assert await cache.get_or_set_loop("loop", _await_2, 10) == 2
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_set("sync", lambda: 1)
+
+
+def test_ramcache_tags():
+    cache = RamCache(shards=2)
+    cache.set("a", 1, tags=["x"])
+    cache.set("b", 2, tags=["x", "y"])
+    cache.set("c", 3)
+    assert cache("d", lambda: 4, tags=["y"]) == 4
+
+    cache.invalidate_tags("x")
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.get("d") == 4
+    cache.invalidate_tags("y", "missing")
+    assert cache.get("d") is None
+    assert not cache._tags
+
+    with pytest.raises(NotImplementedError):
+        CacheHandler().invalidate_tags("x")
+
+
+@pytest.fixture(scope="function")
+def redis_cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    from emmett_core.cache.handlers import RedisCache
+
+    handler = RedisCache(prefix="test:")
+    handler._cache = fakeredis.FakeRedis()
+    return handler
+
+
+def test_redis_cache_clear(redis_cache):
+    redis_cache.scan_batch = 2
+    for idx in range(5):
+        redis_cache.set(f"foo:{idx}", idx)
+    redis_cache.set("bar", "bar")
+    redis_cache._cache.set("other", 1)
+
+    redis_cache.clear("foo:*")
+    assert [redis_cache.get(f"foo:{idx}") for idx in range(5)] == [None] * 5
+    assert redis_cache.get("bar") == "bar"
+    redis_cache.clear()
+    assert redis_cache.get("bar") is None
+    assert redis_cache._cache.get("other") == b"1"
+
+
+def test_redis_cache_tags(redis_cache):
+    redis_cache.set("a", 1, 10, tags=["x"])
+    redis_cache.set("b", 2, 20, tags=["x"])
+    redis_cache.set("c", 3, 10)
+    assert 10 < redis_cache._cache.ttl(redis_cache._tag_key("x")) <= 20
+
+    redis_cache.invalidate_tags("x")
+    assert redis_cache.get("a") is None
+    assert redis_cache.get("b") is None
+    assert redis_cache.get("c") == 3
+    assert not redis_cache._cache.exists(redis_cache._tag_key("x"))
+
+
+def test_ramcache_many():
+    cache = RamCache(prefix="p:", shards=4)
+    cache.set_many({"a": 1, "b": 2, "c": 3})
+    assert cache.get_many(["a", "b", "x", "c"]) == [1, 2, None, 3]
+    cache.delete_many(["a", "x", "c"])
+    assert cache.get_many(["a", "b", "c"]) == [None, 2, None]
+
+    base = CacheHandler()
+    base.set_many({"a": 1})
+    assert base.get_many(["a"]) == [None]
+
+
+def test_cache_many_decorator_sync():
+    cache = Cache()
+    calls = []
+
+    @cache.many("users")
+    def load(ids):
+        calls.append(ids)
+        return {oid: f"user{oid}" for oid in ids if oid != 4}
+
+    assert load([1, 2]) == {1: "user1", 2: "user2"}
+    assert load([2, 3, 4]) == {2: "user2", 3: "user3"}
+    assert calls == [[1, 2], [3, 4]]
+    assert cache.get_many(["users:1", "users:3", "users:4"]) == ["user1", "user3", None]
+
+
+@pytest.mark.asyncio
+async def test_cache_many_decorator_loop():
+    cache = Cache()
+    calls = []
+
+    @cache.many()
+    async def load(ids):
+        calls.append(ids)
+        return {oid: oid * 2 for oid in ids}
+
+    assert await load([1, 2]) == {1: 2, 2: 4}
+    assert await load([3, 1]) == {3: 6, 1: 2}
+    assert calls == [[1, 2], [3]]
+
+
+def test_redis_cache_serializer(redis_cache):
+    from emmett_core.cache.serializers import get_serializer
+
+    redis_cache._serializer = get_serializer("json")
+    redis_cache.set("a", {"b": [1, 2]})
+    assert redis_cache._cache.get("test:a") == b'J{"b":[1,2]}'
+    assert redis_cache.get("a") == {"b": [1, 2]}
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"c": 1}
+
+    assert redis_cache.get_or_set("stale", compute, 60, stale_ttl=60) == {"c": 1}
+    assert redis_cache.get_or_set("stale", compute, 60, stale_ttl=60) == {"c": 1}
+    assert redis_cache.get("stale") == {"c": 1}
+    assert len(calls) == 1
+
+
+def test_redis_cache_compression(redis_cache):
+    from emmett_core.cache.serializers import CacheCompressor
+
+    redis_cache._compressor = CacheCompressor("zlib", threshold=100)
+    redis_cache.set("a", "x" * 1000)
+    assert redis_cache._cache.get("test:a").startswith(b"Zd")
+    assert redis_cache.get("a") == "x" * 1000
+
+
+def test_redis_cache_many(redis_cache):
+    redis_cache.set_many({"a": 1, "b": {"c": 2}}, 10)
+    assert redis_cache.get_many(["a", "b", "x"]) == [1, {"c": 2}, None]
+    redis_cache.delete_many(["a", "x"])
+    assert redis_cache.get_many(["a", "b"]) == [None, {"c": 2}]
+
+
+@pytest.mark.parametrize("serializer", ["pickle", "json", "raw"])
+def test_cache_serializers(serializer):
+    from emmett_core.cache.serializers import dump_value, get_serializer, load_value
+
+    serializer = get_serializer(serializer)
+    for value in [1, -3, {"a": [1, "b"]}, "text", True, 1.5]:
+        assert load_value(dump_value(serializer, value)) == value
+    assert load_value(None) is None
+    assert load_value(b"!" + b"garbage") is None
+
+
+@pytest.mark.parametrize("serializer", ["pickle", "json", "msgpack", "raw"])
+def test_cache_serializers_stale_entry(serializer):
+    from emmett_core.cache.serializers import dump_value, get_serializer, load_value
+
+    if serializer == "msgpack":
+        pytest.importorskip("msgpack")
+    serializer = get_serializer(serializer)
+    for value in [{"a": [1, "b"]}, "text", 3]:
+        rv = load_value(dump_value(serializer, CacheEntry(value, 1000.5, 0.25)))
+        assert isinstance(rv, CacheEntry)
+        assert rv == (value, 1000.5, 0.25)
+
+
+def test_cache_serializers_raw():
+    from emmett_core.cache.serializers import dump_value, get_serializer, load_value
+
+    serializer = get_serializer("raw")
+    assert dump_value(serializer, b"\x00bytes") == b"B\x00bytes"
+    assert load_value(dump_value(serializer, b"\x00bytes")) == b"\x00bytes"
+    assert dump_value(serializer, "text") == b"Stext"
+    assert load_value(dump_value(serializer, ("a", 1))) == ("a", 1)
+
+
+def test_cache_serializers_msgpack():
+    pytest.importorskip("msgpack")
+    from emmett_core.cache.serializers import dump_value, get_serializer, load_value
+
+    serializer = get_serializer("msgpack")
+    assert load_value(dump_value(serializer, {"a": [1, "b"]})) == {"a": [1, "b"]}
+
+
+def test_cache_cached_response():
+    from emmett_core.cache.serializers import CachedResponse, dump_value, get_serializer, load_value
+
+    serializer = get_serializer("json")
+    for body in ["<p>àè</p>", b"\x00raw", {"not": "bytes"}]:
+        data = CachedResponse(200, [("content-type", "text/html"), ("etag", '"abc"')], body, 1000.5, 0.25)
+        rv = load_value(dump_value(serializer, data))
+        assert isinstance(rv, CachedResponse)
+        assert (rv.status, rv.headers, rv.body, rv.expiration, rv.delta) == (
+            200,
+            [("content-type", "text/html"), ("etag", '"abc"')],
+            body,
+            1000.5,
+            0.25,
+        )
+
+
+def test_cache_compression():
+    from emmett_core.cache.serializers import CacheCompressor, CachedResponse, dump_value, get_serializer, load_value
+
+    serializer = get_serializer("pickle")
+    compressor = CacheCompressor("zlib", threshold=100)
+    value = {"page": "<p>hello</p>" * 100}
+    payload = dump_value(serializer, value, compressor)
+    assert payload.startswith(b"Zd")
+    assert len(payload) < len(dump_value(serializer, value)) / 3
+    assert load_value(payload) == value
+
+    #: small, int and incompressible values are kept as they are
+    assert dump_value(serializer, "small", compressor) == dump_value(serializer, "small")
+    assert dump_value(serializer, 10**200, compressor) == str(10**200).encode("ascii")
+    noise = bytes(range(256))
+    assert dump_value(get_serializer("raw"), noise, compressor) == b"B" + noise
+
+    response = CachedResponse(200, [("content-type", "text/html")], "<p>hello</p>" * 100, 1.0, 0.1)
+    assert load_value(dump_value(serializer, response, compressor)).body == response.body
+    assert load_value(b"Zd" + b"corrupted") is None
+    assert load_value(b"Zx" + b"unknown") is None
+
+    with pytest.raises(RuntimeError):
+        CacheCompressor("lzma")
+
+
+def test_cache_compression_zstd():
+    pytest.importorskip("zstandard")
+    from emmett_core.cache.serializers import CacheCompressor, dump_value, get_serializer, load_value
+
+    payload = dump_value(get_serializer("json"), ["item"] * 500, CacheCompressor("zstd", threshold=100))
+    assert payload.startswith(b"Zz")
+    assert load_value(payload) == ["item"] * 500
@@ -1,4 +1,14 @@
-from emmett_core.cryptography.ciphers import AESModes, aes_decrypt, aes_encrypt
+import pytest
+
+from emmett_core.cryptography.ciphers import (
+    AEAD_TAG_SIZE,
+    AEADModes,
+    AESModes,
+    aead_decrypt,
+    aead_encrypt,
+    aes_decrypt,
+    aes_encrypt,
+)
 
 
 text = b"plain text"
@@ -56,3 +66,37 @@ def test_aes256_cfb128():
     ct = aes_encrypt(text, key, iv, AESModes.CFB128)
     assert ct == b"\xba\x18&\xe2\x81\x1b\x85Xr\xbb"
     assert aes_decrypt(ct, key, iv, AESModes.CFB128) == text
+
+
+def test_aes256_gcm():
+    #: NIST GCM test case 14
+    buf = bytearray(16)
+    tag = aead_encrypt(buf, b"\x00" * 32, b"\x00" * 12, mode=AEADModes.AES256_GCM)
+    assert bytes(buf).hex() == "cea7403d4d606b6e074ec5d3baf39d18"
+    assert tag.hex() == "d0d1c8a799996bf0265b98b5d48ab919"
+    aead_decrypt(buf, b"\x00" * 32, b"\x00" * 12, tag, mode=AEADModes.AES256_GCM)
+    assert buf == bytearray(16)
+
+
+@pytest.mark.parametrize("mode", [AEADModes.AES256_GCM, AEADModes.CHACHA20_POLY1305])
+def test_aead_in_place(mode):
+    key = b"a" * 32
+    nonce = b"b" * 12
+    buf = bytearray(b"__" + text)
+    view = memoryview(buf)[2:]
+
+    tag = aead_encrypt(view, key, nonce, b"header", mode)
+    assert len(tag) == AEAD_TAG_SIZE
+    assert buf[:2] == b"__"
+    assert bytes(view) != text
+    aead_decrypt(view, key, nonce, tag, b"header", mode)
+    assert bytes(buf) == b"__" + text
+
+    aead_encrypt(view, key, nonce, b"header", mode)
+    with pytest.raises(ValueError):
+        aead_decrypt(view, key, nonce, tag, b"other", mode)
+    assert bytes(view) == bytes(len(text))
+    with pytest.raises(TypeError):
+        aead_encrypt(text, key, nonce, mode=mode)
+    with pytest.raises(ValueError):
+        aead_encrypt(bytearray(text), key[:16], nonce, mode=mode)
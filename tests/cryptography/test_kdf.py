@@ -1,6 +1,17 @@
-from emmett_core.cryptography.kdf import pbkdf2_bin
+from emmett_core.cryptography.kdf import hkdf_sha256, pbkdf2_bin
 
 
 def test_pbkdf2():
     key = pbkdf2_bin(b"some password", b"a" * 16, 32)
     assert key == b"oQ\xbd-\xdb\x04\x85VT\x00\xc4\xcco\x8d\xc4~\xd3~(\x9e\xaa\xb8\x95\xacQ\xc4c\xa2\xbc1\x83*"
+
+
+def test_hkdf():
+    #: RFC 5869 test case 1
+    key = hkdf_sha256(
+        bytes.fromhex("0b" * 22),
+        salt=bytes.fromhex("000102030405060708090a0b0c"),
+        info=bytes.fromhex("f0f1f2f3f4f5f6f7f8f9"),
+        keylen=42,
+    )
+    assert key.hex() == ("3cb25f25faacd57a90434f64d0362f2a2d2d0a90cf1a5a4c5db02d56ecc4c5bf34007208d5b887185865")
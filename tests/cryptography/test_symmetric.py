@@ -1,4 +1,20 @@
-from emmett_core.cryptography.symmetric import decrypt_b64, decrypt_hex, encrypt_b64, encrypt_hex
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import hexlify
+
+import pytest
+
+from emmett_core.cryptography.ciphers import AEADModes
+from emmett_core.cryptography.symmetric import (
+    V2,
+    decrypt_b64,
+    decrypt_hex,
+    decrypt_v2,
+    encrypt,
+    encrypt_aead,
+    encrypt_b64,
+    encrypt_hex,
+    encrypt_v2,
+)
 
 
 text = b"plain text"
@@ -13,3 +29,37 @@ def test_b64():
 def test_hex():
     ct = encrypt_hex(text, key)
     assert decrypt_hex(ct, key) == text
+
+
+def test_v2_format():
+    ct = encrypt_b64(text, key)
+    assert ":" not in ct
+    assert urlsafe_b64decode(ct)[:1] == V2
+    assert encrypt_b64(text, key) != ct
+    with pytest.raises(ValueError):
+        decrypt_b64(ct, "other key")
+
+    raw = bytearray(encrypt_v2(text, key))
+    raw[20] ^= 1
+    with pytest.raises(ValueError):
+        decrypt_v2(bytes(raw), key)
+    with pytest.raises(ValueError):
+        decrypt_v2(b"\x01" + bytes(raw[1:]), key)
+
+
+def test_legacy_format():
+    cipher, salt, signature = encrypt(text, key)
+    assert decrypt_b64(":".join(urlsafe_b64encode(v).decode("utf8") for v in [salt, signature, cipher]), key) == text
+    assert decrypt_hex(":".join(hexlify(v).decode("utf8") for v in [salt, signature, cipher]), key) == text
+
+
+@pytest.mark.parametrize("mode", [AEADModes.AES256_GCM, AEADModes.CHACHA20_POLY1305])
+def test_aead_format(mode):
+    ct = encrypt_b64(text, key, aead=mode)
+    assert decrypt_b64(ct, key) == text
+    assert decrypt_hex(encrypt_hex(text, key, aead=mode), key) == text
+
+    raw = bytearray(encrypt_aead(text, key, mode))
+    raw[0] ^= 7
+    with pytest.raises(ValueError):
+        decrypt_b64(urlsafe_b64encode(bytes(raw)).decode("utf8"), key)
@@ -0,0 +1,106 @@
+import gzip
+import zlib
+
+import pytest
+
+from emmett_core.compression import CompressionPipe, add_vary, negotiate_encoding
+from emmett_core.datastructures import sdict
+from emmett_core.http.response import HTTPBytesResponse, HTTPIterResponse, HTTPStringResponse
+from emmett_core.http.wrappers.response import Response as _Response
+
+
+class Response(_Response):
+    async def stream(self, target, item_wrapper=None):
+        raise NotImplementedError
+
+
+@pytest.fixture(scope="function")
+def current():
+    return sdict(
+        request=sdict(method="GET", headers={"accept-encoding": "deflate, gzip;q=1.0, br;q=0"}),
+        response=Response(None),
+    )
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate, br", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("gzip;q=0.5, deflate", ["gzip", "deflate"]) == "deflate"
+    assert negotiate_encoding("*;q=0.1, gzip;q=0", ["gzip", "deflate"]) == "deflate"
+    assert negotiate_encoding("identity", ["gzip"]) is None
+
+
+def test_add_vary():
+    headers = {}
+    add_vary(headers, "accept-encoding")
+    assert headers["vary"] == "accept-encoding"
+    add_vary(headers, "accept-encoding")
+    assert headers["vary"] == "accept-encoding"
+    headers = {"vary": "Cookie"}
+    add_vary(headers, "accept-encoding")
+    assert headers["vary"] == "Cookie, accept-encoding"
+
+
+@pytest.mark.asyncio
+async def test_compression_body(current):
+    pipe = CompressionPipe(current, encodings=["gzip", "deflate"], min_size=10)
+    data = "hello world" * 10
+
+    async def route():
+        return data
+
+    rv = await pipe.pipe_request(route)
+    assert isinstance(rv, HTTPBytesResponse)
+    assert gzip.decompress(rv.body) == data.encode("utf8")
+    assert current.response.headers["content-encoding"] == "gzip"
+    assert current.response.headers["vary"] == "accept-encoding"
+
+    current.response = Response(None)
+
+    async def route_small():
+        return "hello"
+
+    assert await pipe.pipe_request(route_small) == "hello"
+    assert "content-encoding" not in current.response.headers
+    assert current.response.headers["vary"] == "accept-encoding"
+
+    current.response = Response(None)
+    current.response.content_type = "image/png"
+    assert await pipe.pipe_request(route) == data
+    assert "vary" not in current.response.headers
+
+
+@pytest.mark.asyncio
+async def test_compression_responses(current):
+    pipe = CompressionPipe(current, encodings=["deflate"], min_size=10)
+    data = "hello world" * 10
+
+    async def route_str():
+        return HTTPStringResponse(200, data)
+
+    rv = await pipe.pipe_request(route_str)
+    assert zlib.decompress(rv.body) == data.encode("utf8")
+    assert rv._headers["content-encoding"] == "deflate"
+
+    async def route_iter():
+        return HTTPIterResponse(iter([b"hello", b" ", b"world"]), headers={"content-type": "text/plain"})
+
+    rv = await pipe.pipe_request(route_iter)
+    assert zlib.decompress(b"".join(rv.iter)) == b"hello world"
+
+    async def route_encoded():
+        return HTTPStringResponse(200, data, headers={"content-type": "text/plain", "content-encoding": "identity"})
+
+    rv = await pipe.pipe_request(route_encoded)
+    assert rv.body == data
+
+
+def test_compression_stream(current):
+    pipe = CompressionPipe(current, encodings=["gzip"])
+    current.response.content_type = "text/event-stream"
+    pipe.on_stream()
+    encoder = current.response._stream_encoder
+    assert current.response.headers["content-encoding"] == "gzip"
+
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(encoder.compress(b"data: 1\r\n\r\n")) == b"data: 1\r\n\r\n"
+    assert decoder.decompress(encoder.compress(b"data: 2\r\n\r\n") + encoder.finish()) == b"data: 2\r\n\r\n"
@@ -1,15 +1,25 @@
+import asyncio
+import os
+import threading
 from io import BytesIO
 
 import pytest
 
+from emmett_core import _io
+from emmett_core._io import MappedFile
 from emmett_core.ctx import Current
+from emmett_core.datastructures import sdict
 from emmett_core.http.helpers import redirect
 from emmett_core.http.response import (
+    FileMetaCache,
     HTTPAsyncIterResponse,
     HTTPBytesResponse,
+    HTTPFileResponse,
+    HTTPIOResponse,
     HTTPIterResponse,
     HTTPResponse,
     HTTPStringResponse,
+    is_not_modified,
 )
 from emmett_core.http.wrappers.response import Response as _Response
 
@@ -110,3 +120,202 @@ def test_redirect(current):
         assert current.response.status == 302
         assert http_redirect.status_code == 302
         assert list(http_redirect.rsgi_headers()) == [("location", "/redirect")]
+
+
+def test_file_meta_cache(tmp_path):
+    file_path = tmp_path / "file.txt"
+    file_path.write_text("test")
+    cache = FileMetaCache(maxsize=1)
+
+    meta = cache.get(str(file_path), os.stat(file_path))
+    assert meta.headers["content-length"] == "4"
+    assert meta.asgi_headers[1] == (b"content-length", b"4")
+    assert cache.get(str(file_path), os.stat(file_path)) is meta
+
+    file_path.write_text("tested")
+    meta_changed = cache.get(str(file_path), os.stat(file_path))
+    assert meta_changed is not meta
+    assert meta_changed.headers["content-length"] == "6"
+
+    other_path = tmp_path / "other.txt"
+    other_path.write_text("other")
+    cache.get(str(other_path), os.stat(other_path))
+    assert list(cache.data.keys()) == [str(other_path)]
+
+
+def test_http_file_headers(tmp_path):
+    file_path = tmp_path / "file.txt"
+    file_path.write_text("test")
+
+    http = HTTPFileResponse(str(file_path), headers={"x-test": "test"})
+    http._load_stat_headers(http._stat_file())
+    headers = dict(http.asgi_headers())
+    assert headers[b"content-type"] == b"text/plain"
+    assert headers[b"content-length"] == b"4"
+    assert headers[b"x-test"] == b"test"
+    assert len(headers) == 5
+
+
+def test_not_modified():
+    headers = {"etag": "abc", "last-modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    assert is_not_modified(headers, '"abc"', None)
+    assert is_not_modified(headers, '"foo", W/"abc"', None)
+    assert is_not_modified(headers, "*", None)
+    assert not is_not_modified(headers, '"foo"', "Wed, 21 Oct 2015 07:28:00 GMT")
+    assert is_not_modified(headers, None, "Wed, 21 Oct 2015 07:28:00 GMT")
+    assert is_not_modified(headers, None, "Thu, 22 Oct 2015 07:28:00 GMT")
+    assert not is_not_modified(headers, None, "Tue, 20 Oct 2015 07:28:00 GMT")
+    assert not is_not_modified(headers, None, "invalid")
+    assert not is_not_modified({}, "*", None)
+
+
+@pytest.mark.asyncio
+async def test_http_file_not_modified(tmp_path):
+    file_path = tmp_path / "file.txt"
+    file_path.write_text("test")
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    http = HTTPFileResponse(str(file_path))
+    http._load_stat_headers(http._stat_file())
+    etag = http._headers["etag"]
+
+    scope = {"method": "GET", "headers": [(b"if-none-match", f'"{etag}"'.encode("latin-1"))]}
+    await HTTPFileResponse(str(file_path)).asgi(scope, send)
+    assert messages[0]["status"] == 304
+    headers = dict(messages[0]["headers"])
+    assert headers[b"etag"] == etag.encode("latin-1")
+    assert b"content-length" not in headers
+    assert not messages[1].get("body")
+
+    messages.clear()
+    scope = {"method": "GET", "headers": [(b"if-none-match", b'"other"')]}
+    await HTTPFileResponse(str(file_path)).asgi(scope, send)
+    assert messages[0]["status"] == 200
+    assert messages[1]["body"] == b"test"
+
+
+def test_http_file_parse_ranges():
+    assert HTTPFileResponse._parse_range_header("bytes=0-1", 10) == [(0, 2)]
+    assert HTTPFileResponse._parse_range_header("bytes=-3", 10) == [(7, 10)]
+    assert HTTPFileResponse._parse_range_header("bytes=5-, 0-1, 1-3", 10) == [(0, 4), (5, 10)]
+
+
+@pytest.mark.asyncio
+async def test_http_file_ranges(tmp_path, rsgi_proto):
+    file_path = tmp_path / "file.txt"
+    file_path.write_text("0123456789")
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"method": "GET", "headers": [(b"range", b"bytes=2-4")]}
+    await HTTPFileResponse(str(file_path)).asgi(scope, send)
+    assert messages[0]["status"] == 206
+    headers = dict(messages[0]["headers"])
+    assert headers[b"content-range"] == b"bytes 2-4/10"
+    assert headers[b"content-length"] == b"3"
+    assert b"".join(msg.get("body", b"") for msg in messages[1:]) == b"234"
+
+    messages.clear()
+    scope = {"method": "GET", "headers": [(b"range", b"bytes=20-")]}
+    await HTTPFileResponse(str(file_path)).asgi(scope, send)
+    assert messages[0]["status"] == 416
+    assert dict(messages[0]["headers"])[b"content-range"] == b"bytes */10"
+
+    messages.clear()
+    scope = {"method": "GET", "headers": [(b"range", b"bytes=0-1,-2"), (b"if-range", b"nomatch")]}
+    await HTTPFileResponse(str(file_path)).asgi(scope, send)
+    assert messages[0]["status"] == 200
+
+    http = HTTPFileResponse(str(file_path))
+    await http.rsgi(sdict(method="GET", headers={"range": "bytes=0-1,-2"}), rsgi_proto)
+    rsgi_proto.data.seek(0)
+    body = rsgi_proto.data.read()
+    headers = dict(rsgi_proto.headers)
+    boundary = headers["content-type"].split("boundary=")[1]
+    assert rsgi_proto.code == 206
+    assert headers["content-type"].startswith("multipart/byteranges")
+    assert int(headers["content-length"]) == len(body)
+    assert body == (
+        f"--{boundary}\r\ncontent-type: text/plain\r\ncontent-range: bytes 0-1/10\r\n\r\n01\r\n"
+        f"--{boundary}\r\ncontent-type: text/plain\r\ncontent-range: bytes 8-9/10\r\n\r\n89\r\n"
+        f"--{boundary}--\r\n"
+    ).encode("latin-1")
+
+
+@pytest.mark.asyncio
+async def test_http_file_stream(tmp_path):
+    file_path = tmp_path / "file.bin"
+    data = os.urandom(300 * 1024)
+    file_path.write_bytes(data)
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"method": "GET", "headers": []}
+    await HTTPFileResponse(str(file_path)).asgi(scope, send)
+    assert [len(msg["body"]) for msg in messages[1:]] == [64 * 1024] * 4 + [44 * 1024, 0]
+    assert b"".join(msg["body"] for msg in messages[1:]) == data
+
+    messages.clear()
+    scope = {"method": "GET", "headers": [(b"range", b"bytes=10-19")], "extensions": {"http.response.zerocopysend": {}}}
+    await HTTPFileResponse(str(file_path)).asgi(scope, send)
+    assert messages[0]["status"] == 206
+    assert messages[1]["type"] == "http.response.zerocopysend"
+    assert (messages[1]["offset"], messages[1]["count"]) == (10, 10)
+    assert messages[1]["file"].closed
+
+
+@pytest.mark.asyncio
+async def test_http_io_stream():
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    http = HTTPIOResponse(BytesIO(b"test" * 1024), chunk_size=1000)
+    await http.asgi({"method": "GET", "headers": []}, send)
+    assert dict(messages[0]["headers"])[b"content-length"] == b"4096"
+    assert [len(msg["body"]) for msg in messages[1:]] == [1000] * 4 + [96, 0]
+
+
+def test_mapped_file_close_with_slices(tmp_path):
+    file_path = tmp_path / "file.bin"
+    file_path.write_bytes(b"test" * 1024)
+    mapped = MappedFile(str(file_path))
+    chunk = mapped.view[:10]
+    mapped.close()
+    assert mapped._file.closed
+    assert bytes(chunk) == b"testtestte"
+
+
+@pytest.mark.asyncio
+async def test_http_file_stream_cancel(tmp_path, monkeypatch):
+    file_path = tmp_path / "file.bin"
+    file_path.write_bytes(os.urandom(300 * 1024))
+    started, release = threading.Event(), threading.Event()
+
+    def slow_slice_view(view, start, end, chunk_size):
+        chunk = view[start:end]
+        started.set()
+        release.wait(5)
+        return [bytes(chunk)]
+
+    monkeypatch.setattr(_io, "_slice_view", slow_slice_view)
+
+    async def consume():
+        async with _io.loop_map_file(str(file_path)) as view:
+            async for _ in _io.iter_view_chunks(view, loop=asyncio.get_running_loop()):
+                pass
+
+    task = asyncio.create_task(consume())
+    await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+    task.cancel()
+    asyncio.get_running_loop().call_later(0.05, release.set)
+    with pytest.raises(asyncio.CancelledError):
+        await task
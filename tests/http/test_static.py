@@ -0,0 +1,169 @@
+import asyncio
+import gzip
+import os
+import pathlib
+
+import pytest
+
+from emmett_core.datastructures import sdict
+from emmett_core.http.static import HTTPStaticFileResponse, StaticIndex, negotiate_static_file, precompress_static
+
+
+@pytest.fixture(scope="function")
+def static_app(tmp_path):
+    static_path = tmp_path / "static"
+    (static_path / "js").mkdir(parents=True)
+    (static_path / "js" / "app.js").write_text("console.log('app');")
+    (static_path / "it").mkdir()
+    (static_path / "it" / "hello.txt").write_text("ciao")
+    (static_path / "hello.txt").write_text("hello")
+    mod_path = tmp_path / "mod_static"
+    mod_path.mkdir()
+    (mod_path / "mod.css").write_text("body {}")
+    (tmp_path / "secret.txt").write_text("secret")
+    os.symlink(tmp_path / "secret.txt", static_path / "secret.txt")
+    return sdict(
+        static_path=str(static_path),
+        _modules={"mod": sdict(_static_path=str(mod_path))},
+        _languages=["en", "it"],
+        language_force_on_url=False,
+        config=sdict(static_version=None, static_version_urls=False),
+    )
+
+
+def test_static_index(static_app):
+    index = StaticIndex(static_app)
+
+    entry = index.get("/static/js/app.js")
+    assert entry.path == os.path.join(static_app.static_path, "js", "app.js")
+    assert entry.stat.st_size == 19
+    assert entry.meta.headers["content-type"] == "text/javascript"
+    assert entry.meta.headers["content-length"] == "19"
+    assert entry.meta.headers["etag"]
+
+    assert index.get("/static/__mod__/mod.css").meta.headers["content-type"] == "text/css"
+    assert index.get("/static/it/hello.txt")
+    assert index.get("/it/static/hello.txt") is None
+    assert index.get("/static/secret.txt") is None
+    assert index.get("/static/missing.js") is None
+
+
+def test_static_index_lang_version(static_app):
+    static_app.language_force_on_url = True
+    static_app.config.static_version_urls = True
+    static_app.config.static_version = "1.0.0"
+    index = StaticIndex(static_app)
+
+    assert index.get("/static/hello.txt").stat.st_size == 5
+    assert index.get("/en/static/hello.txt").stat.st_size == 5
+    assert index.get("/it/static/hello.txt").stat.st_size == 4
+    assert index.get("/it/static/_1.0.0/hello.txt").stat.st_size == 4
+    assert index.get("/static/_1.0.0/__mod__/mod.css") is None
+    assert index.get("/it/static/__mod__/_1.0.0/mod.css")
+
+
+def test_static_index_refresh(static_app):
+    index = StaticIndex(static_app, refresh_interval=0.000001)
+    assert index.get("/static/new.txt") is None
+
+    with open(os.path.join(static_app.static_path, "new.txt"), "w") as f:
+        f.write("new")
+    assert index.get("/static/new.txt").stat.st_size == 3
+
+
+def test_static_response(static_app):
+    entry = StaticIndex(static_app).get("/static/hello.txt")
+    http = HTTPStaticFileResponse(entry)
+    assert http._stat_file() is entry.stat
+    assert http._get_stat_headers(entry.stat) == entry.meta.headers
+    http._load_stat_headers(http._stat_file())
+    assert list(http.asgi_headers())[:4] == list(entry.meta.asgi_headers)
+
+
+def test_static_precompressed(static_app):
+    with open(os.path.join(static_app.static_path, "big.css"), "w") as f:
+        f.write("body {}\n" * 100)
+    written = precompress_static(static_app, encodings=["gzip"])
+    assert written == [os.path.join(static_app.static_path, "big.css.gz")]
+    assert precompress_static(static_app, encodings=["gzip"]) == []
+
+    entry = StaticIndex(static_app).get("/static/big.css")
+    assert entry.meta.headers["vary"] == "accept-encoding"
+    assert negotiate_static_file(entry, None) is entry
+    assert negotiate_static_file(entry, "br") is entry
+
+    variant = negotiate_static_file(entry, "gzip, deflate")
+    assert variant.path == written[0]
+    assert variant.meta.headers["content-encoding"] == "gzip"
+    assert variant.meta.headers["content-type"] == "text/css"
+    assert variant.meta.headers["content-length"] == str(os.path.getsize(written[0]))
+    assert variant.meta.headers["etag"] != entry.meta.headers["etag"]
+    with open(variant.path, "rb") as f:
+        assert gzip.decompress(f.read()) == b"body {}\n" * 100
+
+
+@pytest.mark.asyncio
+async def test_static_index_refresh_executor(static_app):
+    index = StaticIndex(static_app, refresh_interval=0.000001)
+    assert index.get("/static/new.txt") is None
+
+    (pathlib.Path(static_app.static_path) / "new.txt").write_text("new")
+    #: the walk runs in the executor, previous data is served meanwhile
+    assert index.get("/static/new.txt") is None
+    await index._refreshing
+    await asyncio.sleep(0)
+    assert index.get("/static/new.txt").stat.st_size == 3
+
+
+def test_static_index_changed_file(static_app, monkeypatch):
+    index = StaticIndex(static_app)
+    entry = index.get("/static/hello.txt")
+    assert entry.stat.st_size == 5
+
+    #: lookups don't touch the filesystem
+    def fail_stat(*args, **kwargs):
+        raise AssertionError("unexpected stat")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("emmett_core.http.static.os.stat", fail_stat)
+        assert index.get("/static/hello.txt") is entry
+
+    with open(os.path.join(static_app.static_path, "hello.txt"), "w") as f:
+        f.write("hello world")
+    assert index.get("/static/hello.txt") is entry
+    #: refreshes replace changed entries
+    index.refresh_interval = 0.000001
+    assert index.get("/static/hello.txt").stat.st_size == 11
+
+
+@pytest.mark.asyncio
+async def test_static_index_build_executor(static_app):
+    index = StaticIndex(static_app)
+    #: the first build runs in the executor, lookups miss meanwhile
+    assert index.get("/static/hello.txt") is None
+    await index._refreshing
+    await asyncio.sleep(0)
+    assert index.get("/static/hello.txt").stat.st_size == 5
+    assert index._refreshing is None
+
+    index = StaticIndex(static_app)
+    index.prepare(asyncio.get_running_loop())
+    await index._refreshing
+    await asyncio.sleep(0)
+    assert index._data is not None
+
+
+def test_static_precompressed_outdated(static_app):
+    source = os.path.join(static_app.static_path, "big.css")
+    with open(source, "w") as f:
+        f.write("body {}\n" * 100)
+    precompress_static(static_app, encodings=["gzip"])
+    assert StaticIndex(static_app).get("/static/big.css").encodings
+
+    stat_data = os.stat(source)
+    os.utime(source + ".gz", (stat_data.st_atime, stat_data.st_mtime - 10))
+    assert not StaticIndex(static_app).get("/static/big.css").encodings
+
+    assert precompress_static(static_app, encodings=["gzip"]) == [source + ".gz"]
+    assert not [name for name in os.listdir(static_app.static_path) if name.endswith(".tmp")]
+    assert StaticIndex(static_app).get("/static/big.css").encodings
@@ -0,0 +1,186 @@
+import asyncio
+import gzip
+from functools import partial
+
+import pytest
+
+from emmett_core.cache.handlers import RamCache
+from emmett_core.compression import CompressionPipe
+from emmett_core.ctx import Current, RequestContext
+from emmett_core.datastructures import sdict
+from emmett_core.http.response import HTTPStringResponse
+from emmett_core.http.wrappers.helpers import ResponseHeaders
+from emmett_core.http.wrappers.response import Response as _Response
+from emmett_core.routing.cache import CacheDispatcher, RouteCacheRule
+
+
+class Response(_Response):
+    async def stream(self, target, item_wrapper=None):
+        raise NotImplementedError
+
+
+class AsyncRamCache(RamCache):
+    is_async = True
+
+    async def get(self, key):
+        return super().get(key)
+
+    async def set(self, key, value, duration="default"):
+        return super().set(key, value, duration)
+
+
+def build_response():
+    return sdict(status=200, headers=ResponseHeaders({"content-type": "text/plain"}), cookies={})
+
+
+@pytest.fixture(scope="function")
+def cache_dispatcher_builder():
+    def builder(f, request_headers=None, cache=None, tags=None):
+        current = sdict(request=sdict(headers=request_headers or {}))
+        route = sdict(f=f, name="test.route", pipeline_flow_open=[], pipeline_flow_close=[])
+        rule = sdict(
+            current=current,
+            cache_rule=RouteCacheRule(cache or RamCache(), query_params=False, language=False, tags=tags),
+        )
+        return CacheDispatcher(route, rule, lambda content, response: content)
+
+    return builder
+
+
+@pytest.mark.asyncio
+async def test_route_cache_single_flight(cache_dispatcher_builder):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "content"
+
+    dispatcher = cache_dispatcher_builder(handler)
+    responses = [build_response() for _ in range(5)]
+    rv = await asyncio.gather(*[dispatcher.dispatch({}, response) for response in responses])
+    assert rv == ["content"] * 5
+    assert len(calls) == 1
+    assert all(response.headers["etag"] == responses[0].headers["etag"] for response in responses)
+    assert not dispatcher.cache_rule._inflight
+
+
+@pytest.mark.asyncio
+async def test_route_cache_async_handler(cache_dispatcher_builder):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return "content"
+
+    cache = AsyncRamCache()
+    dispatcher = cache_dispatcher_builder(handler, cache=cache)
+    assert await dispatcher.dispatch({}, build_response()) == "content"
+    assert await dispatcher.dispatch({}, build_response()) == "content"
+    assert len(calls) == 1
+    assert len(cache.data) == 1
+
+
+@pytest.mark.asyncio
+async def test_route_cache_tags(cache_dispatcher_builder):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return "content"
+
+    cache = RamCache()
+    dispatcher = cache_dispatcher_builder(handler, cache=cache, tags=["pages"])
+    await dispatcher.dispatch({}, build_response())
+    await dispatcher.dispatch({}, build_response())
+    assert len(calls) == 1
+    cache.invalidate_tags("pages")
+    await dispatcher.dispatch({}, build_response())
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_route_cache_not_modified(cache_dispatcher_builder):
+    async def handler():
+        return "content"
+
+    response = build_response()
+    assert await cache_dispatcher_builder(handler).dispatch({}, response) == "content"
+
+    dispatcher = cache_dispatcher_builder(handler, {"if-none-match": response.headers["etag"]})
+    http = await dispatcher.dispatch({}, build_response())
+    assert http.status_code == 304
+    assert "content-type" not in http._headers
+
+
+@pytest.mark.asyncio
+async def test_route_cache_stale():
+    current = Current()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        current.response.headers["x-call"] = str(len(calls))
+        return f"content{len(calls)}"
+
+    route = sdict(f=handler, name="test.route", pipeline_flow_open=[], pipeline_flow_close=[])
+    rule = sdict(
+        current=current,
+        cache_rule=RouteCacheRule(RamCache(), query_params=False, language=False, duration=0, stale_ttl=60),
+    )
+    dispatcher = CacheDispatcher(route, rule, lambda content, response: content)
+
+    for expected in ["content1", "content1", "content2"]:
+        response = Response(None)
+        token = current._init_(RequestContext(sdict(), sdict(headers={}), response))
+        assert await dispatcher.dispatch({}, response) == expected
+        await asyncio.gather(*rule.cache_rule._background_tasks)
+        current._close_(token)
+    #: background refresh doesn't touch the response of the triggering request
+    assert response.headers["x-call"] == "2"
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_route_cache_compression():
+    current = Current()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return "content " * 100
+
+    pipe = CompressionPipe(current, encodings=["gzip"])
+    route = sdict(
+        f=partial(pipe.pipe_request, handler), name="test.route", pipeline_flow_open=[], pipeline_flow_close=[]
+    )
+    rule = sdict(
+        current=current,
+        pipeline=[pipe],
+        cache_rule=RouteCacheRule(RamCache(), query_params=False, language=False),
+    )
+    dispatcher = CacheDispatcher(
+        route,
+        rule,
+        lambda content, response: HTTPStringResponse(
+            response.status, content, headers=response.headers, cookies=response.cookies
+        ),
+    )
+
+    responses = []
+    for accept_encoding, cookie in [("gzip", "alice"), ("identity", "bob")]:
+        response = Response(None)
+        response.cookies[f"{cookie}_session"] = cookie
+        request = sdict(method="GET", headers={"accept-encoding": accept_encoding})
+        token = current._init_(RequestContext(sdict(), request, response))
+        responses.append(await dispatcher.dispatch({}, response))
+        current._close_(token)
+
+    gzipped, plain = responses
+    assert len(calls) == 1
+    assert gzipped is not plain
+    assert gzipped._headers["content-encoding"] == "gzip"
+    assert gzip.decompress(gzipped.body) == b"content " * 100
+    assert "content-encoding" not in plain._headers
+    assert plain.body == "content " * 100
+    assert list(plain._cookies) == ["bob_session"]
@@ -3,6 +3,8 @@ import datetime
 import pytest
 
 from emmett_core.datastructures import sdict
+from emmett_core.http.response import HTTPResponse
+from emmett_core.http.wrappers.helpers import ResponseHeaders
 
 
 def route(router, path, **kwargs):
@@ -209,6 +211,69 @@ def cfg_ws_router_scheme_host(ws_router):
     return ws_router
 
 
+@pytest.fixture(scope="function")
+def cfg_http_router_order(http_router):
+    @route(http_router, "/<str:a>/<int:b>")
+    def test_route_generic(a, b):
+        return "Test Router"
+
+    @route(http_router, "/order/<int:b>")
+    def test_route_order(b):
+        return "Test Router"
+
+    @route(http_router, "/order/<int:b>/<str:c>")
+    def test_route_order_nested(b, c):
+        return "Test Router"
+
+    @route(http_router, "/order/<int:b>/foo")
+    def test_route_order_shadowed(b):
+        return "Test Router"
+
+    return http_router
+
+
+@pytest.fixture(scope="function")
+def cfg_http_router_methods(http_router):
+    @route(http_router, "/test_methods", methods=["get", "post"])
+    def test_route_methods():
+        return "Test Router"
+
+    @route(http_router, "/test_methods", methods="put")
+    def test_route_methods_put():
+        return "Test Router"
+
+    @route(http_router, "/test_methods/<int:a>", methods="get")
+    def test_route_methods_int(a):
+        return "Test Router"
+
+    @route(http_router, "/test_methods/<str:a>", methods="delete")
+    def test_route_methods_str(a):
+        return "Test Router"
+
+    return http_router
+
+
+@pytest.fixture(scope="function")
+def cfg_ws_router_order(ws_router):
+    @route(ws_router, "/<str:a>/<int:b>")
+    def test_route_generic(a, b):
+        return
+
+    @route(ws_router, "/order/<int:b>")
+    def test_route_order(b):
+        return
+
+    @route(ws_router, "/order/<int:b>/<str:c>")
+    def test_route_order_nested(b, c):
+        return
+
+    @route(ws_router, "/order/<int:b>/foo")
+    def test_route_order_shadowed(b):
+        return
+
+    return ws_router
+
+
 @pytest.fixture(scope="function")
 def routing_ctx(
     request,
@@ -265,6 +330,20 @@ def routing_ctx_scheme_host(
     }[request.param]
 
 
+@pytest.fixture(scope="function")
+def routing_ctx_order(
+    request,
+    http_ctx_builder,
+    ws_ctx_builder,
+    cfg_http_router_order,
+    cfg_ws_router_order,
+):
+    return {
+        "http": sdict(router=cfg_http_router_order, ctx=http_ctx_builder),
+        "ws": sdict(router=cfg_ws_router_order, ctx=ws_ctx_builder),
+    }[request.param]
+
+
 @pytest.mark.parametrize(("routing_ctx"), ["http", "ws"], indirect=True)
 @pytest.mark.parametrize(
     ("path", "name"),
@@ -330,6 +409,153 @@ def test_routing_args(routing_ctx):
         assert args["f"] == "bar/baz"
 
 
+@pytest.mark.parametrize(("routing_ctx_order"), ["http", "ws"], indirect=True)
+@pytest.mark.parametrize(
+    ("path", "name", "args"),
+    [
+        ("/order/1", "test_route_generic", {"a": "order", "b": 1}),
+        ("/foo/1", "test_route_generic", {"a": "foo", "b": 1}),
+        ("/order/1/bar", "test_route_order_nested", {"b": 1, "c": "bar"}),
+        ("/order/1/foo", "test_route_order_nested", {"b": 1, "c": "foo"}),
+    ],
+)
+def test_routing_declaration_order(routing_ctx_order, path, name, args):
+    with routing_ctx_order.ctx(path) as ctx:
+        route, rargs = routing_ctx_order.router.match(ctx.wrapper)
+        assert route.name == f"test_router.{name}"
+        assert rargs == args
+
+
+@pytest.mark.parametrize(("routing_ctx"), ["http", "ws"], indirect=True)
+def test_routing_add_after_match(routing_ctx):
+    with routing_ctx.ctx("/test_late/1") as ctx:
+        match, _ = routing_ctx.router.match(ctx.wrapper)
+        assert not match
+
+    @route(routing_ctx.router, "/test_late/<int:a>")
+    def test_route_late(a):
+        return
+
+    with routing_ctx.ctx("/test_late/1") as ctx:
+        match, args = routing_ctx.router.match(ctx.wrapper)
+        assert match.name == "test_router.test_route_late"
+        assert args == {"a": 1}
+
+    with routing_ctx.ctx("/test_route") as ctx:
+        match, _ = routing_ctx.router.match(ctx.wrapper)
+        assert match.name == "test_router.test_route"
+
+
+def test_routing_match_cache(cfg_http_router, http_ctx_builder):
+    router = cfg_http_router
+    assert router.match_cache_info == (0, 0, 0, 0)
+    router.set_match_cache(2)
+
+    for _ in range(2):
+        with http_ctx_builder("/test_int/1") as ctx:
+            route, args = router.match(ctx.wrapper)
+            assert route.name == "test_router.test_route_int"
+            assert args == {"a": 1}
+            #: cached args are copied on every hit
+            args["a"] = 2
+    assert router.match_cache_info == (1, 1, 1, 2)
+
+    with http_ctx_builder("/test_route") as ctx:
+        route, args = router.match(ctx.wrapper)
+        assert route.name == "test_router.test_route"
+        assert args == {}
+    with http_ctx_builder("/test_date/2000-01-01") as ctx:
+        router.match(ctx.wrapper)
+    #: LRU eviction of `/test_int/1`
+    with http_ctx_builder("/test_int/1") as ctx:
+        router.match(ctx.wrapper)
+    assert router.match_cache_info == (1, 4, 2, 2)
+
+    @route(router, "/test_int/1")
+    def test_route_int_static():
+        return "Test Router"
+
+    assert router.match_cache_info.size == 0
+    with http_ctx_builder("/test_int/1") as ctx:
+        route, _ = router.match(ctx.wrapper)
+        assert route.name == "test_router.test_route_int_static"
+
+
+def test_routing_methods(cfg_http_router_methods, http_ctx_builder):
+    router = cfg_http_router_methods
+
+    for method, name in [
+        ("GET", "test_route_methods"),
+        ("HEAD", "test_route_methods"),
+        ("POST", "test_route_methods"),
+        ("PUT", "test_route_methods_put"),
+    ]:
+        with http_ctx_builder("/test_methods", method=method) as ctx:
+            route, _ = router.match(ctx.wrapper)
+            assert route.name == f"test_router.{name}"
+
+    with http_ctx_builder("/test_methods", method="DELETE") as ctx:
+        route, allowed = router.match(ctx.wrapper)
+        assert not route
+        assert allowed == ["GET", "POST", "PUT", "HEAD", "OPTIONS"]
+
+    with http_ctx_builder("/test_methods/1", method="DELETE") as ctx:
+        route, args = router.match(ctx.wrapper)
+        assert route.name == "test_router.test_route_methods_str"
+        assert args == {"a": "1"}
+
+    with http_ctx_builder("/test_methods/1", method="POST") as ctx:
+        route, allowed = router.match(ctx.wrapper)
+        assert not route
+        assert allowed == ["GET", "DELETE", "HEAD", "OPTIONS"]
+
+    with http_ctx_builder("/test_methods/foo", method="POST") as ctx:
+        route, allowed = router.match(ctx.wrapper)
+        assert not route
+        assert allowed == ["DELETE", "OPTIONS"]
+
+    with http_ctx_builder("/test_missing", method="POST") as ctx:
+        route, args = router.match(ctx.wrapper)
+        assert not route
+        assert not args
+
+
+@pytest.mark.asyncio
+async def test_routing_methods_dispatch(cfg_http_router_methods, http_ctx_builder):
+    router = cfg_http_router_methods
+
+    def build_response():
+        return sdict(
+            status=200,
+            headers=ResponseHeaders({"content-type": "text/plain"}),
+            cookies={},
+            _bind_flow=lambda v: None,
+        )
+
+    with http_ctx_builder("/test_methods", method="HEAD") as ctx:
+        http = await router.dispatch(ctx.wrapper, build_response())
+        assert http.__class__ is HTTPResponse
+        assert http.status_code == 200
+        assert http._headers["content-type"] == "text/plain"
+        assert http._headers["content-length"] == str(len("Test Router"))
+
+    with http_ctx_builder("/test_methods", method="OPTIONS") as ctx:
+        http = await router.dispatch(ctx.wrapper, build_response())
+        assert http.status_code == 204
+        assert http._headers["allow"] == "GET, POST, PUT, HEAD, OPTIONS"
+
+    with http_ctx_builder("/test_methods", method="DELETE") as ctx:
+        with pytest.raises(HTTPResponse) as exc:
+            await router.dispatch(ctx.wrapper, build_response())
+        assert exc.value.status_code == 405
+        assert exc.value._headers["allow"] == "GET, POST, PUT, HEAD, OPTIONS"
+
+    with http_ctx_builder("/test_missing") as ctx:
+        with pytest.raises(HTTPResponse) as exc:
+            await router.dispatch(ctx.wrapper, build_response())
+        assert exc.value.status_code == 404
+
+
 @pytest.mark.parametrize(("routing_ctx_scheme"), ["http", "ws"], indirect=True)
 def test_routing_with_scheme(routing_ctx_scheme):
     with routing_ctx_scheme.ctx("/test") as ctx:
@@ -1,3 +1,5 @@
+import pickle
+
 import pytest
 
 from emmett_core.sessions import SessionManager as _SessionManager
@@ -32,3 +34,181 @@ async def test_session_cookie(http_ctx, session_manager):
     http_ctx.request.cookies = http_ctx.response.cookies
     await session_manager.open_request()
     assert http_ctx.session._expiration == 3600
+
+
+@pytest.mark.asyncio
+async def test_session_cookie_legacy_format(http_ctx, session_manager):
+    from base64 import urlsafe_b64decode, urlsafe_b64encode
+    from http.cookies import SimpleCookie
+
+    from emmett_core.cryptography.symmetric import V2, encrypt
+
+    cipher, salt, signature = encrypt(pickle.dumps({"foo": "bar"}), "sid")
+    legacy = ":".join(urlsafe_b64encode(v).decode("utf8") for v in [salt, signature, cipher])
+    assert session_manager._decrypt_data(legacy).foo == "bar"
+
+    http_ctx.session = session_manager._decrypt_data(legacy)
+    assert session_manager._decrypt_data(session_manager._encrypt_data()).foo == "bar"
+
+    #: unchanged sessions loaded from legacy cookies get re-encrypted
+    http_ctx.request.cookies = SimpleCookie()
+    http_ctx.request.cookies["foo_session"] = legacy
+    await session_manager.open_request()
+    assert http_ctx.session.foo == "bar"
+    await session_manager.close_request()
+    cookie = http_ctx.response.cookies["foo_session"].value
+    assert ":" not in cookie
+    assert urlsafe_b64decode(cookie)[:1] == V2
+    assert session_manager._decrypt_data(cookie).foo == "bar"
+
+
+@pytest.mark.asyncio
+async def test_session_lazy_loading(http_ctx, session_manager):
+    from emmett_core.sessions import LazySession
+
+    await session_manager.open_request()
+    assert isinstance(http_ctx.session, LazySession)
+    assert not http_ctx.session._loaded
+
+    await session_manager.close_request()
+    assert "foo_session" not in str(http_ctx.response.cookies)
+
+    await session_manager.open_request()
+    http_ctx.session.foo = "bar"
+    assert http_ctx.session._loaded
+    await session_manager.close_request()
+    assert "foo_session" in str(http_ctx.response.cookies)
+
+    http_ctx.request.cookies = http_ctx.response.cookies
+    await session_manager.open_request()
+    assert not http_ctx.session._loaded
+    assert http_ctx.session.foo == "bar"
+    assert "foo" in http_ctx.session
+
+
+def test_session_data_dirty_tracking():
+    from emmett_core.sessions import SessionData
+
+    data = SessionData({"foo": "bar", "cart": []})
+    assert not data._modified
+    data.cart.append(1)
+    assert not data._modified
+    assert data.pop("missing", None) is None
+    assert data.setdefault("foo", "baz") == "bar"
+    assert not data._modified
+
+    for mutate in [
+        lambda d: d.__setitem__("foo", "baz"),
+        lambda d: setattr(d, "foo", "baz"),
+        lambda d: delattr(d, "foo"),
+        lambda d: d.update(foo="baz"),
+        lambda d: d.pop("foo"),
+        lambda d: d.setdefault("bar", 1),
+        lambda d: d.clear(),
+    ]:
+        data = SessionData({"foo": "bar"})
+        mutate(data)
+        assert data._modified
+
+    data = SessionData({"cart": []}, deep_check=True)
+    assert not data._modified
+    data.cart.append(1)
+    assert data._modified
+    assert pickle.loads(data._dump) == {"cart": [1]}  # noqa: S301
+
+
+@pytest.mark.asyncio
+async def test_session_cookie_unchanged(http_ctx, session_manager):
+    await session_manager.open_request()
+    http_ctx.session.foo = "bar"
+    await session_manager.close_request()
+    cookie = http_ctx.response.cookies["foo_session"].value
+
+    http_ctx.request.cookies = http_ctx.response.cookies
+    await session_manager.open_request()
+    assert http_ctx.session.foo == "bar"
+    await session_manager.close_request()
+    assert http_ctx.response.cookies["foo_session"].value == cookie
+
+    await session_manager.open_request()
+    http_ctx.session.foo = "baz"
+    await session_manager.close_request()
+    assert http_ctx.response.cookies["foo_session"].value != cookie
+
+
+@pytest.fixture(scope="function")
+def async_session_manager(current, app, tmp_path):
+    class SessionManager(_SessionManager):
+        @classmethod
+        def _build_pipe(cls, handler_cls, *args, **kwargs):
+            cls._pipe = handler_cls(current, *args, **kwargs)
+            return cls._pipe
+
+    app.root_path = str(tmp_path)
+    return SessionManager.async_files(cookie_name="foo_session", max_workers=1)
+
+
+@pytest.mark.asyncio
+async def test_session_async_files(http_ctx, async_session_manager):
+    from http.cookies import SimpleCookie
+
+    from emmett_core.sessions import SessionData
+
+    await async_session_manager.open_request()
+    await async_session_manager.close_request()
+    assert "foo_session" not in str(http_ctx.response.cookies)
+
+    await async_session_manager.open_request()
+    http_ctx.session.foo = "bar"
+    sid = http_ctx.session._sid
+    await async_session_manager.close_request()
+    assert http_ctx.response.cookies["foo_session"].value == sid
+
+    http_ctx.request.cookies = http_ctx.response.cookies
+    await async_session_manager.open_request()
+    assert http_ctx.session.foo == "bar"
+    assert http_ctx.session._sid == sid
+    http_ctx.session.clear()
+    await async_session_manager.close_request()
+    assert await async_session_manager._load_async(sid) is None
+
+    #: stored empty sessions keep their id
+    async_session_manager._store(SessionData(sid=sid), 3600)
+    http_ctx.request.cookies = SimpleCookie()
+    http_ctx.request.cookies["foo_session"] = sid
+    await async_session_manager.open_request()
+    assert http_ctx.session._sid == sid
+    assert not http_ctx.session
+
+    executor = async_session_manager._executor
+    assert executor._max_workers == 1
+    async_session_manager.shutdown()
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+
+@pytest.mark.asyncio
+async def test_session_async_redis(http_ctx, current):
+    fakeredis = pytest.importorskip("fakeredis")
+
+    class SessionManager(_SessionManager):
+        @classmethod
+        def _build_pipe(cls, handler_cls, *args, **kwargs):
+            cls._pipe = handler_cls(current, *args, **kwargs)
+            return cls._pipe
+
+    redis = fakeredis.FakeAsyncRedis()
+    session_manager = SessionManager.async_redis(redis, cookie_name="foo_session")
+
+    await session_manager.open_request()
+    http_ctx.session.foo = "bar"
+    sid = http_ctx.session._sid
+    await session_manager.close_request()
+    assert await redis.ttl("emtsess:" + sid) == 3600
+
+    http_ctx.request.cookies = http_ctx.response.cookies
+    await session_manager.open_request()
+    assert http_ctx.session.foo == "bar"
+
+    await SessionManager.clear()
+    assert await redis.get("emtsess:" + sid) is None